@@ -0,0 +1,6 @@
+from ..services.loader import ReferenceLoader
+
+# One loader per request: FastAPI caches dependencies within a request,
+# so every service of that request shares the same batched lookups
+def get_reference_loader() -> ReferenceLoader:
+    return ReferenceLoader()
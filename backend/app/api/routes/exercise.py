@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, status
 from typing import List, Optional
 from bson import ObjectId
 from beanie.odm.operators.find.comparison import In
 
 from ...models.exercise import Exercise
-from ...schemas.exercise import ExerciseCreate, ExerciseUpdate, ExerciseResponse
-from ...services.exercise import ExerciseService
+from ...schemas.exercise import (
+    ExerciseCreate, ExerciseUpdate, ExerciseResponse, ExerciseBulkRequest, ExerciseBulkResponse,
+    ExerciseSearchHit, ExerciseAlternative
+)
+from ...services.exercise import EXERCISE_FIELDS, ExerciseService
+from ...utils.etag import CACHE_CONTROL, etag_matches, is_wildcard, not_modified
+from ...utils.projection import parse_fields
+from ...utils.serialization import RawJSONResponse
 
 router = APIRouter(prefix="/exercises", tags=["exercises"])
 
@@ -21,29 +27,70 @@ async def create_exercise(
     """Create a new exercise"""
     try:
         return await service.create_exercise(exercise_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating exercise: {str(e)}"
         )
 
+@router.post("/bulk", response_model=ExerciseBulkResponse)
+async def bulk_write_exercises(
+    request: ExerciseBulkRequest,
+    service: ExerciseService = Depends(get_exercise_service)
+):
+    """Create, upsert (by name), update and delete exercises in one batch"""
+    try:
+        return await service.bulk_write_exercises(request)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error writing exercises: {str(e)}"
+        )
+
 @router.get("/", response_model=List[ExerciseResponse])
 async def get_all_exercises(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
     muscle_group: Optional[str] = None,
     difficulty: Optional[str] = None,
     equipment: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     service: ExerciseService = Depends(get_exercise_service)
 ):
     """Get all exercises with optional filtering"""
     try:
-        return await service.get_exercises(
+        sparse_fields = parse_fields(fields, EXERCISE_FIELDS)
+        page = dict(
             skip=skip, 
             limit=limit, 
             muscle_group=muscle_group,
             difficulty=difficulty,
-            equipment=equipment
+            equipment=equipment,
+            cursor=cursor,
+            fields=sparse_fields
+        )
+        # The ETag and the cached body both come from the version read here
+        version = await service.catalog_version.get()
+        etag = await service.list_etag(**page, version=version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        body, next_cursor = await service.get_exercises_json(**page, version=version)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        # Already serialized in the shape of ExerciseResponse (or the trimmed view)
+        return RawJSONResponse(content=body, headers=headers)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         raise HTTPException(
@@ -51,34 +98,102 @@ async def get_all_exercises(
             detail=f"Error fetching exercises: {str(e)}"
         )
 
+@router.get("/search", response_model=List[ExerciseSearchHit])
+async def search_exercises(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    service: ExerciseService = Depends(get_exercise_service)
+):
+    """Search exercises by name, description and instructions"""
+    try:
+        return await service.search_exercises(q, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching exercises: {str(e)}"
+        )
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    service: ExerciseService = Depends(get_exercise_service)
+):
+    """Hit/miss counters of the exercise catalog cache"""
+    return service.cache_stats()
+
 @router.get("/{exercise_id}", response_model=ExerciseResponse)
 async def get_exercise(
     exercise_id: str,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     service: ExerciseService = Depends(get_exercise_service)
 ):
     """Get a specific exercise by ID"""
     try:
+        sparse_fields = parse_fields(fields, EXERCISE_FIELDS)
         if not ObjectId.is_valid(exercise_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid exercise ID format"
             )
         
-        exercise = await service.get_exercise_by_id(exercise_id)
-        if not exercise:
+        version = await service.catalog_version.get()
+        etag = await service.exercise_etag(exercise_id, fields=sparse_fields, version=version)
+        # "*" only matches an exercise that exists, so it is checked after the read
+        if not is_wildcard(if_none_match) and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        body = await service.get_exercise_json(exercise_id, fields=sparse_fields, version=version)
+        if body is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Exercise not found"
             )
-        return exercise
+        if is_wildcard(if_none_match):
+            return not_modified(etag)
+        return RawJSONResponse(content=body, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching exercise: {str(e)}"
         )
 
+@router.get("/{exercise_id}/alternatives", response_model=List[ExerciseAlternative])
+async def get_exercise_alternatives(
+    exercise_id: str,
+    equipment: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+    service: ExerciseService = Depends(get_exercise_service)
+):
+    """Substitutes for an exercise, most similar first, answered from memory"""
+    try:
+        if not ObjectId.is_valid(exercise_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid exercise ID format"
+            )
+
+        alternatives = await service.get_alternatives(exercise_id, limit, equipment, difficulty)
+        if alternatives is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Exercise not found"
+            )
+        return alternatives
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching alternatives: {str(e)}"
+        )
+
 @router.put("/{exercise_id}", response_model=ExerciseResponse)
 async def update_exercise(
     exercise_id: str,
@@ -102,6 +217,11 @@ async def update_exercise(
         return updated_exercise
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+
+from ...services.history import HistoryService
+
+router = APIRouter(tags=["history"])
+
+# Dependency injection for service
+def get_history_service() -> HistoryService:
+    return HistoryService()
+
+def _validate_user_id(user_id: str) -> None:
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid user ID format"
+        )
+
+@router.get("/users/{user_id}/history/export")
+async def export_history(
+    user_id: str,
+    service: HistoryService = Depends(get_history_service)
+):
+    """Stream a user's workouts and sessions as NDJSON"""
+    _validate_user_id(user_id)
+    return StreamingResponse(
+        service.export_user_history(user_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="history-{user_id}.ndjson"'}
+    )
+
+@router.post("/users/{user_id}/history/import")
+async def import_history(
+    user_id: str,
+    request: Request,
+    service: HistoryService = Depends(get_history_service)
+):
+    """Restore an NDJSON history export streamed in the request body"""
+    _validate_user_id(user_id)
+    try:
+        return await service.import_user_history(user_id, request.stream())
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error importing history: {str(e)}"
+        )
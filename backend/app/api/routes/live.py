@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from bson import ObjectId
+from pydantic import ValidationError
+
+from ...core.config import settings
+from ...models.session import WorkoutSession
+from ...schemas.session import LiveSetEvent
+from ...services.live import LiveSessionWriter
+from ...services.session import SessionService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["sessions"])
+
+@router.websocket("/sessions/{session_id}/live")
+async def live_session(websocket: WebSocket, session_id: str):
+    """Log sets of an in-progress session over one connection.
+
+    Client messages:
+        {"type": "set", "seq": 3, "session_exercise_id": "...", "reps": 8, "weight": 60}
+        {"type": "flush"}
+
+    Server messages:
+        {"type": "ready", "flush_interval": 15, "max_sets": 20}
+        {"type": "ack", "seq": 3}  -- buffered, not yet stored
+        {"type": "flushed", "through_seq": 3, "new_records": {...}, "rejected": [...]}  -- stored
+        {"type": "error", "detail": "..."}
+
+    Sets are stored when the flush interval elapses, when enough sets are
+    pending, on an explicit flush and when the connection closes. Sets of a
+    failed flush stay buffered and are retried by the next one. After a
+    reconnect, resend every set newer than the last ``through_seq``.
+    """
+    if not ObjectId.is_valid(session_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid session ID format")
+        return
+    if not await WorkoutSession.find({"_id": ObjectId(session_id), "status": "in_progress"}).count():
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Session not found or not in progress")
+        return
+
+    await websocket.accept()
+    writer = LiveSessionWriter(
+        SessionService(), session_id, settings.live_flush_interval, settings.live_flush_max_sets
+    )
+    await websocket.send_json({
+        "type": "ready", "flush_interval": writer.flush_interval, "max_sets": writer.max_sets
+    })
+
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive_json(), timeout=writer.seconds_until_flush())
+            except asyncio.TimeoutError:
+                message = {"type": "flush"}
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+
+            if message.get("type") == "set":
+                try:
+                    event = LiveSetEvent.model_validate(message)
+                except ValidationError as e:
+                    await websocket.send_json({"type": "error", "seq": message.get("seq"), "detail": str(e)})
+                    continue
+                if not ObjectId.is_valid(event.session_exercise_id):
+                    await websocket.send_json({"type": "error", "seq": event.seq, "detail": "Invalid session exercise ID format"})
+                    continue
+                flush_now = writer.add(event)
+                await websocket.send_json({"type": "ack", "seq": event.seq})
+                if not flush_now:
+                    continue
+            elif message.get("type") != "flush":
+                await websocket.send_json({"type": "error", "detail": f"Unknown message type {message.get('type')!r}"})
+                continue
+
+            try:
+                flushed = await writer.flush()
+            except Exception as e:
+                await websocket.send_json({"type": "error", "detail": f"Error storing sets: {str(e)}"})
+                continue
+            if flushed:
+                await websocket.send_json(flushed)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Whatever is still buffered is written even though the client is gone
+        try:
+            await writer.flush()
+        except Exception:
+            logger.exception("Could not store buffered sets of live session %s", session_id)
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional
+from bson import ObjectId
+
+from ...schemas.workout import WorkoutCreate
+from ...services.loader import ReferenceLoader
+from ...services.recommendation import RecommendationService
+from ..deps import get_reference_loader
+
+router = APIRouter(tags=["recommendations"])
+
+# Dependency injection for service
+def get_recommendation_service(loader: ReferenceLoader = Depends(get_reference_loader)) -> RecommendationService:
+    return RecommendationService(loader)
+
+@router.get("/users/{user_id}/recommendations/workout", response_model=WorkoutCreate)
+async def get_recommended_workout(
+    user_id: str,
+    split_day_id: Optional[str] = None,
+    size: int = Query(6, ge=1, le=12),
+    fresh: bool = False,
+    service: RecommendationService = Depends(get_recommendation_service)
+):
+    """Draft workout for a user's next split day, in the shape of a workout to create.
+
+    Serves the draft stored by the nightly job when it has ``size``
+    exercises, unless ``fresh`` or a specific ``split_day_id`` is requested.
+    """
+    try:
+        if not ObjectId.is_valid(user_id) or (split_day_id and not ObjectId.is_valid(split_day_id)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid ID format"
+            )
+
+        if not fresh and not split_day_id:
+            stored = await service.get_stored(user_id)
+            if stored and len(stored.exercises) == size:
+                return stored
+
+        draft = await service.recommend(user_id, split_day_id, size)
+        if draft is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        return draft
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error recommending workout: {str(e)}"
+        )
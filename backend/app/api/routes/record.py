@@ -0,0 +1,63 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from typing import List
+from bson import ObjectId
+
+from ...schemas.record import PersonalRecordResponse
+from ...services.record import PersonalRecordService
+
+router = APIRouter(tags=["progress"])
+
+# Dependency injection for service
+def get_record_service() -> PersonalRecordService:
+    return PersonalRecordService()
+
+@router.get("/users/{user_id}/records", response_model=List[PersonalRecordResponse])
+async def get_user_records(
+    user_id: str,
+    service: PersonalRecordService = Depends(get_record_service)
+):
+    """Get a user's personal records for every exercise"""
+    try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format"
+            )
+
+        return await service.get_user_records(user_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching records: {str(e)}"
+        )
+
+@router.get("/users/{user_id}/records/{exercise_id}", response_model=PersonalRecordResponse)
+async def get_user_record(
+    user_id: str,
+    exercise_id: str,
+    service: PersonalRecordService = Depends(get_record_service)
+):
+    """Get a user's personal records for one exercise"""
+    try:
+        if not ObjectId.is_valid(user_id) or not ObjectId.is_valid(exercise_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid ID format"
+            )
+
+        record = await service.get_record(user_id, exercise_id)
+        if not record:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No records for this exercise"
+            )
+        return record
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching record: {str(e)}"
+        )
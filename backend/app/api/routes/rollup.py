@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import List, Optional
+from datetime import date
+from bson import ObjectId
+
+from ...schemas.rollup import TrainingRollupResponse
+from ...services.loader import ReferenceLoader
+from ...services.rollup import RollupService
+from ..deps import get_reference_loader
+
+router = APIRouter(tags=["progress"])
+
+# Dependency injection for service
+def get_rollup_service(loader: ReferenceLoader = Depends(get_reference_loader)) -> RollupService:
+    return RollupService(loader)
+
+@router.get("/users/{user_id}/rollups", response_model=List[TrainingRollupResponse])
+async def get_user_rollups(
+    user_id: str,
+    period: str = Query("week", pattern="^(day|week|month)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    service: RollupService = Depends(get_rollup_service)
+):
+    """Training volume per muscle group per day, week or month"""
+    try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format"
+            )
+
+        return await service.get_rollups(user_id, period=period, start=start, end=end)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching rollups: {str(e)}"
+        )
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional
+from datetime import date, datetime
+from bson import ObjectId
+
+from ...schemas.schedule import ScheduleDayResponse, ScheduleResponse
+from ...services.schedule import MAX_SCHEDULE_DAYS, ScheduleService
+
+router = APIRouter(tags=["splits"])
+
+# Dependency injection for service
+def get_schedule_service() -> ScheduleService:
+    return ScheduleService()
+
+@router.get("/users/{user_id}/schedule", response_model=ScheduleResponse)
+async def get_user_schedule(
+    user_id: str,
+    start: Optional[date] = None,
+    days: int = Query(7, ge=1, le=MAX_SCHEDULE_DAYS),
+    service: ScheduleService = Depends(get_schedule_service)
+):
+    """What the user's active split plans for ``days`` days from ``start`` (today, UTC, by default)"""
+    try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format"
+            )
+
+        schedule = await service.get_schedule(user_id, start or datetime.utcnow().date(), days)
+        if not schedule:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No active split"
+            )
+        return schedule
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching schedule: {str(e)}"
+        )
+
+@router.get("/users/{user_id}/schedule/today", response_model=ScheduleDayResponse)
+async def get_todays_workout(
+    user_id: str,
+    on: Optional[date] = None,
+    service: ScheduleService = Depends(get_schedule_service)
+):
+    """Today's split day and workout; ``on`` gives the user's local date when it differs from UTC"""
+    try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format"
+            )
+
+        day = await service.get_day(user_id, on or datetime.utcnow().date())
+        if not day:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No active split"
+            )
+        return day
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching today's workout: {str(e)}"
+        )
@@ -0,0 +1,281 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional
+from bson import ObjectId
+
+from ...schemas.pagination import Page
+from ...schemas.session import (
+    WorkoutSessionCreate, WorkoutSessionResponse, WorkoutSessionSummaryResponse,
+    SessionExerciseCreate, SessionExerciseUpdate, SessionExerciseResponse
+)
+from ...services.loader import ReferenceLoader
+from ...services.session import SESSION_FIELDS, SessionService
+from ...utils.projection import parse_fields
+from ...utils.serialization import FastJSONResponse
+from ..deps import get_reference_loader
+
+router = APIRouter(tags=["sessions"])
+
+# Dependency injection for service
+def get_session_service(loader: ReferenceLoader = Depends(get_reference_loader)) -> SessionService:
+    return SessionService(loader)
+
+@router.get("/sessions/{session_id}", response_model=WorkoutSessionResponse)
+async def get_session(
+    session_id: str,
+    service: SessionService = Depends(get_session_service)
+):
+    """Get a session with its exercises"""
+    try:
+        if not ObjectId.is_valid(session_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid session ID format"
+            )
+
+        session = await service.get_session(session_id)
+        if not session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        return session
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching session: {str(e)}"
+        )
+
+@router.get("/users/{user_id}/sessions", response_model=Page[WorkoutSessionResponse])
+async def get_user_sessions(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    session_status: Optional[str] = Query(None, alias="status"),
+    fields: Optional[str] = None,
+    service: SessionService = Depends(get_session_service)
+):
+    """Get a user's session history, newest first"""
+    try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format"
+            )
+
+        sparse_fields = parse_fields(fields, SESSION_FIELDS)
+        page = await service.get_user_sessions(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            skip=skip,
+            status=session_status,
+            fields=sparse_fields
+        )
+        if sparse_fields:
+            # Trimmed items do not satisfy WorkoutSessionResponse, bypass response_model
+            return FastJSONResponse(content=page)
+        return page
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching sessions: {str(e)}"
+        )
+
+def _validate_ids(**ids: str) -> None:
+    for name, value in ids.items():
+        if not ObjectId.is_valid(value):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid {name.replace('_id', '')} ID format"
+            )
+
+@router.post("/users/{user_id}/sessions", response_model=WorkoutSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_session(
+    user_id: str,
+    session_data: WorkoutSessionCreate,
+    service: SessionService = Depends(get_session_service)
+):
+    """Start a workout session"""
+    try:
+        _validate_ids(user_id=user_id, workout_id=session_data.workout_id)
+        if session_data.split_id:
+            _validate_ids(split_id=session_data.split_id)
+        session = await service.create_session(user_id, session_data)
+        if not session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Workout not found"
+            )
+        return session
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating session: {str(e)}"
+        )
+
+@router.get("/sessions/{session_id}/summary", response_model=WorkoutSessionSummaryResponse)
+async def get_session_summary(
+    session_id: str,
+    service: SessionService = Depends(get_session_service)
+):
+    """Get the totals of a session without loading its exercises"""
+    try:
+        _validate_ids(session_id=session_id)
+        summary = await service.get_session_summary(session_id)
+        if not summary:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        return summary
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching session summary: {str(e)}"
+        )
+
+@router.post("/sessions/{session_id}/complete", response_model=WorkoutSessionSummaryResponse)
+async def complete_session(
+    session_id: str,
+    service: SessionService = Depends(get_session_service)
+):
+    """Complete a session and add it to the training rollups"""
+    try:
+        _validate_ids(session_id=session_id)
+        summary = await service.complete_session(session_id)
+        if not summary:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        return summary
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error completing session: {str(e)}"
+        )
+
+@router.post("/sessions/{session_id}/reconcile", response_model=WorkoutSessionSummaryResponse)
+async def reconcile_session(
+    session_id: str,
+    service: SessionService = Depends(get_session_service)
+):
+    """Rebuild the totals of a session from its exercises"""
+    try:
+        _validate_ids(session_id=session_id)
+        summary = await service.reconcile_session(session_id)
+        if not summary:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        return summary
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error reconciling session: {str(e)}"
+        )
+
+@router.post(
+    "/sessions/{session_id}/exercises",
+    response_model=SessionExerciseResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def add_session_exercise(
+    session_id: str,
+    exercise_data: SessionExerciseCreate,
+    service: SessionService = Depends(get_session_service)
+):
+    """Log an exercise in a session"""
+    try:
+        _validate_ids(
+            session_id=session_id,
+            exercise_id=exercise_data.exercise_id,
+            workout_exercise_id=exercise_data.workout_exercise_id
+        )
+        session_exercise = await service.add_session_exercise(session_id, exercise_data)
+        if not session_exercise:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        return session_exercise
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error logging exercise: {str(e)}"
+        )
+
+@router.put("/sessions/{session_id}/exercises/{session_exercise_id}", response_model=SessionExerciseResponse)
+async def update_session_exercise(
+    session_id: str,
+    session_exercise_id: str,
+    exercise_data: SessionExerciseUpdate,
+    service: SessionService = Depends(get_session_service)
+):
+    """Edit the logged sets of a session exercise"""
+    try:
+        _validate_ids(session_id=session_id, session_exercise_id=session_exercise_id)
+        session_exercise = await service.update_session_exercise(session_id, session_exercise_id, exercise_data)
+        if not session_exercise:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session exercise not found"
+            )
+        return session_exercise
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating exercise: {str(e)}"
+        )
+
+@router.post("/sessions/{session_id}/exercises/{session_exercise_id}/skip", response_model=SessionExerciseResponse)
+async def skip_session_exercise(
+    session_id: str,
+    session_exercise_id: str,
+    service: SessionService = Depends(get_session_service)
+):
+    """Mark a session exercise as skipped"""
+    try:
+        _validate_ids(session_id=session_id, session_exercise_id=session_exercise_id)
+        session_exercise = await service.skip_session_exercise(session_id, session_exercise_id)
+        if not session_exercise:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session exercise not found"
+            )
+        return session_exercise
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error skipping exercise: {str(e)}"
+        )
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional
+from datetime import datetime
+from bson import ObjectId
+
+from ...schemas.pagination import Page
+from ...schemas.session import LoggedSetResponse
+from ...services.set_history import SetHistoryService
+
+router = APIRouter(tags=["progress"])
+
+# Dependency injection for service
+def get_set_history_service() -> SetHistoryService:
+    return SetHistoryService()
+
+@router.get("/users/{user_id}/exercises/{exercise_id}/sets", response_model=Page[LoggedSetResponse])
+async def get_exercise_set_history(
+    user_id: str,
+    exercise_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    service: SetHistoryService = Depends(get_set_history_service)
+):
+    """Every set a user logged of one exercise, newest first"""
+    try:
+        if not ObjectId.is_valid(user_id) or not ObjectId.is_valid(exercise_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid ID format"
+            )
+
+        return await service.get_exercise_history(user_id, exercise_id, limit=limit, cursor=cursor, since=since)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching set history: {str(e)}"
+        )
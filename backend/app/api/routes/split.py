@@ -0,0 +1,191 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import List, Optional
+from bson import ObjectId
+
+from ...schemas.pagination import Page
+from ...schemas.split import WorkoutSplitCreate, WorkoutSplitUpdate, WorkoutSplitResponse, SplitDayCreate
+from ...services.loader import ReferenceLoader
+from ...services.split import SplitService
+from ..deps import get_reference_loader
+
+router = APIRouter(tags=["splits"])
+
+# Dependency injection for service
+def get_split_service(loader: ReferenceLoader = Depends(get_reference_loader)) -> SplitService:
+    return SplitService(loader)
+
+@router.get("/splits/{split_id}", response_model=WorkoutSplitResponse)
+async def get_split(
+    split_id: str,
+    service: SplitService = Depends(get_split_service)
+):
+    """Get a split with its days"""
+    try:
+        if not ObjectId.is_valid(split_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid split ID format"
+            )
+
+        split = await service.get_split(split_id)
+        if not split:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Split not found"
+            )
+        return split
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching split: {str(e)}"
+        )
+
+@router.get("/users/{user_id}/splits", response_model=Page[WorkoutSplitResponse])
+async def get_user_splits(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    service: SplitService = Depends(get_split_service)
+):
+    """Get a user's splits, newest first"""
+    try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format"
+            )
+
+        return await service.get_user_splits(user_id, limit=limit, cursor=cursor)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching splits: {str(e)}"
+        )
+
+@router.post("/users/{user_id}/splits", response_model=WorkoutSplitResponse, status_code=status.HTTP_201_CREATED)
+async def create_split(
+    user_id: str,
+    split_data: WorkoutSplitCreate,
+    service: SplitService = Depends(get_split_service)
+):
+    """Create a split with its days; it starts inactive"""
+    try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format"
+            )
+
+        return await service.create_split(user_id, split_data)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating split: {str(e)}"
+        )
+
+@router.put("/splits/{split_id}", response_model=WorkoutSplitResponse)
+async def update_split(
+    split_id: str,
+    split_data: WorkoutSplitUpdate,
+    service: SplitService = Depends(get_split_service)
+):
+    """Update a split; setting is_active activates or deactivates it"""
+    try:
+        if not ObjectId.is_valid(split_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid split ID format"
+            )
+
+        split = await service.update_split(split_id, split_data)
+        if not split:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Split not found"
+            )
+        return split
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating split: {str(e)}"
+        )
+
+@router.put("/splits/{split_id}/days", response_model=WorkoutSplitResponse)
+async def replace_split_days(
+    split_id: str,
+    days: List[SplitDayCreate],
+    service: SplitService = Depends(get_split_service)
+):
+    """Replace all days of a split"""
+    try:
+        if not ObjectId.is_valid(split_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid split ID format"
+            )
+
+        split = await service.replace_days(split_id, days)
+        if not split:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Split not found"
+            )
+        return split
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating split days: {str(e)}"
+        )
+
+@router.post("/splits/{split_id}/activate", response_model=WorkoutSplitResponse)
+async def activate_split(
+    split_id: str,
+    service: SplitService = Depends(get_split_service)
+):
+    """Make this the user's active split, deactivating the previous one"""
+    try:
+        if not ObjectId.is_valid(split_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid split ID format"
+            )
+
+        split = await service.activate_split(split_id)
+        if not split:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Split not found"
+            )
+        return split
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error activating split: {str(e)}"
+        )
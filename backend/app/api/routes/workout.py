@@ -0,0 +1,78 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional
+from bson import ObjectId
+
+from ...schemas.pagination import Page
+from ...schemas.workout import WorkoutResponse
+from ...services.loader import ReferenceLoader
+from ...services.workout import WorkoutService
+from ..deps import get_reference_loader
+
+router = APIRouter(tags=["workouts"])
+
+# Dependency injection for service
+def get_workout_service(loader: ReferenceLoader = Depends(get_reference_loader)) -> WorkoutService:
+    return WorkoutService(loader)
+
+@router.get("/workouts/{workout_id}", response_model=WorkoutResponse)
+async def get_workout(
+    workout_id: str,
+    service: WorkoutService = Depends(get_workout_service)
+):
+    """Get a workout with its exercises"""
+    try:
+        if not ObjectId.is_valid(workout_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid workout ID format"
+            )
+
+        workout = await service.get_workout(workout_id)
+        if not workout:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Workout not found"
+            )
+        return workout
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching workout: {str(e)}"
+        )
+
+@router.get("/users/{user_id}/workouts", response_model=Page[WorkoutResponse])
+async def get_user_workouts(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    service: WorkoutService = Depends(get_workout_service)
+):
+    """Get a user's workouts, newest first"""
+    try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format"
+            )
+
+        return await service.get_user_workouts(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            skip=skip
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching workouts: {str(e)}"
+        )
@@ -12,6 +12,55 @@ class Settings(BaseSettings):
     app_name: str | None = os.getenv("APP_NAME")
     app_version: str | None = os.getenv("APP_VERSION")
 
+    # Connection pool
+    mongo_max_pool_size: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    mongo_min_pool_size: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    mongo_wait_queue_timeout_ms: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))  # 0 waits indefinitely
+    mongo_server_selection_timeout_ms: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+
+    # Readiness probe
+    health_ping_timeout: float = float(os.getenv("HEALTH_PING_TIMEOUT", "2"))  # in seconds
+
+    # Startup: pool connections opened during warm-up, before the worker reports ready
+    mongo_warm_connections: int = int(os.getenv("MONGO_WARM_CONNECTIONS", "10"))
+    # Only the worker holding this lease creates and checks indexes at startup; 0 makes every worker do it
+    index_lease_seconds: float = float(os.getenv("INDEX_LEASE_SECONDS", "300"))
+
+    # Exercise catalog cache
+    exercise_cache_ttl: float = float(os.getenv("EXERCISE_CACHE_TTL", "300"))  # in seconds, 0 disables
+    exercise_cache_max_entries: int = int(os.getenv("EXERCISE_CACHE_MAX_ENTRIES", "1024"))
+    # How stale this worker's view of the catalog version (and so its ETags) may get after another worker's write
+    exercise_version_ttl: float = float(os.getenv("EXERCISE_VERSION_TTL", "1"))  # in seconds
+    # Catalog writes whose changed ids are kept, so other workers update their indexes incrementally
+    exercise_change_log_size: int = int(os.getenv("EXERCISE_CHANGE_LOG_SIZE", "256"))
+    # Substitutes precomputed per exercise for /exercises/{id}/alternatives; filters pick from these
+    exercise_alternatives_k: int = int(os.getenv("EXERCISE_ALTERNATIVES_K", "50"))
+    # Directory for the memory-mapped catalog snapshot shared by the workers of a node; empty disables it
+    catalog_snapshot_dir: str = os.getenv("CATALOG_SNAPSHOT_DIR", "/dev/shm")  # tmpfs, so the file lives in memory
+
+    # Index management
+    create_indexes: bool = os.getenv("CREATE_INDEXES", "true").lower() == "true"
+    index_check_mode: str = os.getenv("INDEX_CHECK_MODE", "warn")  # off, warn, fail
+
+    # Reference hydration for nested responses: "loader" ($in per collection) or "lookup" ($lookup aggregation)
+    hydration_strategy: str = os.getenv("HYDRATION_STRATEGY", "loader")
+
+    # Where exercise entries of new sessions live: "referenced" (own collection) or "embedded" (inside the session).
+    # Workouts are never created by the API; their layout is chosen by the data loaders and migrate-storage --to
+    session_exercise_storage: str = os.getenv("SESSION_EXERCISE_STORAGE", "referenced")
+
+    # Per-exercise set history: sets are always written to both SessionExercise documents and set buckets;
+    # reads use "documents" until manage.py backfill-set-buckets has run, then "buckets"
+    set_history_source: str = os.getenv("SET_HISTORY_SOURCE", "documents")
+    set_bucket_size: int = int(os.getenv("SET_BUCKET_SIZE", "200"))  # sets per bucket before a new one is started
+
+    # Live session WebSocket: buffered sets are written every interval or once this many are pending
+    live_flush_interval: float = float(os.getenv("LIVE_FLUSH_INTERVAL", "15"))  # in seconds
+    live_flush_max_sets: int = int(os.getenv("LIVE_FLUSH_MAX_SETS", "20"))
+
+    # Training history export/import
+    history_batch_size: int = int(os.getenv("HISTORY_BATCH_SIZE", "500"))
+
     class Config:
         env_file = ".env"
         case_sensitive = False
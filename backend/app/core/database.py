@@ -1,46 +1,187 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from .config import settings
-from typing import Optional
+from .indexes import check_indexes
+from .metrics import CommandMetricsListener
+from .monitoring import PoolStatsListener
+from .startup import startup
+from typing import Optional, Set
+import asyncio
+import os
+import socket
+import time
 
 mongodb_client: Optional[AsyncIOMotorClient] = None
 
-async def connect_to_mongo():
-    """Create database connection"""
+# Leases this process holds, released when the connection closes
+held_leases: Set[str] = set()
+
+# Lives for the whole process so counters survive reconnects
+pool_stats = PoolStatsListener()
+command_metrics = CommandMetricsListener()
+
+async def connect_to_mongo(elect_index_leader: bool = False, build_indexes: bool = True):
+    """Create database connection.
+
+    With ``elect_index_leader`` (set by the API workers), indexes are only
+    created and checked by the worker that wins the startup lease; the
+    others skip those round trips. The leader renews the lease while it
+    builds and releases it if the build fails, so the next worker to start
+    retries; a leader that dies without releasing is taken over once the
+    lease expires. Maintenance scripts always do both,
+    except the ones that fix data an index cannot be built on
+    (``build_indexes=False``).
+    """
     global mongodb_client
-    mongodb_client = AsyncIOMotorClient(settings.mongodb_url)
-    
-    # Import all models
-    from ..models.user import User
-    from ..models.exercise import Exercise
-    from ..models.workout import Workout, WorkoutExercise
-    from ..models.split import WorkoutSplit, SplitDay
-    from ..models.session import WorkoutSession, SessionExercise
-    
+    mongodb_client = AsyncIOMotorClient(
+        settings.mongodb_url,
+        maxPoolSize=settings.mongo_max_pool_size,
+        minPoolSize=settings.mongo_min_pool_size,
+        waitQueueTimeoutMS=settings.mongo_wait_queue_timeout_ms or None,
+        serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+        event_listeners=[pool_stats, command_metrics]
+    )
+
     # Ensure database_name is not None
     if settings.database_name is None:
         raise ValueError("settings.database_name cannot be None")
+
+    # Server selection and the first connection, before anything else waits on them
+    with startup.phase("first_ping"):
+        await ping_database(settings.mongo_server_selection_timeout_ms / 1000)
+
+    leader = build_indexes
+    if leader and elect_index_leader and settings.index_lease_seconds > 0:
+        leader = await acquire_lease("indexes", settings.index_lease_seconds)
+    startup.index_leader = leader
+
+    # Import all models
+    with startup.phase("import_models"):
+        from ..models.user import User
+        from ..models.exercise import Exercise
+        from ..models.workout import Workout, WorkoutExercise
+        from ..models.split import WorkoutSplit, SplitDay
+        from ..models.session import WorkoutSession, SessionExercise
+        from ..models.rollup import UserDailyRollup
+        from ..models.record import PersonalRecord
+        from ..models.recommendation import WorkoutRecommendation
+        from ..models.schedule import UserSchedule
+        from ..models.set_bucket import SetBucket
+
+    document_models = [
+        User, 
+        Exercise, 
+        Workout, 
+        WorkoutExercise, 
+        WorkoutSplit, 
+        SplitDay, 
+        WorkoutSession, 
+        SessionExercise,
+        UserDailyRollup,
+        PersonalRecord,
+        WorkoutRecommendation,
+        UserSchedule,
+        SetBucket
+    ]
     
-    await init_beanie(
-        database=mongodb_client[settings.database_name],
-        document_models=[
-            User, 
-            Exercise, 
-            Workout, 
-            WorkoutExercise, 
-            WorkoutSplit, 
-            SplitDay, 
-            WorkoutSession, 
-            SessionExercise
-        ]
-    )
+    renewer = asyncio.create_task(renew_lease("indexes", settings.index_lease_seconds)) if "indexes" in held_leases else None
+    try:
+        # Beanie creates the indexes declared in each Document's Settings
+        with startup.phase("init_beanie"):
+            await init_beanie(
+                database=mongodb_client[settings.database_name],
+                document_models=document_models,
+                skip_indexes=not (settings.create_indexes and leader)
+            )
+        if leader:
+            with startup.phase("check_indexes"):
+                await check_indexes(document_models, mode=settings.index_check_mode)
+    except BaseException:
+        if "indexes" in held_leases:
+            await release_lease("indexes")
+        raise
+    finally:
+        if renewer is not None:
+            renewer.cancel()
 
 async def close_mongo_connection():
-    """Close database connection"""
+    """Release the leases this process holds and close the database connection"""
     global mongodb_client
     if mongodb_client:
+        for name in list(held_leases):
+            await release_lease(name)
         mongodb_client.close()
 
+async def ping_database(timeout: float) -> float:
+    """Round-trip a ping to the server; returns the latency in milliseconds.
+
+    Raises asyncio.TimeoutError if no reply arrives within ``timeout`` seconds.
+    """
+    if mongodb_client is None:
+        raise RuntimeError("MongoDB client is not initialized")
+    started = time.perf_counter()
+    await asyncio.wait_for(mongodb_client.admin.command("ping"), timeout=timeout)
+    return (time.perf_counter() - started) * 1000
+
+def _lease_holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+async def acquire_lease(name: str, seconds: float) -> bool:
+    """Take (or renew) the named lease for ``seconds``; False while another process holds it.
+
+    The upsert only matches a free, expired or already owned lease; when
+    another holder's lease is live it tries to insert a second document
+    with the same _id and fails on the unique _id index.
+    """
+    holder = _lease_holder()
+    now = datetime.utcnow()
+    leases = mongodb_client[settings.database_name]["leases"]
+    try:
+        await leases.update_one(
+            {"_id": name, "$or": [{"expires_at": {"$lt": now}}, {"holder": holder}]},
+            {"$set": {"holder": holder, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        held_leases.discard(name)
+        return False
+    held_leases.add(name)
+    return True
+
+async def renew_lease(name: str, seconds: float) -> None:
+    """Keep renewing a held lease until cancelled or until it is lost"""
+    while True:
+        await asyncio.sleep(seconds / 3)
+        if not await acquire_lease(name, seconds):
+            return
+
+async def release_lease(name: str) -> None:
+    """Give up the named lease if this process still holds it.
+
+    A release that cannot reach the server is dropped; the lease then
+    frees itself when it expires.
+    """
+    held_leases.discard(name)
+    try:
+        await mongodb_client[settings.database_name]["leases"].delete_one({"_id": name, "holder": _lease_holder()})
+    except PyMongoError:
+        pass
+
+async def warm_pool(connections: int) -> int:
+    """Open up to ``connections`` pool connections with concurrent pings.
+
+    Concurrent commands each check out their own connection, so the pool
+    grows to that size now instead of during the first requests. Returns
+    the number of open connections afterwards.
+    """
+    if mongodb_client is None:
+        raise RuntimeError("MongoDB client is not initialized")
+    connections = min(connections, settings.mongo_max_pool_size or connections)
+    await asyncio.gather(*(mongodb_client.admin.command("ping") for _ in range(connections)))
+    return sum(pool["connections"] for pool in pool_stats.snapshot().values())
+
 async def get_database():
     """Get database instance"""
     if mongodb_client is None:
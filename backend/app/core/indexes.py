@@ -0,0 +1,71 @@
+from typing import Dict, List, Sequence, Type
+from beanie import Document
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_CHECK_MODES = ("off", "warn", "fail")
+
+def _key_spec(key) -> tuple:
+    """Normalize an index key (SON, dict or list of pairs) to an ordered tuple"""
+    items = key.items() if hasattr(key, "items") else key
+    return tuple((field, direction) for field, direction in items)
+
+async def _index_usage(collection) -> Dict[str, int]:
+    """Operations served per index since the server last started"""
+    try:
+        stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+    except Exception:
+        # $indexStats needs the clusterMonitor role and is missing on some deployments
+        return {}
+    return {stat["name"]: int(stat["accesses"]["ops"]) for stat in stats}
+
+async def verify_indexes(document_models: Sequence[Type[Document]]) -> Dict[str, Dict[str, List[str]]]:
+    """Compare declared indexes against the ones present in MongoDB.
+
+    Returns a report per collection with the declared indexes that are missing,
+    the indexes present but not declared, and the ones never used.
+    """
+    report = {}
+    for model in document_models:
+        declared = {
+            _key_spec(index.index.document["key"]): index.name
+            for index in model.get_settings().indexes
+        }
+        collection = model.get_motor_collection()
+        existing = {
+            _key_spec(details["key"]): name
+            for name, details in (await collection.index_information()).items()
+            if name != "_id_"
+        }
+        usage = await _index_usage(collection)
+
+        report[collection.name] = {
+            "missing": [name for key, name in declared.items() if key not in existing],
+            "undeclared": [name for key, name in existing.items() if key not in declared],
+            "unused": sorted(name for name, ops in usage.items() if name != "_id_" and ops == 0),
+        }
+    return report
+
+async def check_indexes(document_models: Sequence[Type[Document]], mode: str = "warn") -> Dict[str, Dict[str, List[str]]]:
+    """Verify indexes and warn or fail according to the configured mode"""
+    if mode not in INDEX_CHECK_MODES:
+        raise ValueError(f"index_check_mode must be one of {INDEX_CHECK_MODES}, got {mode!r}")
+    if mode == "off":
+        return {}
+
+    report = await verify_indexes(document_models)
+    missing = {name: result["missing"] for name, result in report.items() if result["missing"]}
+
+    for collection_name, result in report.items():
+        if result["undeclared"]:
+            logger.warning("Collection %s has undeclared indexes: %s", collection_name, result["undeclared"])
+        if result["unused"]:
+            logger.info("Collection %s has unused indexes: %s", collection_name, result["unused"])
+
+    if missing:
+        message = f"Missing MongoDB indexes: {missing}"
+        if mode == "fail":
+            raise RuntimeError(message)
+        logger.warning(message)
+    return report
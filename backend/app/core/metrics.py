@@ -0,0 +1,210 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import time
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, labels: Sequence[str], amount: float = 1) -> None:
+        key = tuple(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (non-cumulative, +Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = Lock()
+
+    def observe(self, labels: Sequence[str], value: float) -> None:
+        key = tuple(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+class RequestMetrics:
+    """Database work attributed to the request currently being served"""
+
+    __slots__ = ("scope", "db_seconds", "db_commands")
+
+    def __init__(self, scope: Dict[str, Any]):
+        # The router adds the matched route to this same scope dict
+        self.scope = scope
+        self.db_seconds = 0.0
+        self.db_commands = 0
+
+    @property
+    def route(self) -> str:
+        """Path template of the matched route, so ids do not explode the label set"""
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+# Set by the middleware; Motor copies the context into its executor threads,
+# so command events see the request that issued them
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds", "Time spent in MongoDB commands per HTTP request", ("method", "route")
+)
+http_request_db_commands = Histogram(
+    "http_request_db_commands", "MongoDB commands issued per HTTP request", ("method", "route"), COUNT_BUCKETS
+)
+mongodb_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ("collection", "command", "route")
+)
+mongodb_command_documents = Counter(
+    "mongodb_command_documents_total", "Documents returned or written by MongoDB commands", ("collection", "command", "route")
+)
+mongodb_command_failures = Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands", ("collection", "command", "route")
+)
+
+def _reply_documents(reply: Dict[str, Any]) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Times every MongoDB command per collection and command name.
+
+    Durations are also added to the ``RequestMetrics`` of the request that
+    issued the command, so per-route DB time can be told apart from the
+    rest of the request.
+    """
+
+    # Handshake and monitoring chatter that says nothing about the application
+    IGNORED = frozenset({"hello", "ismaster", "isMaster", "ping", "buildInfo", "saslStart", "saslContinue", "endSessions"})
+
+    def __init__(self):
+        self._started: Dict[Tuple[int, Any], str] = {}
+        self._lock = Lock()
+
+    def started(self, event):
+        if event.command_name in self.IGNORED:
+            return
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        with self._lock:
+            self._started[(event.request_id, event.connection_id)] = target if isinstance(target, str) else "-"
+
+    def _finish(self, event) -> Optional[Tuple[str, str, str]]:
+        with self._lock:
+            collection = self._started.pop((event.request_id, event.connection_id), None)
+        if collection is None:
+            return None
+        request = current_request.get()
+        seconds = event.duration_micros / 1_000_000
+        if request is not None:
+            request.db_seconds += seconds
+            request.db_commands += 1
+        labels = (collection, event.command_name, request.route if request else "background")
+        mongodb_command_duration.observe(labels, seconds)
+        return labels
+
+    def succeeded(self, event):
+        labels = self._finish(event)
+        if labels is not None:
+            mongodb_command_documents.inc(labels, _reply_documents(event.reply))
+
+    def failed(self, event):
+        labels = self._finish(event)
+        if labels is not None:
+            mongodb_command_failures.inc(labels)
+
+def _pool_gauges(pools: Dict[str, Dict[str, Any]]) -> List[str]:
+    lines = []
+    for field in ("connections", "checked_out", "waiting", "max_pool_size", "wait_ms_p95"):
+        name = f"mongodb_pool_{field}"
+        lines += [f"# TYPE {name} gauge"]
+        for server, stats in sorted(pools.items()):
+            if stats.get(field) is not None:
+                lines.append(f'{name}{{server="{_escape(server)}"}} {_number(stats[field])}')
+    return lines
+
+def render_metrics(pools: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Everything in the Prometheus text exposition format"""
+    lines: List[str] = []
+    metrics: Iterable[Any] = (
+        http_request_duration, http_request_db_duration, http_request_db_commands,
+        mongodb_command_duration, mongodb_command_documents, mongodb_command_failures,
+    )
+    for metric in metrics:
+        lines += metric.render()
+    if pools:
+        lines += _pool_gauges(pools)
+    return "\n".join(lines) + "\n"
+
+async def metrics_middleware(request, call_next):
+    """Record latency per route template and status, plus the DB time spent on it"""
+    metrics = RequestMetrics(request.scope)
+    token = current_request.set(metrics)
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        current_request.reset(token)
+        http_request_duration.observe(
+            (request.method, metrics.route, str(status_code)), time.perf_counter() - started
+        )
+        http_request_db_duration.observe((request.method, metrics.route), metrics.db_seconds)
+        http_request_db_commands.observe((request.method, metrics.route), metrics.db_commands)
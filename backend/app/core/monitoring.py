@@ -0,0 +1,120 @@
+from collections import deque
+from threading import Lock
+from typing import Any, Deque, Dict
+from pymongo import monitoring
+
+RECENT_WAITS = 1024
+
+def _percentile(samples: Deque[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Connection pool counters per server, fed by PyMongo's CMAP events.
+
+    ``checked_out`` near ``max_pool_size`` together with a growing
+    ``waiting`` count and wait times means the pool is exhausted; slow
+    queries with an idle pool point at the database instead. Events arrive
+    on driver threads, so all updates happen under a lock.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._pools: Dict[str, Dict[str, Any]] = {}
+        self._waits: Dict[str, Deque[float]] = {}
+
+    def _pool(self, address) -> Dict[str, Any]:
+        key = f"{address[0]}:{address[1]}"
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = {
+                "max_pool_size": None,
+                "min_pool_size": None,
+                "connections": 0,
+                "checked_out": 0,
+                "waiting": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "checkout_timeouts": 0,
+                "clears": 0,
+            }
+            self._waits[key] = deque(maxlen=RECENT_WAITS)
+        return pool
+
+    def _record_wait(self, event) -> None:
+        # ``duration`` (seconds) is reported by PyMongo 4.7+
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            self._waits[f"{event.address[0]}:{event.address[1]}"].append(duration * 1000)
+
+    def pool_created(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            # Options left at their default are not reported in the event
+            pool["max_pool_size"] = event.options.get("maxPoolSize", 100)
+            pool["min_pool_size"] = event.options.get("minPoolSize", 0)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event.address)["clears"] += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event.address)["connections"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["connections"] = max(0, pool["connections"] - 1)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._pool(event.address)["waiting"] += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["waiting"] = max(0, pool["waiting"] - 1)
+            pool["checkout_failures"] += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                pool["checkout_timeouts"] += 1
+            self._record_wait(event)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["waiting"] = max(0, pool["waiting"] - 1)
+            pool["checked_out"] += 1
+            pool["checkouts"] += 1
+            self._record_wait(event)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["checked_out"] = max(0, pool["checked_out"] - 1)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current counters plus wait times over the last checkouts, per server"""
+        with self._lock:
+            stats = {}
+            for key, pool in self._pools.items():
+                waits = self._waits[key]
+                stats[key] = {
+                    **pool,
+                    "wait_ms_avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "wait_ms_p95": round(_percentile(waits, 0.95), 3),
+                    "wait_ms_max": round(max(waits), 3) if waits else 0.0,
+                }
+            return stats
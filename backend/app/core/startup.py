@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import time
+
+# Imported first thing by app.main, so "import" covers loading the application modules
+_imported_at = time.perf_counter()
+
+class StartupState:
+    """Duration of each startup phase and whether this worker has warmed up.
+
+    Readiness stays false until the warm-up phase has finished, so an
+    orchestrator only routes traffic to a worker whose connection pool and
+    catalog are already loaded.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.ready = False
+        self.index_leader: Optional[bool] = None
+        self.error: Optional[str] = None
+
+    def mark_imported(self) -> None:
+        self.phases.setdefault("import", round((time.perf_counter() - _imported_at) * 1000, 1))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "index_leader": self.index_leader,
+            "phases_ms": dict(self.phases),
+            "total_ms": round(sum(self.phases.values()), 1),
+            "error": self.error,
+        }
+
+startup = StartupState()
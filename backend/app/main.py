@@ -1,20 +1,53 @@
-from fastapi import FastAPI, HTTPException, status
+# First, so the startup "import" phase covers everything below
+from .core.startup import startup
+from fastapi import FastAPI, Header, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 from typing import List, Optional
 from bson import ObjectId
-from .core.database import connect_to_mongo, close_mongo_connection, get_database
+import asyncio
+from .core.database import connect_to_mongo, close_mongo_connection, get_database, ping_database, pool_stats, warm_pool
 from .core.config import settings
-from .models.exercise import Exercise
-from .schemas.exercise import ExerciseCreate, ExerciseUpdate, ExerciseResponse
+from .core.metrics import metrics_middleware, render_metrics
+from .api.routes import history, live, recommendation, record, rollup, schedule, session, set_history, split, workout
+from .schemas.exercise import (
+    ExerciseCreate, ExerciseUpdate, ExerciseResponse, ExerciseBulkRequest, ExerciseBulkResponse,
+    ExerciseSearchHit, ExerciseAlternative
+)
+from .services.exercise import EXERCISE_FIELDS, ExerciseService
+from .utils.etag import CACHE_CONTROL, etag_matches, is_wildcard, not_modified
+from .utils.projection import parse_fields
+from .utils.serialization import RawJSONResponse
+
+async def warm_up():
+    """Open pool connections and load the catalog, then report ready"""
+    try:
+        if settings.mongo_warm_connections:
+            with startup.phase("warm_pool"):
+                connections = await warm_pool(settings.mongo_warm_connections)
+            print(f"Opened {connections} MongoDB connections")
+        with startup.phase("preload_catalog"):
+            indexed = await exercise_service.preload()
+        print(f"Indexed {indexed} exercises for search")
+    except Exception as e:
+        # Still serviceable: whatever was not warmed is loaded by the first requests
+        startup.error = f"Warm-up failed: {str(e)}"
+        print(startup.error)
+    startup.ready = True
+    print(f"Ready after {startup.snapshot()['total_ms']} ms: {startup.phases}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await connect_to_mongo()
-    print("Connected to MongoDB")
+    startup.mark_imported()
+    await connect_to_mongo(elect_index_leader=True)
+    print("Connected to MongoDB" + ("" if startup.index_leader else " (indexes maintained by another worker)"))
+    # Warm up while already serving liveness probes; readiness waits for it
+    warm_up_task = asyncio.create_task(warm_up())
     yield
     # Shutdown
+    warm_up_task.cancel()
     await close_mongo_connection()
     print("Disconnected from MongoDB")
 
@@ -25,6 +58,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.middleware("http")(metrics_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Configure this properly for production
@@ -35,17 +70,29 @@ app.add_middleware(
 
 # Include API routes
 # app.include_router(exercise.router, prefix="/api/v1")
+app.include_router(session.router, prefix="/api/v1")
+app.include_router(workout.router, prefix="/api/v1")
+app.include_router(split.router, prefix="/api/v1")
+app.include_router(schedule.router, prefix="/api/v1")
+app.include_router(history.router, prefix="/api/v1")
+app.include_router(rollup.router, prefix="/api/v1")
+app.include_router(record.router, prefix="/api/v1")
+app.include_router(set_history.router, prefix="/api/v1")
+app.include_router(recommendation.router, prefix="/api/v1")
+app.include_router(live.router, prefix="/api/v1")
+
+exercise_service = ExerciseService()
 
 # Exercise endpoints for testing
 @app.post("/api/v1/exercises", response_model=ExerciseResponse, status_code=status.HTTP_201_CREATED)
 async def create_exercise(exercise_data: ExerciseCreate):
     """Create a new exercise"""
     try:
-        exercise = Exercise(**exercise_data.dict())
-        await exercise.insert()
-        return ExerciseResponse(
-            id=str(exercise.id),
-            **exercise.dict()
+        return await exercise_service.create_exercise(exercise_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         raise HTTPException(
@@ -53,66 +100,163 @@ async def create_exercise(exercise_data: ExerciseCreate):
             detail=f"Error creating exercise: {str(e)}"
         )
 
+@app.post("/api/v1/exercises/bulk", response_model=ExerciseBulkResponse)
+async def bulk_write_exercises(request: ExerciseBulkRequest):
+    """Create, upsert (by name), update and delete exercises in one batch"""
+    try:
+        return await exercise_service.bulk_write_exercises(request)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error writing exercises: {str(e)}"
+        )
+
 @app.get("/api/v1/exercises", response_model=List[ExerciseResponse])
 async def get_exercises(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
     muscle_group: Optional[str] = None,
     difficulty: Optional[str] = None,
-    equipment: Optional[str] = None
+    equipment: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get all exercises with optional filtering"""
+    """Get all exercises with optional filtering.
+
+    The cursor of the next page is returned in the X-Next-Cursor header.
+    ``fields`` (e.g. ``id,name,muscle_groups``) trims the returned documents.
+    A request whose If-None-Match holds the page's ETag gets 304 without
+    the catalog being queried.
+    """
     try:
-        query = {}
-        
-        if muscle_group:
-            query["muscle_groups"] = {"$in": [muscle_group]}
-        if difficulty:
-            query["difficulty"] = difficulty
-        if equipment:
-            query["equipment"] = equipment
-        
-        exercises = await Exercise.find(query).skip(skip).limit(limit).to_list()
-        return [
-            ExerciseResponse(
-                id=str(exercise.id),
-                **exercise.dict()
-            ) for exercise in exercises
-        ]
+        sparse_fields = parse_fields(fields, EXERCISE_FIELDS)
+        page = dict(
+            skip=skip,
+            limit=limit,
+            muscle_group=muscle_group,
+            difficulty=difficulty,
+            equipment=equipment,
+            cursor=cursor,
+            fields=sparse_fields
+        )
+        # The ETag and the cached body both come from the version read here
+        version = await exercise_service.catalog_version.get()
+        etag = await exercise_service.list_etag(**page, version=version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        body, next_cursor = await exercise_service.get_exercises_json(**page, version=version)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        # Already serialized in the shape of ExerciseResponse (or the trimmed view)
+        return RawJSONResponse(content=body, headers=headers)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching exercises: {str(e)}"
         )
 
+@app.get("/api/v1/exercises/search", response_model=List[ExerciseSearchHit])
+async def search_exercises(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search exercises by name, description and instructions.
+
+    Matches whole words, prefixes ("ben" -> bench) and small typos
+    ("pulup" -> pullup); results are ranked by relevance.
+    """
+    try:
+        return await exercise_service.search_exercises(q, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching exercises: {str(e)}"
+        )
+
+@app.get("/api/v1/exercises/cache/stats")
+async def get_exercise_cache_stats():
+    """Hit/miss counters of the exercise catalog cache"""
+    return exercise_service.cache_stats()
+
 @app.get("/api/v1/exercises/{exercise_id}", response_model=ExerciseResponse)
-async def get_exercise(exercise_id: str):
+async def get_exercise(exercise_id: str, fields: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
     """Get a specific exercise by ID"""
     try:
+        sparse_fields = parse_fields(fields, EXERCISE_FIELDS)
         if not ObjectId.is_valid(exercise_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid exercise ID format"
             )
         
-        exercise = await Exercise.get(ObjectId(exercise_id))
-        if not exercise:
+        version = await exercise_service.catalog_version.get()
+        etag = await exercise_service.exercise_etag(exercise_id, fields=sparse_fields, version=version)
+        # "*" only matches an exercise that exists, so it is checked after the read
+        if not is_wildcard(if_none_match) and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        body = await exercise_service.get_exercise_json(exercise_id, fields=sparse_fields, version=version)
+        if body is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Exercise not found"
             )
-        return ExerciseResponse(
-            id=str(exercise.id),
-            **exercise.dict()
-        )
+        if is_wildcard(if_none_match):
+            return not_modified(etag)
+        return RawJSONResponse(content=body, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching exercise: {str(e)}"
         )
 
+@app.get("/api/v1/exercises/{exercise_id}/alternatives", response_model=List[ExerciseAlternative])
+async def get_exercise_alternatives(
+    exercise_id: str,
+    equipment: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Substitutes for an exercise, most similar first, answered from memory.
+
+    Similarity is the overlap of muscle groups, weighted by equipment and
+    difficulty; ``equipment`` and ``difficulty`` restrict the substitutes.
+    """
+    try:
+        if not ObjectId.is_valid(exercise_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid exercise ID format"
+            )
+
+        alternatives = await exercise_service.get_alternatives(exercise_id, limit, equipment, difficulty)
+        if alternatives is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Exercise not found"
+            )
+        return alternatives
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching alternatives: {str(e)}"
+        )
+
 @app.put("/api/v1/exercises/{exercise_id}", response_model=ExerciseResponse)
 async def update_exercise(exercise_id: str, exercise_data: ExerciseUpdate):
     """Update an existing exercise"""
@@ -123,25 +267,20 @@ async def update_exercise(exercise_id: str, exercise_data: ExerciseUpdate):
                 detail="Invalid exercise ID format"
             )
         
-        exercise = await Exercise.get(ObjectId(exercise_id))
-        if not exercise:
+        updated_exercise = await exercise_service.update_exercise(exercise_id, exercise_data)
+        if not updated_exercise:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Exercise not found"
             )
-        
-        # Update only provided fields
-        update_data = exercise_data.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(exercise, field, value)
-        
-        await exercise.save()
-        return ExerciseResponse(
-            id=str(exercise.id),
-            **exercise.dict()
-        )
+        return updated_exercise
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -158,14 +297,12 @@ async def delete_exercise(exercise_id: str):
                 detail="Invalid exercise ID format"
             )
         
-        exercise = await Exercise.get(ObjectId(exercise_id))
-        if not exercise:
+        deleted = await exercise_service.delete_exercise(exercise_id)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Exercise not found"
             )
-        
-        await exercise.delete()
     except HTTPException:
         raise
     except Exception as e:
@@ -180,7 +317,50 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "database": "connected"}
+    """Liveness only; use /health/ready to check the database"""
+    return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Request and MongoDB metrics in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(pool_stats.snapshot()), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving requests; never touches the database"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Ping MongoDB with a timeout and report latency, connection pool usage and startup timings.
+
+    Returns 503 while the worker is still warming up, or when the ping
+    fails or times out, so the instance is taken out of rotation until the
+    database is reachable again.
+    """
+    if not startup.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "starting", "startup": startup.snapshot(), "pools": pool_stats.snapshot()}
+        )
+    try:
+        latency = await ping_database(settings.health_ping_timeout)
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "error": f"Ping timed out after {settings.health_ping_timeout}s", "pools": pool_stats.snapshot()}
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "error": str(e), "pools": pool_stats.snapshot()}
+        )
+    return {
+        "status": "ready",
+        "latency_ms": round(latency, 3),
+        "pools": pool_stats.snapshot(),
+        "startup": startup.snapshot()
+    }
 
 @app.get("/test-db")
 async def test_db():
@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, IndexModel
 from pydantic import Field
 from typing import List, Optional
 from datetime import datetime
@@ -13,4 +14,19 @@ class Exercise(Document):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
-        collection = "exercises"
\ No newline at end of file
+        collection = "exercises"
+        indexes = [
+            # Serves muscle_group with any combination of difficulty/equipment
+            IndexModel(
+                [("muscle_groups", ASCENDING), ("difficulty", ASCENDING), ("equipment", ASCENDING)],
+                name="muscle_groups_difficulty_equipment"
+            ),
+            IndexModel(
+                [("difficulty", ASCENDING), ("equipment", ASCENDING)],
+                name="difficulty_equipment"
+            ),
+            IndexModel([("equipment", ASCENDING)], name="equipment"),
+            # Names identify exercises in bulk upserts (manage.py dedupe-exercise-names
+            # renames duplicates in existing data before this index is built)
+            IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+        ]
\ No newline at end of file
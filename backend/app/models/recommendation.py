@@ -0,0 +1,20 @@
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+from pydantic import Field
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+from ..core.types import PyObjectId
+
+class WorkoutRecommendation(Document):
+    """The latest workout draft generated for a user by the nightly recommendation job"""
+    user_id: PyObjectId = Field(...)
+    split_day_id: Optional[PyObjectId] = None  # The day the draft targets, if the user has an active split
+    workout: Dict[str, Any] = Field(...)  # WorkoutCreate fields
+    generated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "workout_recommendations"
+        indexes = [
+            IndexModel([("user_id", ASCENDING)], name="user_unique", unique=True),
+        ]
@@ -0,0 +1,24 @@
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+from pydantic import Field
+from typing import Dict, Optional
+from datetime import datetime
+
+from ..core.types import PyObjectId
+
+class PersonalRecord(Document):
+    """Best performances of one user on one exercise, maintained as sets are logged"""
+    user_id: PyObjectId = Field(...)
+    exercise_id: PyObjectId = Field(...)
+    best_weight: Optional[float] = None  # Heaviest set (kg)
+    best_e1rm: Optional[float] = None  # Best estimated one-rep max (Epley)
+    best_session_volume: Optional[float] = None  # Most volume in one session
+    reps_at_weight: Dict[str, int] = Field(default_factory=dict)  # {"62.5": 8}, keys use "_" for "."
+    updated_at: Optional[datetime] = None
+    revision: int = 0  # Bumped by every write; recomputes are conditional on it
+    
+    class Settings:
+        name = "personal_records"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("exercise_id", ASCENDING)], name="user_exercise_unique", unique=True),
+        ]
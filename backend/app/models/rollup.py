@@ -0,0 +1,27 @@
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+from pydantic import Field
+from typing import Any, Dict
+from datetime import datetime
+
+from ..core.types import PyObjectId
+
+class UserDailyRollup(Document):
+    """Training totals of one user for one UTC day, maintained from completed sessions"""
+    user_id: PyObjectId = Field(...)
+    day: datetime = Field(...)  # Midnight UTC of the bucket
+    sessions: int = 0
+    total_volume: float = 0.0  # kg
+    total_reps: int = 0
+    total_sets: int = 0
+    muscle_volume: Dict[str, float] = Field(default_factory=dict)  # {"chest": 4200.0}
+    muscle_sets: Dict[str, int] = Field(default_factory=dict)  # {"chest": 12}
+    # What each session added to the totals above, by session id
+    contributions: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    revision: int = 0  # Bumped by every write; writes are conditional on it
+    
+    class Settings:
+        name = "user_daily_rollups"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_day_unique", unique=True),
+        ]
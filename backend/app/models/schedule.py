@@ -0,0 +1,55 @@
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+from ..core.types import PyObjectId
+
+class ScheduledExercise(BaseModel):
+    """Copy of a WorkoutExercise with its catalog exercise name"""
+    exercise_id: PyObjectId
+    exercise_name: Optional[str] = None
+    sets: int
+    reps: int
+    weight: Optional[float] = None
+    rest_time: Optional[int] = None
+    notes: Optional[str] = None
+    order: int
+
+class ScheduledWorkout(BaseModel):
+    workout_id: PyObjectId
+    name: str
+    estimated_duration: Optional[int] = None
+    difficulty: str = "beginner"
+    exercises: List[ScheduledExercise] = []
+
+class ScheduledDay(BaseModel):
+    split_day_id: PyObjectId
+    day_number: int  # 1 = Monday
+    day_name: str
+    rest_day: bool = False
+    workout: Optional[ScheduledWorkout] = None
+
+class UserSchedule(Document):
+    """A user's active split with its days, workouts and exercises resolved.
+
+    Materialized whenever the active split or its days change, so the
+    schedule for any date is answered from this one document. A user
+    without an active split has one without ``split_id``, so reads do not
+    look for a split again until one changes.
+    """
+    user_id: PyObjectId = Field(...)
+    split_id: Optional[PyObjectId] = None
+    split_name: Optional[str] = None
+    split_type: Optional[str] = None
+    starts_on: Optional[datetime] = None  # When the split was activated (created_at before activations were recorded); its weeks count from that Monday
+    weeks_duration: Optional[int] = None
+    days: List[ScheduledDay] = []
+    computed_at: datetime = Field(default_factory=datetime.utcnow)  # When the sources were read
+    
+    class Settings:
+        name = "user_schedules"
+        indexes = [
+            IndexModel([("user_id", ASCENDING)], name="user_unique", unique=True),
+        ]
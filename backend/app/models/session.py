@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pydantic import Field
 from typing import List, Optional
 from datetime import datetime
@@ -15,6 +16,7 @@ class SessionExercise(Document):
     notes: Optional[str] = None
     skipped: bool = False
     completed_at: Optional[datetime] = None
+    revision: int = 0  # Bumped by writes to the separate document; storage migrations check it
     
     class Settings:
         collection = "session_exercises"
@@ -26,6 +28,7 @@ class WorkoutSession(Document):
     split_id: Optional[PyObjectId] = None  # If part of a split
     session_name: Optional[str] = None
     exercises: List[PyObjectId] = []  # References to SessionExercise documents
+    embedded_exercises: Optional[List[dict]] = None  # The SessionExercise documents themselves when stored embedded
 
     # Session timing
     started_at: datetime = Field(default_factory=datetime.utcnow)
@@ -36,6 +39,8 @@ class WorkoutSession(Document):
     total_volume: Optional[float] = None  # Total weight lifted (kg)
     total_reps: Optional[int] = None
     total_sets: Optional[int] = None
+    planned_exercises: Optional[int] = None  # Exercises in the workout when the session started
+    completed_exercises: int = 0  # Maintained together with the totals above
     
     # Session status
     status: str = "in_progress"  # in_progress, completed, abandoned
@@ -49,4 +54,7 @@ class WorkoutSession(Document):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
-        collection = "sessions"
\ No newline at end of file
+        collection = "sessions"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("started_at", DESCENDING)], name="user_started"),
+        ]
\ No newline at end of file
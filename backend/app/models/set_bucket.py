@@ -0,0 +1,37 @@
+from beanie import Document
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from typing import List, Optional
+from datetime import datetime
+
+from ..core.types import PyObjectId
+
+class BucketedSet(BaseModel):
+    """One logged set, as stored inside a SetBucket"""
+    session_id: PyObjectId = Field(...)
+    session_exercise_id: PyObjectId = Field(...)
+    set_number: int = Field(ge=1)  # Position in the session exercise's actual_sets
+    performed_at: datetime = Field(...)
+    reps: int = 0
+    weight: Optional[float] = None  # kg
+    rpe: Optional[float] = None
+
+class SetBucket(Document):
+    """A bounded run of one user's logged sets of one exercise.
+
+    Written alongside SessionExercise.actual_sets, so an exercise's history
+    is a few bucket reads instead of one document per session.
+    """
+    user_id: PyObjectId = Field(...)
+    exercise_id: PyObjectId = Field(...)
+    set_count: int = 0  # Sets in the bucket; new sets go to a bucket below the size limit
+    first_at: Optional[datetime] = None  # Bounds of performed_at; may be wider than the sets after edits
+    last_at: Optional[datetime] = None
+    sets: List[BucketedSet] = []
+    
+    class Settings:
+        name = "set_buckets"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("exercise_id", ASCENDING), ("last_at", DESCENDING)], name="user_exercise_last"),
+            IndexModel([("sets.session_exercise_id", ASCENDING)], name="session_exercise"),
+        ]
@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pydantic import Field
 from typing import List, Optional, Dict
 from datetime import datetime
@@ -24,8 +25,20 @@ class WorkoutSplit(Document):
     split_type: str = Field(...)  # e.g., "push_pull_legs", "upper_lower", "full_body"
     weeks_duration: Optional[int] = None  # How many weeks this split runs
     is_active: bool = False  # Whether this is the user's current split
+    activated_at: Optional[datetime] = None  # When it last became the active split; its schedule starts then
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
     
     class Settings:
-        collection = "splits"
\ No newline at end of file
+        collection = "splits"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("is_active", ASCENDING)], name="user_active"),
+            # At most one active split per user
+            IndexModel(
+                [("user_id", ASCENDING)],
+                name="user_single_active",
+                unique=True,
+                partialFilterExpression={"is_active": True}
+            ),
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+        ]
\ No newline at end of file
@@ -1,6 +1,7 @@
 from beanie import Document
+from pymongo import ASCENDING, IndexModel
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class UserProfile(BaseModel):
@@ -8,6 +9,7 @@ class UserProfile(BaseModel):
     weight: Optional[float] = None  # in kg
     height: Optional[int] = None    # in cm
     fitness_level: Optional[str] = "beginner"  # beginner, intermediate, advanced
+    equipment: Optional[List[str]] = None  # Equipment the user can train with; None means any
 
 class User(Document):
     email: EmailStr = Field(...)
@@ -20,4 +22,7 @@ class User(Document):
     updated_at: Optional[datetime] = None
     
     class Settings:
-        collection = "users"
\ No newline at end of file
+        collection = "users"
+        indexes = [
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        ]
\ No newline at end of file
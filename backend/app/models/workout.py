@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pydantic import Field, BaseModel
 from typing import List, Optional
 from datetime import datetime
@@ -25,6 +26,7 @@ class Workout(Document):
     description: Optional[str] = None
     user_id: PyObjectId = Field(...)
     exercises: List[PyObjectId] = []  # References to WorkoutExercise documents
+    embedded_exercises: Optional[List[dict]] = None  # The WorkoutExercise documents themselves when stored embedded
     estimated_duration: Optional[int] = None  # in minutes
     difficulty: str = "beginner"  # beginner, intermediate, advanced
     tags: List[str] = []  # e.g., ["push", "upper_body", "strength"]
@@ -32,4 +34,7 @@ class Workout(Document):
     updated_at: Optional[datetime] = None
     
     class Settings:
-        collection = "workouts"
\ No newline at end of file
+        collection = "workouts"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+        ]
\ No newline at end of file
@@ -1,4 +1,8 @@
-from .exercise import ExerciseCreate, ExerciseUpdate, ExerciseResponse
+from .exercise import (
+    ExerciseCreate, ExerciseUpdate, ExerciseResponse,
+    ExerciseBulkOperation, ExerciseBulkRequest, ExerciseBulkItemResult, ExerciseBulkResponse,
+    ExerciseSearchHit, ExerciseAlternative
+)
 from .workout import (
     WorkoutCreate, WorkoutUpdate, WorkoutResponse,
     WorkoutExerciseCreate, WorkoutExerciseResponse
@@ -7,9 +11,13 @@ from .split import (
     WorkoutSplitCreate, WorkoutSplitUpdate, WorkoutSplitResponse,
     SplitDayCreate, SplitDayResponse
 )
+from .pagination import Page
+from .record import PersonalRecordResponse
+from .rollup import TrainingRollupResponse
+from .schedule import ScheduledExerciseResponse, ScheduledWorkoutResponse, ScheduleDayResponse, ScheduleResponse
 from .session import (
-    WorkoutSessionCreate, WorkoutSessionUpdate, WorkoutSessionResponse,
-    SessionExerciseCreate, SessionExerciseResponse
+    WorkoutSessionCreate, WorkoutSessionUpdate, WorkoutSessionResponse, WorkoutSessionSummaryResponse,
+    SessionExerciseCreate, SessionExerciseUpdate, SessionExerciseResponse, LiveSetEvent, LoggedSetResponse
 )
 
 __all__ = [
@@ -17,6 +25,12 @@ __all__ = [
     "ExerciseCreate",
     "ExerciseUpdate", 
     "ExerciseResponse",
+    "ExerciseBulkOperation",
+    "ExerciseBulkRequest",
+    "ExerciseBulkItemResult",
+    "ExerciseBulkResponse",
+    "ExerciseSearchHit",
+    "ExerciseAlternative",
     
     # Workout schemas
     "WorkoutCreate",
@@ -36,6 +50,25 @@ __all__ = [
     "WorkoutSessionCreate",
     "WorkoutSessionUpdate",
     "WorkoutSessionResponse",
+    "WorkoutSessionSummaryResponse",
     "SessionExerciseCreate",
+    "SessionExerciseUpdate",
     "SessionExerciseResponse",
+    "LiveSetEvent",
+    "LoggedSetResponse",
+
+    # Pagination
+    "Page",
+
+    # Rollup schemas
+    "TrainingRollupResponse",
+
+    # Personal record schemas
+    "PersonalRecordResponse",
+
+    # Schedule schemas
+    "ScheduledExerciseResponse",
+    "ScheduledWorkoutResponse",
+    "ScheduleDayResponse",
+    "ScheduleResponse",
 ]
\ No newline at end of file
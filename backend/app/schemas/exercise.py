@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 # Request Schemas
@@ -19,6 +19,14 @@ class ExerciseUpdate(BaseModel):
     instructions: Optional[List[str]] = None
     difficulty: Optional[str] = None
 
+class ExerciseBulkOperation(BaseModel):
+    op: Literal["create", "upsert", "update", "delete"]
+    id: Optional[str] = None  # Required for update and delete
+    data: Optional[dict] = None  # ExerciseCreate for create/upsert (matched by name), ExerciseUpdate for update
+
+class ExerciseBulkRequest(BaseModel):
+    operations: List[ExerciseBulkOperation] = Field(..., min_length=1, max_length=10000)
+
 # Response Schemas
 class ExerciseResponse(BaseModel):
     id: str
@@ -31,4 +39,26 @@ class ExerciseResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ExerciseSearchHit(ExerciseResponse):
+    score: float
+
+class ExerciseAlternative(ExerciseResponse):
+    similarity: float  # 0-1, muscle group overlap weighted by equipment and difficulty
+
+class ExerciseBulkItemResult(BaseModel):
+    index: int
+    op: str
+    status: str  # ok, error
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class ExerciseBulkResponse(BaseModel):
+    inserted: int = 0
+    upserted: int = 0
+    matched: int = 0
+    modified: int = 0
+    deleted: int = 0
+    errors: int = 0
+    results: List[ExerciseBulkItemResult] = []
\ No newline at end of file
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Response Schemas
+class Page(BaseModel, Generic[T]):
+    """A page of results plus the opaque cursor of the next page"""
+    items: List[T] = []
+    next_cursor: Optional[str] = None
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+from datetime import datetime
+
+# Response Schemas
+class PersonalRecordResponse(BaseModel):
+    user_id: str
+    exercise_id: str
+    best_weight: Optional[float] = None
+    best_e1rm: Optional[float] = None
+    best_session_volume: Optional[float] = None
+    reps_at_weight: Dict[str, int] = {}  # weight (kg) -> most reps
+    updated_at: Optional[datetime] = None
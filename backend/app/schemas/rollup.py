@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Dict
+from datetime import date
+
+# Response Schemas
+class TrainingRollupResponse(BaseModel):
+    period: str  # day, week, month
+    period_start: date
+    sessions: int = 0
+    total_volume: float = 0.0
+    total_reps: int = 0
+    total_sets: int = 0
+    muscle_volume: Dict[str, float] = {}
+    muscle_sets: Dict[str, int] = {}
@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+# Response Schemas
+class ScheduledExerciseResponse(BaseModel):
+    exercise_id: str
+    exercise_name: Optional[str] = None
+    sets: int
+    reps: int
+    weight: Optional[float] = None
+    rest_time: Optional[int] = None
+    notes: Optional[str] = None
+    order: int
+
+class ScheduledWorkoutResponse(BaseModel):
+    workout_id: str
+    name: str
+    estimated_duration: Optional[int] = None
+    difficulty: str
+    exercises: List[ScheduledExerciseResponse] = []
+
+class ScheduleDayResponse(BaseModel):
+    date: date
+    week: Optional[int] = None  # Week of the split, None outside of it
+    split_day_id: Optional[str] = None
+    day_name: Optional[str] = None
+    rest_day: bool = True  # Also true on days the split does not schedule
+    workout: Optional[ScheduledWorkoutResponse] = None
+
+class ScheduleResponse(BaseModel):
+    user_id: str
+    split_id: str
+    split_name: str
+    split_type: str
+    starts_on: date
+    ends_on: Optional[date] = None  # Last day of the split when it runs for a fixed number of weeks
+    days: List[ScheduleDayResponse] = []
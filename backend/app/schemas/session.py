@@ -1,6 +1,32 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
+
+# Set fields the totals, records and rollups compute with
+NUMERIC_SET_FIELDS = ("reps", "weight", "rpe")
+
+def _numeric_sets(sets: Optional[List[dict]]) -> Optional[List[dict]]:
+    for number, logged_set in enumerate(sets or [], start=1):
+        for field in NUMERIC_SET_FIELDS:
+            value = logged_set.get(field)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise ValueError(f"set {number}: {field} must be a number")
+    return sets
+
+def _set_times(sets: Optional[List[dict]]) -> Optional[List[dict]]:
+    # Sets echoed back from a response keep the time they were logged; it is stored as naive UTC
+    for number, logged_set in enumerate(sets or [], start=1):
+        logged_at = logged_set.get("logged_at")
+        if logged_at is None or isinstance(logged_at, datetime):
+            continue
+        try:
+            logged_at = datetime.fromisoformat(logged_at)
+        except (TypeError, ValueError):
+            raise ValueError(f"set {number}: logged_at must be an ISO 8601 datetime")
+        if logged_at.tzinfo:
+            logged_at = logged_at.astimezone(timezone.utc).replace(tzinfo=None)
+        logged_set["logged_at"] = logged_at
+    return sets
 
 # Request Schemas
 class SessionExerciseCreate(BaseModel):
@@ -11,12 +37,31 @@ class SessionExerciseCreate(BaseModel):
     notes: Optional[str] = None
     skipped: bool = False
 
+    _numeric_sets = field_validator("actual_sets")(_numeric_sets)
+    _set_times = field_validator("actual_sets")(_set_times)
+
 class WorkoutSessionCreate(BaseModel):
     workout_id: str = Field(...)
     split_id: Optional[str] = None
     session_name: Optional[str] = None
     exercises: List[SessionExerciseCreate] = []
 
+class SessionExerciseUpdate(BaseModel):
+    sets_completed: Optional[int] = Field(None, ge=0)
+    actual_sets: Optional[List[dict]] = None
+    notes: Optional[str] = None
+
+    _numeric_sets = field_validator("actual_sets")(_numeric_sets)
+    _set_times = field_validator("actual_sets")(_set_times)
+
+class LiveSetEvent(BaseModel):
+    """A set logged over the live session WebSocket"""
+    seq: int = Field(ge=0)  # Client-assigned, increasing per session
+    session_exercise_id: str = Field(...)
+    reps: int = Field(ge=0)
+    weight: Optional[float] = None
+    rpe: Optional[float] = Field(None, ge=0, le=10)
+
 class WorkoutSessionUpdate(BaseModel):
     status: Optional[str] = None
     exercises: Optional[List[SessionExerciseCreate]] = None
@@ -28,12 +73,14 @@ class WorkoutSessionUpdate(BaseModel):
 class SessionExerciseResponse(BaseModel):
     id: str
     exercise_id: str
+    exercise_name: Optional[str] = None
     workout_exercise_id: str
     sets_completed: int
     actual_sets: List[dict] = []
     notes: Optional[str] = None
     skipped: bool
     completed_at: Optional[datetime] = None
+    new_records: List[str] = []  # Personal records set by this write: weight, e1rm, reps_at_weight, session_volume
 
 class WorkoutSessionResponse(BaseModel):
     id: str
@@ -48,9 +95,35 @@ class WorkoutSessionResponse(BaseModel):
     total_volume: Optional[float] = None
     total_reps: Optional[int] = None
     total_sets: Optional[int] = None
+    planned_exercises: Optional[int] = None
+    completed_exercises: int = 0
     status: str
     completion_percentage: Optional[float] = None
     notes: Optional[str] = None
     difficulty_rating: Optional[int] = None
     energy_level: Optional[int] = None
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class WorkoutSessionSummaryResponse(BaseModel):
+    id: str
+    workout_id: str
+    user_id: str
+    session_name: Optional[str] = None
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    total_volume: Optional[float] = None
+    total_reps: Optional[int] = None
+    total_sets: Optional[int] = None
+    planned_exercises: Optional[int] = None
+    completed_exercises: int = 0
+    completion_percentage: Optional[float] = None
+    status: str
+
+class LoggedSetResponse(BaseModel):
+    session_id: str
+    session_exercise_id: str
+    set_number: int
+    performed_at: datetime
+    reps: int
+    weight: Optional[float] = None
+    rpe: Optional[float] = None
\ No newline at end of file
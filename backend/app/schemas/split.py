@@ -28,6 +28,7 @@ class SplitDayResponse(BaseModel):
     id: str
     day_name: str
     workout_id: str
+    workout_name: Optional[str] = None
     day_number: int
     rest_day: bool
 
@@ -40,5 +41,6 @@ class WorkoutSplitResponse(BaseModel):
     split_type: str
     weeks_duration: Optional[int] = None
     is_active: bool
+    activated_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
\ No newline at end of file
@@ -31,6 +31,7 @@ class WorkoutUpdate(BaseModel):
 class WorkoutExerciseResponse(BaseModel):
     id: str
     exercise_id: str
+    exercise_name: Optional[str] = None
     sets: int
     reps: int
     weight: Optional[float] = None
@@ -0,0 +1,358 @@
+"""Exercise catalog snapshot shared by the workers of a node through a memory-mapped file.
+
+One worker per node (whichever holds the file lock) reads the catalog,
+serializes every exercise once and publishes the result with an atomic
+rename. Every worker maps the current file read-only and answers list and
+get requests by slicing it, so the catalog is held once per node and the
+exercises collection is only read when the catalog version changes.
+
+File layout, little-endian (the reader casts uint32 sections natively), sections 8-byte aligned:
+
+    header      magic, header length, then a JSON directory of the sections
+    ids         count x 12-byte ObjectIds in _id order (the list sort order)
+    offsets     (count + 1) x uint32 into body; item i is body[off[i]:off[i+1] - 1]
+    body        each exercise's JSON, as the API returns it, followed by a comma
+    postings    per muscle_groups/difficulty/equipment value, the sorted
+                indexes of the exercises that match it, as uint32
+"""
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+
+import pydantic_core
+from bson import ObjectId
+from pymongo import ASCENDING
+
+from ..models.exercise import Exercise
+from ..utils.pagination import decode_cursor, encode_cursor
+from ..utils.projection import selectable_fields, view_model
+from ..utils.serialization import item_adapter
+from ..utils.version import VersionCounter
+
+try:
+    import fcntl
+except ImportError:  # On Windows (no fcntl): every worker builds its own snapshot
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GROWCAT1"
+PREAMBLE = struct.Struct("<8sI")
+INDEXED_FIELDS = ("muscle_groups", "difficulty", "equipment")
+SNAPSHOT_SORT = [("_id", ASCENDING)]
+# A version whose build attempt did not publish it is attempted again after this long
+BUILD_RETRY_SECONDS = 30.0
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+def encode_snapshot(version: int, documents: Iterable[Mapping[str, Any]]) -> bytes:
+    """Serialize raw exercise documents, sorted by _id, into the snapshot format"""
+    adapter = item_adapter(view_model(Exercise, selectable_fields(Exercise)))
+    ids = bytearray()
+    offsets = [0]
+    body = bytearray()
+    postings: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+    for index, document in enumerate(documents):
+        ids += document["_id"].binary
+        body += adapter.dump_json(adapter.validate_python(document)) + b","
+        offsets.append(len(body))
+        for field in INDEXED_FIELDS:
+            values = document.get(field)
+            for value in values if isinstance(values, list) else [values]:
+                if isinstance(value, str):
+                    postings[field].setdefault(value, []).append(index)
+    count = len(offsets) - 1
+
+    sections: List[Tuple[str, bytes]] = [
+        ("ids", bytes(ids)),
+        ("offsets", struct.pack(f"<{count + 1}I", *offsets)),
+        ("body", bytes(body)),
+    ]
+    directory: Dict[str, Any] = {"version": version, "count": count, "built_at": datetime.utcnow().isoformat()}
+    posting_directory: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+    for field, by_value in postings.items():
+        for value, indexes in by_value.items():
+            sections.append((f"{field}:{value}", struct.pack(f"<{len(indexes)}I", *indexes)))
+
+    # Offsets in the directory depend on its own length, so lay out until it is stable
+    header_length = 0
+    while True:
+        position = _align(PREAMBLE.size + header_length)
+        layout = {}
+        for name, data in sections:
+            layout[name] = [position, len(data)]
+            position = _align(position + len(data))
+        directory["sections"] = {name: layout[name] for name in ("ids", "offsets", "body")}
+        for field in INDEXED_FIELDS:
+            posting_directory[field] = {
+                value: layout[f"{field}:{value}"] for value in postings[field]
+            }
+        directory["postings"] = posting_directory
+        header = json.dumps(directory, separators=(",", ":")).encode()
+        if len(header) == header_length:
+            break
+        header_length = len(header)
+
+    output = bytearray(position)
+    output[:PREAMBLE.size + len(header)] = PREAMBLE.pack(MAGIC, len(header)) + header
+    for name, data in sections:
+        start, length = layout[name]
+        output[start:start + length] = data
+    return bytes(output)
+
+class CatalogSnapshot:
+    """A mapped snapshot file; every read slices the mapping instead of copying the catalog"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, header_length = PREAMBLE.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        directory = json.loads(bytes(view[PREAMBLE.size:PREAMBLE.size + header_length]))
+        self.version: int = directory["version"]
+        self.count: int = directory["count"]
+        self.built_at: str = directory["built_at"]
+
+        def section(start: int, length: int) -> memoryview:
+            return view[start:start + length]
+
+        self._ids = section(*directory["sections"]["ids"])
+        self._offsets = section(*directory["sections"]["offsets"]).cast("I")
+        self._body = section(*directory["sections"]["body"])
+        self._postings = {
+            field: {value: section(*location).cast("I") for value, location in by_value.items()}
+            for field, by_value in directory["postings"].items()
+        }
+
+    def _id(self, index: int) -> bytes:
+        return bytes(self._ids[index * 12:index * 12 + 12])
+
+    def _find(self, oid: ObjectId) -> int:
+        """Index of the first exercise whose _id is not below ``oid``"""
+        target = oid.binary
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._id(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _item(self, index: int, fields: Optional[FrozenSet[str]]) -> Any:
+        item = self._body[self._offsets[index]:self._offsets[index + 1] - 1]
+        if not fields:
+            return item
+        # Sparse responses keep the full view's key order, as view_model does
+        document = json.loads(bytes(item))
+        return pydantic_core.to_json({key: value for key, value in document.items() if key in fields})
+
+    def get(self, exercise_id: str, fields: Optional[FrozenSet[str]] = None) -> Optional[bytes]:
+        oid = ObjectId(exercise_id)
+        index = self._find(oid)
+        if index == self.count or self._id(index) != oid.binary:
+            return None
+        return bytes(self._item(index, fields))
+
+    def _matching(self, muscle_group: Optional[str], difficulty: Optional[str], equipment: Optional[str]) -> Optional[List[int]]:
+        """Indexes matching every given filter, in _id order; None when nothing is filtered"""
+        lists = []
+        for field, value in (("muscle_groups", muscle_group), ("difficulty", difficulty), ("equipment", equipment)):
+            if value:
+                postings = self._postings[field].get(value)
+                if postings is None:
+                    return []
+                lists.append(postings)
+        if not lists:
+            return None
+        lists.sort(key=len)
+        matching = lists[0].tolist()
+        for other in lists[1:]:
+            members = set(other.tolist())
+            matching = [index for index in matching if index in members]
+        return matching
+
+    def page(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        muscle_group: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        equipment: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> Tuple[bytes, Optional[str]]:
+        """Same page and cursor as ``ExerciseService.get_exercises_json``"""
+        start = 0
+        if cursor:
+            after = decode_cursor(cursor, SNAPSHOT_SORT)["_id"]
+            start = self._find(after)
+            if start < self.count and self._id(start) == after.binary:
+                start += 1
+        elif skip:
+            start = skip
+
+        matching = self._matching(muscle_group, difficulty, equipment)
+        if matching is None:
+            first = min(start, self.count)
+            last = min(first + limit, self.count)
+            more = last < self.count
+            if not fields and last > first:
+                # A contiguous run is one slice of the body, separators included
+                body = b"[" + bytes(self._body[self._offsets[first]:self._offsets[last] - 1]) + b"]"
+            else:
+                body = b"[" + b",".join(self._item(index, fields) for index in range(first, last)) + b"]"
+            selected = range(first, last)
+        else:
+            position = bisect_left(matching, start) if cursor else min(start, len(matching))
+            selected = matching[position:position + limit]
+            more = position + limit < len(matching)
+            body = b"[" + b",".join(self._item(index, fields) for index in selected) + b"]"
+
+        next_cursor = encode_cursor({"_id": ObjectId(self._id(selected[-1]))}, SNAPSHOT_SORT) if more and selected else None
+        return body, next_cursor
+
+class CatalogSnapshotManager:
+    """Keeps this worker attached to the snapshot matching the catalog version.
+
+    ``current()`` is called on every catalog read and costs a comparison
+    while the attached snapshot is current. After the version moves, each
+    read stats the file to re-attach once the new one is published, and the
+    worker tries once per version (again after ``BUILD_RETRY_SECONDS``) to
+    build that file itself in the background; only the holder of the
+    node's build lock does. Until then ``current()`` returns None and reads
+    go to MongoDB as before.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        name_fn: Callable[[], str],
+        version: VersionCounter,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.directory = directory
+        # Checked once: a directory missing at startup disables the snapshot for the process
+        self.enabled = bool(directory) and os.path.isdir(directory)
+        # Resolved lazily: the database, and so the file name, is only known once connected
+        self._name_fn = name_fn
+        self.version = version
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._clock = clock
+        self._building: Optional[asyncio.Task] = None
+        self._attempted: Optional[Tuple[int, float]] = None  # (version, when) of the last build attempt
+        self._published_stat: Optional[Tuple[int, int]] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self._name_fn()}.snap") if self.directory else ""
+
+    async def current(self, version: Optional[int] = None) -> Optional[CatalogSnapshot]:
+        """The attached snapshot if it holds ``version`` (default: the current catalog version)"""
+        if not self.enabled:
+            return None
+        if version is None:
+            version = await self.version.get()
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        snapshot = self._attach_published()
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        if self._should_build(version):
+            self._building = asyncio.create_task(self.build())
+        return None
+
+    def _should_build(self, version: int) -> bool:
+        """Whether a read wanting ``version`` starts a build attempt; records the attempt"""
+        if self._building is not None and not self._building.done():
+            return False
+        now = self._clock()
+        if self._attempted is not None and self._attempted[0] == version and now - self._attempted[1] < BUILD_RETRY_SECONDS:
+            return False
+        self._attempted = (version, now)
+        return True
+
+    def _attach_published(self) -> Optional[CatalogSnapshot]:
+        """Map the published file if it was replaced since the last look"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self.snapshot
+        key = (stat.st_ino, stat.st_mtime_ns)
+        if key != self._published_stat:
+            try:
+                # Requests still holding the previous snapshot keep their mapping
+                self.snapshot = CatalogSnapshot(self.path)
+                self._published_stat = key
+            except (OSError, ValueError) as e:
+                logger.warning("Could not attach catalog snapshot %s: %s", self.path, e)
+        return self.snapshot
+
+    async def build(self, force: bool = False) -> bool:
+        """Build and publish the snapshot if this worker holds the node's build lock.
+
+        Unless ``force``, a published snapshot of the current version is
+        kept. Returns True when a snapshot was published.
+        """
+        if not self.enabled:
+            return False
+        try:
+            lock = open(self.path + ".lock", "a")
+        except OSError as e:
+            logger.warning("Could not open catalog snapshot lock %s: %s", self.path, e)
+            return False
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+
+            # The version is read before the documents, so the data is at least that new
+            version = await self.version.get()
+            published = self._attach_published()
+            if not force and published is not None and published.version == version:
+                return False
+            documents = await Exercise.get_motor_collection().find({}).sort(SNAPSHOT_SORT).to_list(None)
+            data = await asyncio.to_thread(encode_snapshot, version, documents)
+            try:
+                await asyncio.to_thread(self._publish, data)
+            except OSError as e:
+                logger.warning("Could not publish catalog snapshot %s: %s", self.path, e)
+                return False
+            self._attach_published()
+            logger.info("Published catalog snapshot v%s (%s exercises, %s bytes)", version, len(documents), len(data))
+            return True
+        finally:
+            lock.close()
+
+    def _publish(self, data: bytes) -> None:
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        # Atomic on POSIX: readers see the old file or the new one, never a partial one
+        os.replace(temporary, self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "enabled": self.enabled,
+            "path": self.path or None,
+            "version": snapshot.version if snapshot else None,
+            "exercises": snapshot.count if snapshot else None,
+            "built_at": snapshot.built_at if snapshot else None,
+        }
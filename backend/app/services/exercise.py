@@ -1,83 +1,565 @@
-from typing import List, Optional
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import logging
 from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import ASCENDING, DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from beanie.odm.operators.find.comparison import In
 
+from ..core.config import settings
 from ..models.exercise import Exercise
-from ..schemas.exercise import ExerciseCreate, ExerciseUpdate, ExerciseResponse
+from ..schemas.exercise import (
+    ExerciseCreate, ExerciseUpdate, ExerciseResponse,
+    ExerciseBulkRequest, ExerciseBulkItemResult, ExerciseBulkResponse, ExerciseSearchHit,
+    ExerciseAlternative
+)
+from ..utils.cache import TTLCache
+from ..utils.etag import make_etag
+from ..utils.pagination import apply_cursor, encode_cursor
+from ..utils.projection import selectable_fields, view_model
+from ..utils.search import SearchIndex
+from ..utils.serialization import dump_document, dump_documents
+from ..utils.similarity import SimilarityIndex
+from ..utils.version import VersionCounter
+from .catalog_snapshot import CatalogSnapshotManager
+
+logger = logging.getLogger(__name__)
+
+EXERCISE_SORT = [("_id", ASCENDING)]
+EXERCISE_FIELDS = selectable_fields(Exercise)
+# Writes touching more exercises are logged without their ids: other workers rebuild instead
+CHANGE_LOG_MAX_IDS = 1000
+
+def _name_taken(name: str) -> str:
+    return f"An exercise named {name!r} already exists"
+
+def _projection(fields: Optional[FrozenSet[str]]) -> Optional[Dict[str, int]]:
+    # _id is always returned; "id" is its public name
+    return {field: 1 for field in fields if field != "id"} if fields else None
+
+def _new_search_index() -> SearchIndex:
+    return SearchIndex({"name": 3.0, "description": 1.0, "instructions": 0.5}, compound_fields=("name",))
+
+def _new_similarity_index() -> SimilarityIndex:
+    return SimilarityIndex(k=settings.exercise_alternatives_k)
+
+def _build_indexes(exercises: List[ExerciseResponse]) -> Tuple[SearchIndex, SimilarityIndex]:
+    """Fresh search and similarity indexes over ``exercises``; CPU-bound, so run off the event loop"""
+    search_index = _new_search_index()
+    for exercise in exercises:
+        search_index.add(exercise.id, exercise.dict(), payload=exercise)
+    # Built in one pass rather than by adding exercises one at a time
+    similarity_index = _new_similarity_index()
+    similarity_index.rebuild(
+        (exercise.id, exercise.muscle_groups, exercise.equipment, exercise.difficulty, exercise)
+        for exercise in exercises
+    )
+    return search_index, similarity_index
 
 class ExerciseService:
     """Service layer for exercise operations"""
-    
+
+    # Shared by every service instance so the catalog is cached per process
+    cache = TTLCache(
+        max_entries=settings.exercise_cache_max_entries,
+        ttl=settings.exercise_cache_ttl
+    )
+    # Bumped by every catalog write. ETags derive from it, and a bump seen
+    # from another worker also drops this worker's cached pages
+    catalog_version = VersionCounter(
+        "exercises",
+        lambda: Exercise.get_motor_collection().database["versions"],
+        ttl=settings.exercise_version_ttl,
+        on_change=cache.clear,
+        log_size=settings.exercise_change_log_size
+    )
+    # The catalog as one memory-mapped file per node, built by one worker and
+    # read by all; list and get requests are served from it while it is current
+    snapshot = CatalogSnapshotManager(
+        settings.catalog_snapshot_dir,
+        lambda: f"{Exercise.get_motor_collection().database.name}-exercises",
+        catalog_version
+    )
+    # Full-text index over the catalog, rebuilt at startup and kept current by every write
+    search_index = _new_search_index()
+    # Top substitutes of every exercise, maintained alongside the search index
+    similarity_index = _new_similarity_index()
+    # Catalog version both indexes reflect; reads catch them up once it moves,
+    # which is how writes made by other workers reach this worker's indexes
+    _indexed_version: Optional[int] = None
+    # Full rebuild running in the background, when the version log could not catch up
+    _rebuilding: Optional[asyncio.Task] = None
+
     async def create_exercise(self, exercise_data: ExerciseCreate) -> ExerciseResponse:
         """Create a new exercise"""
         exercise = Exercise(**exercise_data.dict())
-        await exercise.insert()
-        return ExerciseResponse(
+        try:
+            await exercise.insert()
+        except DuplicateKeyError:
+            raise ValueError(_name_taken(exercise.name))
+        self._invalidate()
+        version = await self._bump([str(exercise.id)])
+        response = ExerciseResponse(
             id=str(exercise.id),
-            **exercise.dict()
+            **exercise.dict(exclude={"id"})
         )
-    
-    async def get_exercises(
-        self, 
-        skip: int = 0, 
+        self._index(response)
+        self._indexed(version)
+        return response
+
+    async def list_etag(
+        self,
+        skip: int = 0,
         limit: int = 100,
         muscle_group: Optional[str] = None,
         difficulty: Optional[str] = None,
-        equipment: Optional[str] = None
-    ) -> List[ExerciseResponse]:
-        """Get exercises with optional filtering"""
-        query = {}
-        
-        if muscle_group:
-            query["muscle_groups"] = {"$in": [muscle_group]}
-        if difficulty:
-            query["difficulty"] = difficulty
-        if equipment:
-            query["equipment"] = equipment
-        
-        exercises = await Exercise.find(query).skip(skip).limit(limit).to_list()
-        return [
-            ExerciseResponse(
-                id=str(exercise.id),
-                **exercise.dict()
-            ) for exercise in exercises
-        ]
-    
-    async def get_exercise_by_id(self, exercise_id: str) -> Optional[ExerciseResponse]:
-        """Get a specific exercise by ID"""
-        exercise = await Exercise.get(ObjectId(exercise_id))
-        if exercise:
-            return ExerciseResponse(
-                id=str(exercise.id),
-                **exercise.dict()
-            )
-        return None
-    
+        equipment: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None,
+        version: Optional[int] = None
+    ) -> str:
+        """ETag of a ``get_exercises_json`` page, from the catalog version alone.
+
+        Pass the same ``version`` to ``get_exercises_json`` so the body
+        served under the ETag is the one cached for that version.
+        """
+        if version is None:
+            version = await self.catalog_version.get()
+        return make_etag(version, ("list", muscle_group, difficulty, equipment, skip, limit, cursor, fields))
+
+    async def exercise_etag(
+        self,
+        exercise_id: str,
+        fields: Optional[FrozenSet[str]] = None,
+        version: Optional[int] = None
+    ) -> str:
+        """ETag of a ``get_exercise_json`` body, from the catalog version alone"""
+        if version is None:
+            version = await self.catalog_version.get()
+        return make_etag(version, ("id", exercise_id, fields))
+
+    async def get_exercises_json(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        muscle_group: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        equipment: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None,
+        version: Optional[int] = None
+    ) -> Tuple[bytes, Optional[str]]:
+        """Get a page of exercises as serialized JSON bytes and the cursor of the next page.
+
+        Pages are ordered by _id; ``cursor`` continues after the previous page
+        and ``skip`` is only honoured as a legacy fallback when no cursor is given.
+        With a sparse ``fields`` set only those fields are fetched.
+        Raw documents go through one cached TypeAdapter straight to JSON,
+        skipping the Beanie document, the ExerciseResponse copy and the
+        response_model pass. The bytes themselves are cached under the
+        catalog ``version`` read before the query, so a read that overlaps a
+        write can only store its page under the version being replaced.
+        While the node's catalog snapshot holds that ``version`` the page is
+        sliced from it instead.
+        """
+        if version is None:
+            version = await self.catalog_version.get()
+        snapshot = await self.snapshot.current(version)
+        if snapshot is not None:
+            return snapshot.page(skip, limit, muscle_group, difficulty, equipment, cursor, fields)
+
+        cache_key = ("list", muscle_group, difficulty, equipment, skip, limit, cursor, fields, version)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        query = self._list_query(muscle_group, difficulty, equipment, cursor)
+        finder = Exercise.get_motor_collection().find(query, projection=_projection(fields)).sort(EXERCISE_SORT)
+        if skip and not cursor:
+            finder = finder.skip(skip)
+
+        documents = await finder.limit(limit + 1).to_list(None)
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = encode_cursor({"_id": documents[-1]["_id"]}, EXERCISE_SORT) if documents else None
+
+        result = (dump_documents(documents, view_model(Exercise, fields or EXERCISE_FIELDS)), next_cursor)
+        self.cache.set(cache_key, result)
+        return result
+
+    async def get_exercise_json(
+        self,
+        exercise_id: str,
+        fields: Optional[FrozenSet[str]] = None,
+        version: Optional[int] = None
+    ) -> Optional[bytes]:
+        """One exercise as serialized JSON bytes, see ``get_exercises_json``"""
+        if version is None:
+            version = await self.catalog_version.get()
+        snapshot = await self.snapshot.current(version)
+        if snapshot is not None:
+            return snapshot.get(exercise_id, fields)
+
+        cache_key = ("id", exercise_id, fields, version)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        document = await Exercise.get_motor_collection().find_one(
+            {"_id": ObjectId(exercise_id)}, projection=_projection(fields)
+        )
+        if document is None:
+            return None
+        result = dump_document(document, view_model(Exercise, fields or EXERCISE_FIELDS))
+        self.cache.set(cache_key, result)
+        return result
+
     async def update_exercise(
-        self, 
-        exercise_id: str, 
+        self,
+        exercise_id: str,
         exercise_data: ExerciseUpdate
     ) -> Optional[ExerciseResponse]:
         """Update an existing exercise"""
         exercise = await Exercise.get(ObjectId(exercise_id))
         if not exercise:
             return None
-        
+
         # Update only provided fields
         update_data = exercise_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(exercise, field, value)
-        
-        await exercise.save()
-        return ExerciseResponse(
+
+        try:
+            await exercise.save()
+        except DuplicateKeyError:
+            raise ValueError(_name_taken(exercise.name))
+        self._invalidate(exercise_id)
+        version = await self._bump([exercise_id])
+        response = ExerciseResponse(
             id=str(exercise.id),
-            **exercise.dict()
+            **exercise.dict(exclude={"id"})
         )
-    
+        self._index(response)
+        self._indexed(version)
+        return response
+
     async def delete_exercise(self, exercise_id: str) -> bool:
         """Delete an exercise"""
         exercise = await Exercise.get(ObjectId(exercise_id))
         if exercise:
             await exercise.delete()
+            self._invalidate(exercise_id)
+            version = await self._bump([exercise_id])
+            self._unindex(exercise_id)
+            self._indexed(version)
+            return True
+        return False
+
+    async def bulk_write_exercises(self, request: ExerciseBulkRequest) -> ExerciseBulkResponse:
+        """Apply create/upsert/update/delete operations in one unordered bulk_write.
+
+        Each item is validated like the single-item endpoints; invalid items are
+        reported and skipped without failing the rest of the batch. Names are
+        unique, so an item reusing a name written earlier in the same request
+        fails, as does one taking the name of another stored exercise.
+        """
+        response = ExerciseBulkResponse()
+        results: List[ExerciseBulkItemResult] = []
+        operations = []
+        op_items: List[int] = []  # bulk_write op index -> result index
+        op_names: List[Optional[str]] = []  # bulk_write op index -> name it writes
+
+        def fail(result: ExerciseBulkItemResult, message: str) -> None:
+            result.status = "error"
+            result.error = message
+            response.errors += 1
+
+        # Resolve ids of existing documents up front: one query by id, one by name
+        target_ids = [
+            ObjectId(item.id) for item in request.operations
+            if item.op in ("update", "delete") and item.id and ObjectId.is_valid(item.id)
+        ]
+        upsert_names = [
+            item.data["name"] for item in request.operations
+            if item.op == "upsert" and isinstance(item.data, dict) and isinstance(item.data.get("name"), str)
+        ]
+        collection = Exercise.get_motor_collection()
+        existing_ids = set()
+        if target_ids:
+            existing_ids = {
+                document["_id"] async for document in
+                collection.find({"_id": {"$in": target_ids}}, projection={"_id": 1})
+            }
+        ids_by_name = {}
+        if upsert_names:
+            ids_by_name = {
+                document["name"]: document["_id"] async for document in
+                collection.find({"name": {"$in": upsert_names}}, projection={"_id": 1, "name": 1})
+            }
+
+        # Names written by earlier items; a later item may not write the same one
+        claimed_names = set()
+
+        def claim(result: ExerciseBulkItemResult, name: str) -> bool:
+            if name in claimed_names:
+                fail(result, f"Name {name!r} is already written by another operation in this request")
+                return False
+            claimed_names.add(name)
             return True
-        return False
\ No newline at end of file
+
+        for index, item in enumerate(request.operations):
+            result = ExerciseBulkItemResult(index=index, op=item.op, status="ok", id=item.id)
+            results.append(result)
+            try:
+                name = None
+                if item.op in ("create", "upsert"):
+                    exercise_data = ExerciseCreate(**(item.data or {}))
+                    name = exercise_data.name
+                    if not claim(result, name):
+                        continue
+                    if item.op == "create":
+                        exercise = Exercise(**exercise_data.dict())
+                        document = exercise.model_dump(exclude={"id", "revision_id"})
+                        document["_id"] = ObjectId()
+                        result.id = str(document["_id"])
+                        operations.append(InsertOne(document))
+                    else:
+                        existing_id = ids_by_name.get(exercise_data.name)
+                        result.id = str(existing_id) if existing_id else None
+                        operations.append(UpdateOne(
+                            {"name": exercise_data.name},
+                            {
+                                "$set": exercise_data.dict(),
+                                "$setOnInsert": {"created_at": datetime.utcnow()}
+                            },
+                            upsert=True
+                        ))
+                else:
+                    if not item.id or not ObjectId.is_valid(item.id):
+                        fail(result, "Invalid exercise ID format")
+                        continue
+                    if ObjectId(item.id) not in existing_ids:
+                        fail(result, "Exercise not found")
+                        continue
+                    if item.op == "update":
+                        update_data = ExerciseUpdate(**(item.data or {})).dict(exclude_unset=True)
+                        if not update_data:
+                            fail(result, "No fields to update")
+                            continue
+                        name = update_data.get("name")
+                        if name is not None and not claim(result, name):
+                            continue
+                        operations.append(UpdateOne({"_id": ObjectId(item.id)}, {"$set": update_data}))
+                    else:
+                        operations.append(DeleteOne({"_id": ObjectId(item.id)}))
+            except ValidationError as e:
+                fail(result, str(e))
+                continue
+            op_items.append(index)
+            op_names.append(name)
+
+        if operations:
+            try:
+                write_result = await collection.bulk_write(operations, ordered=False)
+                details = write_result.bulk_api_result
+            except BulkWriteError as e:
+                details = e.details
+                for error in details.get("writeErrors", []):
+                    message = error.get("errmsg", "Write failed")
+                    # Ids are generated and upserts match by name, so only the name index can
+                    # reject a write; not every server reports the key in keyValue
+                    name = error.get("keyValue", {}).get("name") or op_names[error["index"]]
+                    if error.get("code") == 11000 and name is not None:
+                        message = _name_taken(name)
+                    fail(results[op_items[error["index"]]], message)
+            for upsert in details.get("upserted", []):
+                results[op_items[upsert["index"]]].id = str(upsert["_id"])
+            response.inserted = details.get("nInserted", 0)
+            response.upserted = details.get("nUpserted", 0)
+            response.matched = details.get("nMatched", 0)
+            response.modified = details.get("nModified", 0)
+            response.deleted = details.get("nRemoved", 0)
+            self.cache.clear()
+            changed = [result.id for result in results if result.status == "ok" and result.id]
+            version = await self._bump(changed)
+            await self._reindex(changed)
+            self._indexed(version)
+
+        response.results = results
+        return response
+
+    async def search_exercises(self, query: str, limit: int = 20) -> List[ExerciseSearchHit]:
+        """Ranked prefix and typo-tolerant search over name, description and instructions"""
+        await self._current_indexes()
+        return [
+            ExerciseSearchHit(score=score, **exercise.dict())
+            for exercise, score in self.search_index.search(query, limit)
+        ]
+
+    async def get_alternatives(
+        self,
+        exercise_id: str,
+        limit: int = 10,
+        equipment: Optional[str] = None,
+        difficulty: Optional[str] = None
+    ) -> Optional[List[ExerciseAlternative]]:
+        """Closest substitutes for an exercise, from the in-memory similarity index.
+
+        Returns None when the exercise is not in the catalog.
+        """
+        await self._current_indexes()
+        neighbors = self.similarity_index.neighbors(exercise_id, limit, equipment, difficulty)
+        if neighbors is None:
+            return None
+        return [ExerciseAlternative(similarity=score, **exercise.dict()) for exercise, score in neighbors]
+
+    async def preload(self) -> int:
+        """Warm the catalog before the first request: the search index, the snapshot and the default first page.
+
+        Also builds the serializers of that page. Returns the number of
+        exercises indexed.
+        """
+        indexed = await self.rebuild_search_index()
+        # A file left in the snapshot directory may predate writes that did not bump the version
+        await self.snapshot.build(force=True)
+        await self.get_exercises_json()
+        return indexed
+
+    async def rebuild_search_index(self) -> int:
+        """Index the whole catalog from Mongo, for search and alternatives; returns the number of exercises indexed"""
+        # Read before the scan, so a write the scan may have missed moves the version past it
+        version = await self.catalog_version.get()
+        exercises = [
+            ExerciseResponse(id=str(exercise.id), **exercise.dict(exclude={"id"}))
+            async for exercise in Exercise.find_all()
+        ]
+        # Built in a thread into new indexes; reads keep using the current ones until they are swapped in
+        search_index, similarity_index = await asyncio.to_thread(_build_indexes, exercises)
+        ExerciseService.search_index = search_index
+        ExerciseService.similarity_index = similarity_index
+        ExerciseService._indexed_version = version
+        return len(search_index)
+
+    async def dedupe_names(self) -> int:
+        """Rename exercises sharing a name so the unique name index can be built.
+
+        The oldest exercise of each name keeps it and the others get a
+        numbered suffix ("Squat (2)"); ids do not change, so workouts and
+        sessions keep their references. Returns the number of exercises renamed.
+        """
+        collection = Exercise.get_motor_collection()
+        groups = collection.aggregate([
+            {"$group": {"_id": "$name", "ids": {"$push": "$_id"}}},
+            {"$match": {"ids.1": {"$exists": True}}}
+        ])
+        renamed: List[str] = []
+        async for group in groups:
+            suffix = 1
+            for exercise_id in sorted(group["ids"])[1:]:
+                name = group["_id"]
+                while await collection.find_one({"name": name}, projection={"_id": 1}):
+                    suffix += 1
+                    name = f"{group['_id']} ({suffix})"
+                await collection.update_one({"_id": exercise_id}, {"$set": {"name": name}})
+                renamed.append(str(exercise_id))
+
+        if renamed:
+            self._invalidate()
+            await self._bump(renamed)
+        return len(renamed)
+
+    def _index(self, exercise: ExerciseResponse) -> None:
+        self.search_index.add(exercise.id, exercise.dict(), payload=exercise)
+        self.similarity_index.add(exercise.id, exercise.muscle_groups, exercise.equipment, exercise.difficulty, exercise)
+
+    def _indexed(self, version: int) -> None:
+        # A write of this worker applied to indexes that were current keeps them current
+        if ExerciseService._indexed_version == version - 1:
+            ExerciseService._indexed_version = version
+
+    async def _bump(self, exercise_ids: List[str]) -> int:
+        """Bump the catalog version, logging the changed ids for the other workers' indexes"""
+        return await self.catalog_version.bump(exercise_ids if len(exercise_ids) <= CHANGE_LOG_MAX_IDS else None)
+
+    async def _current_indexes(self) -> None:
+        """Catch the indexes up with the catalog version before a read.
+
+        Writes since the indexed version are applied from the version log,
+        one lookup for the exercises they changed. When the log does not
+        cover them, the catalog is rebuilt in the background and reads use
+        the current indexes until it is swapped in; only the first build,
+        with nothing to serve yet, is waited for.
+        """
+        indexed = ExerciseService._indexed_version
+        if indexed == await self.catalog_version.get():
+            return
+        rebuilding = ExerciseService._rebuilding is not None and not ExerciseService._rebuilding.done()
+        if indexed is not None and not rebuilding:
+            changes = await self.catalog_version.changes_since(indexed)
+            if changes is not None:
+                latest, changed = changes
+                search_index = ExerciseService.search_index
+                # Read after the log, so the documents are at least as new as ``latest``
+                await self._reindex(changed)
+                # Unless a rebuild swapped the indexes meanwhile; the next read catches those up
+                if ExerciseService.search_index is search_index and (ExerciseService._indexed_version or 0) < latest:
+                    ExerciseService._indexed_version = latest
+                return
+        if not rebuilding:
+            ExerciseService._rebuilding = asyncio.create_task(self._rebuild_in_background())
+        if indexed is None:
+            await asyncio.shield(ExerciseService._rebuilding)
+
+    async def _rebuild_in_background(self) -> None:
+        try:
+            await self.rebuild_search_index()
+        except Exception:
+            logger.exception("Could not rebuild the exercise search and similarity indexes")
+
+    def _unindex(self, exercise_id: str) -> None:
+        self.search_index.remove(exercise_id)
+        self.similarity_index.remove(exercise_id)
+
+    async def _reindex(self, exercise_ids: Iterable[str]) -> None:
+        """Refresh the index entries of exercises touched by a bulk write"""
+        wanted = {exercise_id for exercise_id in exercise_ids if ObjectId.is_valid(exercise_id)}
+        if not wanted:
+            return
+        found = set()
+        async for exercise in Exercise.find(In(Exercise.id, [ObjectId(exercise_id) for exercise_id in wanted])):
+            found.add(str(exercise.id))
+            self._index(ExerciseResponse(id=str(exercise.id), **exercise.dict(exclude={"id"})))
+        for exercise_id in wanted - found:
+            self._unindex(exercise_id)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the catalog cache and the state of the snapshot"""
+        return {**self.cache.stats(), "snapshot": self.snapshot.stats()}
+
+    def _list_query(
+        self,
+        muscle_group: Optional[str],
+        difficulty: Optional[str],
+        equipment: Optional[str],
+        cursor: Optional[str]
+    ) -> Dict[str, Any]:
+        query = {}
+
+        if muscle_group:
+            query["muscle_groups"] = {"$in": [muscle_group]}
+        if difficulty:
+            query["difficulty"] = difficulty
+        if equipment:
+            query["equipment"] = equipment
+
+        return apply_cursor(query, cursor, EXERCISE_SORT)
+
+    def _invalidate(self, exercise_id: Optional[str] = None) -> None:
+        """Drop cached entries affected by a catalog write"""
+        # Any write can change the membership of any filtered list
+        self.cache.delete_where(lambda key: key[0] == "list")
+        if exercise_id is not None:
+            self.cache.delete_where(lambda key: key[0] == "id" and key[1] == exercise_id)
@@ -0,0 +1,391 @@
+from collections import defaultdict
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Set, Type
+from datetime import datetime
+from bson import ObjectId, json_util
+from beanie import Document
+from beanie.odm.utils.encoder import Encoder
+from pymongo.errors import BulkWriteError
+
+from ..core.config import settings
+from ..models.session import WorkoutSession, SessionExercise
+from ..models.workout import Workout, WorkoutExercise
+from .loader import embedded_entries
+from .record import PersonalRecordService
+from .rollup import RollupService
+from .set_history import SetHistoryService, bucketed_sets, logged_sets
+from .storage import embedded_entry
+
+EXPORT_FORMAT_VERSION = 1
+
+# NDJSON record type -> document class; parents carry user_id, children are referenced by id
+RECORD_TYPES: Dict[str, Type[Document]] = {
+    "workout": Workout,
+    "workout_exercise": WorkoutExercise,
+    "session": WorkoutSession,
+    "session_exercise": SessionExercise,
+}
+USER_SCOPED_TYPES = ("workout", "session")
+# Parent record type -> record type of its exercise entries
+CHILD_TYPES = {"workout": "workout_exercise", "session": "session_exercise"}
+PARENT_TYPES = {child_type: parent_type for parent_type, child_type in CHILD_TYPES.items()}
+MAX_REPORTED_ERRORS = 100
+
+def _line(record_type: str, document: Dict[str, Any]) -> bytes:
+    payload = {"type": record_type, "doc": document}
+    return (json_util.dumps(payload, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n").encode()
+
+async def _iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without buffering more than one partial line"""
+    pending = bytearray()
+    async for chunk in chunks:
+        pending += chunk
+        end = pending.rfind(b"\n")
+        if end < 0:
+            continue
+        for line in pending[:end].split(b"\n"):
+            yield bytes(line)
+        del pending[:end + 1]
+    if pending:
+        yield bytes(pending)
+
+def _child_refs(document: Dict[str, Any]) -> Set[Any]:
+    """Child ids a parent points at, through its references and its embedded entries"""
+    refs = set(document.get("exercises") or [])
+    refs.update(entry.get("_id") for entry in document.get("embedded_exercises") or [])
+    return refs
+
+def _stored(record_type: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate an imported document and return it as the API would have written it.
+
+    Values are converted to their field types (ISO strings to datetimes, hex
+    strings to ObjectIds) and fields the model does not know are dropped.
+    Embedded exercise entries are validated as the child model.
+    """
+    model = RECORD_TYPES[record_type].model_validate(document)
+    stored = Encoder(to_db=True).encode(model)
+    stored.pop("revision_id", None)
+    if stored.get("_id") is None:
+        stored.pop("_id", None)
+    if stored.get("embedded_exercises") is not None:
+        child_model = RECORD_TYPES[CHILD_TYPES[record_type]]
+        stored["embedded_exercises"] = [embedded_entry(child_model.model_validate(entry)) for entry in stored["embedded_exercises"]]
+    return stored
+
+def _bson_equal(stored: Any, imported: Any) -> bool:
+    """Whether ``imported`` reads back as ``stored``; BSON keeps datetimes to the millisecond"""
+    if isinstance(imported, datetime):
+        return isinstance(stored, datetime) and stored == imported.replace(microsecond=imported.microsecond // 1000 * 1000)
+    if isinstance(imported, dict):
+        return isinstance(stored, dict) and stored.keys() == imported.keys() and all(
+            _bson_equal(stored[key], value) for key, value in imported.items()
+        )
+    if isinstance(imported, list):
+        return isinstance(stored, list) and len(stored) == len(imported) and all(
+            _bson_equal(item, value) for item, value in zip(stored, imported)
+        )
+    return stored == imported
+
+def _report_error(report: Dict[str, Any], error: Dict[str, Any]) -> None:
+    report["error_count"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append(error)
+
+class HistoryService:
+    """Streaming NDJSON export/import of a user's training history"""
+
+    def __init__(self, batch_size: int = settings.history_batch_size):
+        self.batch_size = batch_size
+        self.set_history = SetHistoryService()
+        self.records = PersonalRecordService()
+        self.rollups = RollupService()
+
+    async def export_user_history(self, user_id: str) -> AsyncIterator[bytes]:
+        """Yield the user's workouts and sessions, with their exercises, as NDJSON.
+
+        Parent documents are read through a Motor cursor in batches of
+        ``batch_size`` and each batch resolves its children with one $in query,
+        so memory use does not depend on the size of the history.
+        """
+        yield _line("meta", {
+            "version": EXPORT_FORMAT_VERSION,
+            "user_id": user_id,
+            "exported_at": datetime.utcnow(),
+        })
+        async for line in self._export_collection(user_id, "workout", "workout_exercise"):
+            yield line
+        async for line in self._export_collection(user_id, "session", "session_exercise"):
+            yield line
+
+    async def _export_collection(self, user_id: str, parent_type: str, child_type: str) -> AsyncIterator[bytes]:
+        parents = RECORD_TYPES[parent_type].get_motor_collection()
+        children = RECORD_TYPES[child_type].get_motor_collection()
+        cursor = parents.find({"user_id": ObjectId(user_id)}, batch_size=self.batch_size).sort("_id", 1)
+
+        batch: List[Dict[str, Any]] = []
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                async for line in self._export_batch(batch, parent_type, child_type, children):
+                    yield line
+                batch = []
+        if batch:
+            async for line in self._export_batch(batch, parent_type, child_type, children):
+                yield line
+
+    async def _export_batch(self, batch, parent_type, child_type, children) -> AsyncIterator[bytes]:
+        # Parents in the embedded layout already carry their children
+        child_ids = [
+            ref for document in batch if document.get("embedded_exercises") is None
+            for ref in document.get("exercises", [])
+        ]
+        if child_ids:
+            async for child in children.find({"_id": {"$in": child_ids}}, batch_size=self.batch_size):
+                yield _line(child_type, child)
+        for document in batch:
+            yield _line(parent_type, document)
+
+    async def import_user_history(self, user_id: str, chunks: AsyncIterable[bytes]) -> Dict[str, Any]:
+        """Restore an NDJSON export, writing each record type with batched insert_many.
+
+        Documents keep their original ids, so re-importing the same file is
+        idempotent: already present documents are counted as duplicates, and an
+        import that was interrupted can be retried with the whole file.
+        Exercise entries must precede the parents that reference them (as in
+        an export); a parent may only reference entries inserted by this
+        import or already belonging to the user, so an import cannot attach
+        another user's entries. Likewise sessions must follow the workouts
+        they were performed from, and those must be the user's.
+
+        Inserted sessions are folded into the set buckets, personal records
+        and daily rollups like sessions logged through the API.
+        """
+        owner = ObjectId(user_id)
+        buffers: Dict[str, List[Dict[str, Any]]] = {record_type: [] for record_type in RECORD_TYPES}
+        # Child ids inserted by this import that no inserted parent references yet, per child
+        # record type; claimed ids are dropped, so for an export this holds one batch's entries
+        pending: Dict[str, Set[Any]] = {child_type: set() for child_type in PARENT_TYPES}
+        report: Dict[str, Any] = {
+            "inserted": {record_type: 0 for record_type in RECORD_TYPES},
+            "duplicates": 0,
+            "errors": [],
+            "error_count": 0,
+        }
+
+        def record_error(line_number: int, message: str) -> None:
+            _report_error(report, {"line": line_number, "error": message})
+
+        async def flush(record_type: str) -> None:
+            documents, buffers[record_type] = buffers[record_type], []
+            if record_type in CHILD_TYPES:
+                # The entries this batch may reference have to be in place first
+                await flush(CHILD_TYPES[record_type])
+                documents = await self._owned_parents(owner, record_type, documents, pending, report)
+            else:
+                documents = await self._unclaimed_children(owner, record_type, documents, report)
+            if record_type == "session":
+                # As do the workouts its sessions were performed from
+                await flush("workout")
+                documents = await self._owned_workouts(owner, documents, report)
+            if documents:
+                inserted = await self._flush(record_type, documents, report)
+                inserted_ids = set(inserted)
+                if record_type in PARENT_TYPES:
+                    pending[record_type].update(inserted)
+                    # Entries an interrupted run of this import already stored come back as duplicates
+                    pending[record_type].update(await self._resumed_children(
+                        record_type, [document for document in documents if document["_id"] not in inserted_ids]
+                    ))
+                else:
+                    # Claimed entries now belong to one of the user's parents
+                    pending[CHILD_TYPES[record_type]].difference_update(
+                        ref for document in documents if document["_id"] in inserted_ids for ref in _child_refs(document)
+                    )
+                if record_type == "session":
+                    await self._derive([document for document in documents if document["_id"] in inserted_ids])
+
+        line_number = 0
+        async for raw_line in _iter_lines(chunks):
+            line_number += 1
+            if not raw_line.strip():
+                continue
+            try:
+                record = json_util.loads(raw_line)
+                record_type = record["type"]
+                if record_type == "meta":
+                    continue
+                if record_type not in RECORD_TYPES:
+                    raise ValueError(f"unknown record type {record_type!r}")
+                # Same validation as any other write; stored as the validated model
+                document = _stored(record_type, record["doc"])
+                if record_type in USER_SCOPED_TYPES and document.get("user_id") != owner:
+                    raise ValueError("document belongs to another user")
+            except Exception as e:
+                record_error(line_number, str(e))
+                continue
+
+            buffers[record_type].append(document)
+            if len(buffers[record_type]) >= self.batch_size:
+                await flush(record_type)
+
+        # Parents flush their children first
+        for record_type in CHILD_TYPES:
+            await flush(record_type)
+        return report
+
+    async def _flush(self, record_type: str, documents: List[Dict[str, Any]], report: Dict[str, Any]) -> List[Any]:
+        """Insert a batch; returns the ids actually inserted"""
+        collection = RECORD_TYPES[record_type].get_motor_collection()
+        try:
+            result = await collection.insert_many(documents, ordered=False)
+            report["inserted"][record_type] += len(result.inserted_ids)
+            return list(result.inserted_ids)
+        except BulkWriteError as e:
+            details = e.details
+            report["inserted"][record_type] += details.get("nInserted", 0)
+            failed = set()
+            for error in details.get("writeErrors", []):
+                failed.add(error.get("index"))
+                if error.get("code") == 11000:
+                    report["duplicates"] += 1
+                else:
+                    _report_error(report, {"type": record_type, "error": error.get("errmsg")})
+            return [document.get("_id") for index, document in enumerate(documents) if index not in failed]
+
+    async def _unclaimed_children(
+        self,
+        owner: ObjectId,
+        record_type: str,
+        documents: List[Dict[str, Any]],
+        report: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Drop exercise entries whose id another user's parent already references"""
+        parents = RECORD_TYPES[PARENT_TYPES[record_type]].get_motor_collection()
+        ids = [document["_id"] for document in documents if "_id" in document]
+        claimed = await _referenced_by(parents, {"user_id": {"$ne": owner}}, ids)
+        for document in documents:
+            if document.get("_id") in claimed:
+                _report_error(report, {"type": record_type, "error": f"{document['_id']} belongs to another user"})
+        return [document for document in documents if document.get("_id") not in claimed]
+
+    async def _resumed_children(self, record_type: str, documents: List[Dict[str, Any]]) -> Set[Any]:
+        """Ids of the exercise entries that are stored exactly as imported and that no parent references.
+
+        Such an entry was left behind by an earlier run of the same import
+        that ended before its parent, so the parent may claim it.
+        """
+        ids = [document["_id"] for document in documents]
+        if not ids:
+            return set()
+        parents = RECORD_TYPES[PARENT_TYPES[record_type]].get_motor_collection()
+        unreferenced = set(ids) - await _referenced_by(parents, {}, ids)
+        if not unreferenced:
+            return set()
+        imported = {document["_id"]: document for document in documents}
+        return {
+            stored["_id"]
+            async for stored in RECORD_TYPES[record_type].get_motor_collection().find({"_id": {"$in": list(unreferenced)}})
+            if _bson_equal(stored, imported[stored["_id"]])
+        }
+
+    async def _owned_parents(
+        self,
+        owner: ObjectId,
+        record_type: str,
+        documents: List[Dict[str, Any]],
+        pending: Dict[str, Set[Any]],
+        report: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Drop parents pointing at exercise entries that are not the user's.
+
+        Referenced entries must be pending ones from this import or already
+        belong to one of the user's parents. Embedded entries may also be new ids nobody uses, and
+        the parent's reference list must match them.
+        """
+        child_type = CHILD_TYPES[record_type]
+        parents = RECORD_TYPES[record_type].get_motor_collection()
+        children = RECORD_TYPES[child_type].get_motor_collection()
+
+        unknown = {ref for document in documents for ref in _child_refs(document)} - pending[child_type]
+        owned = await _referenced_by(parents, {"user_id": owner}, unknown)
+        unknown -= owned
+        taken = await _referenced_by(parents, {}, unknown)
+        if unknown:
+            taken.update(await children.distinct("_id", {"_id": {"$in": list(unknown)}}))
+        allowed = pending[child_type] | owned
+
+        accepted = []
+        for document in documents:
+            references = set(document.get("exercises") or [])
+            embedded = document.get("embedded_exercises")
+            if embedded is None:
+                valid = references <= allowed
+            else:
+                entries = {entry.get("_id") for entry in embedded}
+                valid = references == entries and all(ref in allowed or ref not in taken for ref in entries)
+            if valid:
+                accepted.append(document)
+            else:
+                _report_error(report, {
+                    "type": record_type,
+                    "error": f"{document.get('_id')} references exercise entries that are not part of this import or the user's history"
+                })
+        return accepted
+
+    async def _owned_workouts(
+        self,
+        owner: ObjectId,
+        documents: List[Dict[str, Any]],
+        report: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Drop sessions whose workout is missing or another user's"""
+        workout_ids = list({document.get("workout_id") for document in documents})
+        owned = set(await Workout.get_motor_collection().distinct("_id", {"_id": {"$in": workout_ids}, "user_id": owner}))
+        accepted = []
+        for document in documents:
+            if document.get("workout_id") in owned:
+                accepted.append(document)
+            else:
+                _report_error(report, {
+                    "type": "session",
+                    "error": f"{document.get('_id')} was performed from a workout that is not part of this import or the user's"
+                })
+        return accepted
+
+    async def _derive(self, sessions: List[Dict[str, Any]]) -> None:
+        """Fold newly inserted sessions into the set buckets, personal records and daily rollups"""
+        refs = [ref for session in sessions if embedded_entries(session) is None for ref in session.get("exercises") or []]
+        referenced: Dict[Any, Dict[str, Any]] = {}
+        if refs:
+            async for child in SessionExercise.get_motor_collection().find({"_id": {"$in": refs}}):
+                referenced[child["_id"]] = child
+        for session in sessions:
+            entries = embedded_entries(session)
+            if entries is None:
+                entries = [referenced[ref] for ref in session.get("exercises") or [] if ref in referenced]
+            # Records are per session, so the session's entries of one exercise count together
+            sets_by_exercise: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+            for entry in entries:
+                actual_sets = logged_sets(entry)
+                if not actual_sets:
+                    continue
+                # Dated like the backfill: sets without logged_at fall back to the entry, then the session
+                performed_at = entry.get("completed_at") or session.get("started_at") or datetime.utcnow()
+                await self.set_history.append(
+                    session["user_id"], entry["exercise_id"],
+                    bucketed_sets(session["_id"], entry["_id"], actual_sets, performed_at)
+                )
+                sets_by_exercise[entry["exercise_id"]].extend(actual_sets)
+            for exercise_id, actual_sets in sets_by_exercise.items():
+                await self.records.record_sets(session["user_id"], exercise_id, actual_sets)
+            # Only counts completed sessions
+            await self.rollups.sync_session(session["_id"])
+
+async def _referenced_by(parents, scope: Dict[str, Any], ids: Iterable[Any]) -> Set[Any]:
+    """The ``ids`` that parents matching ``scope`` reference"""
+    ids = set(ids)
+    if not ids:
+        return set()
+    found: Set[Any] = set()
+    async for parent in parents.find({**scope, "exercises": {"$in": list(ids)}}, projection={"exercises": 1}):
+        found.update(ref for ref in parent["exercises"] if ref in ids)
+    return found
@@ -0,0 +1,77 @@
+from typing import Any, Dict, List, Optional
+import time
+
+from ..schemas.session import LiveSetEvent
+from .session import SessionService
+
+class LiveSessionWriter:
+    """Write-behind buffer for sets logged over a live session connection.
+
+    Sets are acknowledged as soon as they are buffered and written per
+    session exercise in one update when the flush interval elapses, when
+    ``max_sets`` are pending, or when the connection closes.
+
+    Durability: an ``ack`` only means the set is buffered in this process.
+    A set is stored once a ``flushed`` message covering its seq was sent.
+    Sets whose write failed stay buffered for the next flush.
+    If the process dies before that, the client must resend every set after
+    the last flushed seq; replays are idempotent because each set carries its
+    seq and a seq that is already stored is not appended again.
+    """
+
+    def __init__(self, service: SessionService, session_id: str, flush_interval: float, max_sets: int):
+        self.service = service
+        self.session_id = session_id
+        self.flush_interval = flush_interval
+        self.max_sets = max_sets
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending_count = 0
+        self._pending_seq: Optional[int] = None
+        self._last_flush = time.monotonic()
+        self.flushed_seq: Optional[int] = None
+        self.writes = 0
+
+    def add(self, event: LiveSetEvent) -> bool:
+        """Buffer a set; returns True when the buffer should be flushed now"""
+        logged_set = {"seq": event.seq, "reps": event.reps, "weight": event.weight}
+        if event.rpe is not None:
+            logged_set["rpe"] = event.rpe
+        self._pending.setdefault(event.session_exercise_id, []).append(logged_set)
+        self._pending_count += 1
+        self._pending_seq = max(event.seq, self._pending_seq if self._pending_seq is not None else event.seq)
+        return self._pending_count >= self.max_sets
+
+    def seconds_until_flush(self) -> float:
+        return max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+
+    async def flush(self) -> Optional[Dict[str, Any]]:
+        """Write all buffered sets, one update per session exercise.
+
+        Returns the ``flushed`` message for the client, or None if nothing
+        was pending. Exercises that no longer exist, or whose session is no
+        longer in progress, are reported as rejected. Each exercise leaves
+        the buffer once its write succeeded; if a write raises, it and the
+        exercises after it stay buffered and the error propagates.
+        """
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return None
+        through_seq = self._pending_seq
+
+        new_records: Dict[str, List[str]] = {}
+        rejected: List[str] = []
+        for session_exercise_id in list(self._pending):
+            sets = self._pending[session_exercise_id]
+            response = await self.service.append_sets(
+                self.session_id, session_exercise_id, sets, only_in_progress=True
+            )
+            self.writes += 1
+            del self._pending[session_exercise_id]
+            self._pending_count -= len(sets)
+            if response is None:
+                rejected.append(session_exercise_id)
+            elif response.new_records:
+                new_records[session_exercise_id] = response.new_records
+        self._pending_seq = None
+        self.flushed_seq = through_seq
+        return {"type": "flushed", "through_seq": through_seq, "new_records": new_records, "rejected": rejected}
@@ -0,0 +1,110 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type
+from bson import ObjectId
+from beanie import Document
+
+from ..models.exercise import Exercise
+
+def embedded_entries(parent: Any) -> Optional[List[Dict[str, Any]]]:
+    """Inline child documents of a parent stored in the embedded layout, else None"""
+    if isinstance(parent, Mapping):
+        return parent.get("embedded_exercises")
+    return getattr(parent, "embedded_exercises", None)
+
+class ReferenceLoader:
+    """Per-request batching loader for documents referenced by id.
+
+    Every ``load`` resolves all requested ids of one collection with a single
+    $in query and memoizes the result, so hydrating a page of documents costs
+    one query per collection instead of one per reference.
+    """
+
+    def __init__(self):
+        self._documents: Dict[Type[Document], Dict[ObjectId, Optional[Document]]] = {}
+        self.queries = 0
+
+    async def load(self, model: Type[Document], ids: Iterable[ObjectId]) -> Dict[ObjectId, Document]:
+        """Return the documents for ``ids`` that exist, keyed by id"""
+        known = self._documents.setdefault(model, {})
+        wanted = list(dict.fromkeys(ids))
+        missing = [ref for ref in wanted if ref not in known]
+        if missing:
+            self.queries += 1
+            for document in await model.find({"_id": {"$in": missing}}).to_list():
+                known[document.id] = document
+            for ref in missing:
+                known.setdefault(ref, None)
+        return {ref: known[ref] for ref in wanted if known[ref] is not None}
+
+    async def children(self, child_model: Type[Document], parents: Iterable[Any]) -> Dict[ObjectId, Document]:
+        """Child documents of ``parents`` keyed by id, whichever layout each parent uses.
+
+        Embedded children are read from the parent itself; referenced ones are
+        batched into a single ``load``. Parents may be documents or raw dicts.
+        """
+        embedded: Dict[ObjectId, Document] = {}
+        refs: List[ObjectId] = []
+        for parent in parents:
+            entries = embedded_entries(parent)
+            if entries is None:
+                refs.extend(parent["exercises"] if isinstance(parent, Mapping) else parent.exercises)
+                continue
+            for entry in entries:
+                child = child_model.model_validate(entry)
+                embedded[child.id] = child
+        loaded = await self.load(child_model, refs) if refs else {}
+        return {**loaded, **embedded}
+
+    async def exercise_names(self, ids: Iterable[ObjectId]) -> Dict[ObjectId, str]:
+        """Second hop: names of the catalog exercises referenced by child documents"""
+        exercises = await self.load(Exercise, ids)
+        return {ref: exercise.name for ref, exercise in exercises.items()}
+
+async def aggregate_with_children(
+    parent_model: Type[Document],
+    child_model: Type[Document],
+    query: Dict[str, Any],
+    sort: Sequence[Tuple[str, int]],
+    limit: int,
+    skip: int = 0
+) -> List[Tuple[Document, List[Document], Dict[ObjectId, str]]]:
+    """Alternative to ReferenceLoader: fetch a page and both hops in one $lookup aggregation.
+
+    Returns (parent, children in reference order, exercise names) per parent.
+    """
+    child_collection = child_model.get_motor_collection().name
+    exercise_collection = Exercise.get_motor_collection().name
+    pipeline: List[Dict[str, Any]] = [{"$match": query}, {"$sort": dict(sort)}]
+    if skip:
+        pipeline.append({"$skip": skip})
+    pipeline += [
+        {"$limit": limit},
+        {"$lookup": {
+            "from": child_collection,
+            "localField": "exercises",
+            "foreignField": "_id",
+            "as": "_children",
+        }},
+        # Parents in the embedded layout carry their children inline
+        {"$set": {"_exercise_ids": {"$concatArrays": [
+            "$_children.exercise_id",
+            {"$ifNull": ["$embedded_exercises.exercise_id", []]},
+        ]}}},
+        {"$lookup": {
+            "from": exercise_collection,
+            "localField": "_exercise_ids",
+            "foreignField": "_id",
+            "as": "_exercises",
+        }},
+        {"$project": {"_exercise_ids": 0, "_exercises.instructions": 0, "_exercises.description": 0}},
+    ]
+
+    results = []
+    async for raw in parent_model.get_motor_collection().aggregate(pipeline):
+        children = {child["_id"]: child_model.model_validate(child) for child in raw.pop("_children")}
+        for entry in embedded_entries(raw) or []:
+            children[entry["_id"]] = child_model.model_validate(entry)
+        names = {exercise["_id"]: exercise["name"] for exercise in raw.pop("_exercises")}
+        parent = parent_model.model_validate(raw)
+        ordered = [children[ref] for ref in parent.exercises if ref in children]
+        results.append((parent, ordered, names))
+    return results
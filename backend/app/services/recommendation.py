@@ -0,0 +1,367 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+import numpy as np
+
+from ..models.exercise import Exercise
+from ..models.recommendation import WorkoutRecommendation
+from ..models.rollup import UserDailyRollup
+from ..models.split import WorkoutSplit, SplitDay
+from ..models.user import User, UserProfile
+from ..models.workout import Workout, WorkoutExercise
+from ..schemas.workout import WorkoutCreate, WorkoutExerciseCreate
+from .exercise import ExerciseService
+from .loader import ReferenceLoader, embedded_entries
+
+DIFFICULTY_LEVELS = ("beginner", "intermediate", "advanced")
+# Score for an exercise of the column's difficulty at the row's fitness level
+DIFFICULTY_FIT = np.array([
+    [0.3, -0.2, -1.0],
+    [0.1, 0.3, -0.3],
+    [-0.1, 0.2, 0.3],
+], dtype=np.float32)
+# Sets, reps and rest seconds per fitness level
+PRESCRIPTIONS = {"beginner": (3, 10, 90), "intermediate": (4, 8, 120), "advanced": (4, 6, 150)}
+SECONDS_PER_SET = 45
+# Equipment values that need nothing beyond the user's body
+NO_EQUIPMENT = {None, "", "bodyweight", "none"}
+
+# Weight of the recent training of a muscle against the day's focus on it
+FATIGUE_WEIGHT = 0.6
+# Share of a muscle group's weight lost each time a picked exercise trains it
+REPEAT_DECAY = 0.5
+RECENT_DAYS = 7
+
+class CatalogMatrix:
+    """The exercise catalog as a feature matrix, one row per exercise.
+
+    Columns are the muscle groups (each row spread evenly over the groups the
+    exercise trains), then one column per difficulty level. A user becomes a
+    vector over the same columns, so ``users @ features.T`` scores the whole
+    catalog for a whole batch of users in one product. Equipment is kept apart as a
+    requirement matrix because it filters rather than scores.
+    """
+
+    def __init__(self, exercises: Sequence[Mapping[str, Any]]):
+        self.ids: List[ObjectId] = [exercise["_id"] for exercise in exercises]
+        self.rows = {exercise_id: row for row, exercise_id in enumerate(self.ids)}
+        self.muscle_groups = sorted({group for exercise in exercises for group in exercise.get("muscle_groups") or []})
+        self.muscle_columns = {group: column for column, group in enumerate(self.muscle_groups)}
+        self.equipment = sorted({
+            exercise.get("equipment") for exercise in exercises if exercise.get("equipment") not in NO_EQUIPMENT
+        })
+        self.equipment_columns = {equipment: column for column, equipment in enumerate(self.equipment)}
+
+        count = len(exercises)
+        self.muscles = np.zeros((count, len(self.muscle_groups)), dtype=np.float32)
+        self.requires = np.zeros((count, len(self.equipment)), dtype=np.float32)
+        difficulty = np.zeros(count, dtype=np.intp)
+        for row, exercise in enumerate(exercises):
+            for group in exercise.get("muscle_groups") or []:
+                self.muscles[row, self.muscle_columns[group]] = 1
+            if exercise.get("equipment") not in NO_EQUIPMENT:
+                self.requires[row, self.equipment_columns[exercise["equipment"]]] = 1
+            if exercise.get("difficulty") in DIFFICULTY_LEVELS:
+                difficulty[row] = DIFFICULTY_LEVELS.index(exercise["difficulty"])
+
+        # A compound lift does not outscore an isolation exercise just by listing more muscles
+        self.muscle_shares = self.muscles / np.maximum(self.muscles.sum(axis=1, keepdims=True), 1)
+        self.features = np.hstack([self.muscle_shares, np.eye(len(DIFFICULTY_LEVELS), dtype=np.float32)[difficulty]])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def user_weights(self, levels: np.ndarray, focus: np.ndarray, recent: np.ndarray) -> np.ndarray:
+        """Users as vectors over the feature columns, shape (users, features).
+
+        ``levels`` holds fitness level indexes; ``focus`` and ``recent`` are
+        (users, muscle groups). A muscle group counts as much as the target
+        day focuses on it, less the more of the last week's sets it got.
+        """
+        def normalized(values: np.ndarray) -> np.ndarray:
+            return values / np.maximum(values.max(axis=1, keepdims=True), 1e-9)
+
+        muscle_weights = normalized(focus) * (1 - FATIGUE_WEIGHT * normalized(recent))
+        return np.hstack([muscle_weights, DIFFICULTY_FIT[levels]])
+
+    def rank(self, weights: np.ndarray, missing_equipment: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Pick ``size`` exercises per user, best first, spreading them over muscle groups.
+
+        ``missing_equipment`` flags, per user, the equipment columns they
+        cannot use; exercises needing any of those are never picked. Every
+        pick lowers the weight of the muscle groups it trains, so a day is
+        not filled with variants of one movement. The loop runs over the
+        slots, each step one matrix product for all users. Returns the
+        picked rows and their scores; slots left without any usable
+        exercise score -inf.
+        """
+        weights = weights.copy()
+        muscle_columns = len(self.muscle_groups)
+        blocked = (missing_equipment @ self.requires.T) > 0
+        users = np.arange(weights.shape[0])
+        size = min(size, len(self))
+        picked = np.zeros((weights.shape[0], size), dtype=np.intp)
+        picked_scores = np.full((weights.shape[0], size), -np.inf, dtype=np.float32)
+        for slot in range(size):
+            # Rounded so that identical exercises tie exactly and the first one wins, whatever the batch
+            scores = np.round(weights @ self.features.T, 4)
+            scores[blocked] = -np.inf
+            best = scores.argmax(axis=1)
+            picked[:, slot] = best
+            picked_scores[:, slot] = scores[users, best]
+            blocked[users, best] = True
+            weights[:, :muscle_columns] *= 1 - REPEAT_DECAY * self.muscles[best]
+        return picked, picked_scores
+
+def _scheduled_day(split: WorkoutSplit, days: Dict[ObjectId, SplitDay], weekday: int) -> Optional[SplitDay]:
+    """The split's training day for ``weekday`` (1 = Monday), else the next one in the week"""
+    training = sorted(
+        (days[ref] for ref in split.days if ref in days and not days[ref].rest_day),
+        key=lambda day: day.day_number
+    )
+    if not training:
+        return None
+    return next((day for day in training if day.day_number >= weekday), training[0])
+
+class RecommendationService:
+    """Generates workout drafts by scoring the whole exercise catalog per user.
+
+    A user is described by their fitness level, the equipment they have, the
+    muscle groups of the split day they train next and the sets each muscle
+    group got over the last week (from the daily rollups). Users are scored
+    in batches: the catalog matrix is shared and built once per catalog
+    version, and a batch of users costs one matrix product.
+    """
+
+    # Shared by every service instance, rebuilt when the catalog version moves
+    _catalog: Optional[CatalogMatrix] = None
+    _catalog_version: Optional[int] = None
+
+    def __init__(self, loader: Optional[ReferenceLoader] = None):
+        self.loader = loader or ReferenceLoader()
+
+    async def catalog(self) -> CatalogMatrix:
+        version = await ExerciseService.catalog_version.get()
+        if RecommendationService._catalog is None or RecommendationService._catalog_version != version:
+            exercises = await Exercise.get_motor_collection().find(
+                {}, projection={"muscle_groups": 1, "equipment": 1, "difficulty": 1}
+            ).sort("_id", ASCENDING).to_list(None)
+            RecommendationService._catalog = CatalogMatrix(exercises)
+            RecommendationService._catalog_version = version
+        return RecommendationService._catalog
+
+    async def recommend(
+        self,
+        user_id: str,
+        split_day_id: Optional[str] = None,
+        size: int = 6,
+        now: Optional[datetime] = None
+    ) -> Optional[WorkoutCreate]:
+        """A draft workout for one user, or None if the user does not exist.
+
+        Targets ``split_day_id`` when given, otherwise the user's next
+        training day in their active split (the whole body without one).
+        """
+        day = ObjectId(split_day_id) if split_day_id else None
+        drafts = await self.recommend_many([ObjectId(user_id)], size, now, {ObjectId(user_id): day} if day else None)
+        draft = drafts.get(ObjectId(user_id))
+        return draft[1] if draft else None
+
+    async def recommend_many(
+        self,
+        user_ids: Sequence[ObjectId],
+        size: int = 6,
+        now: Optional[datetime] = None,
+        split_days: Optional[Dict[ObjectId, ObjectId]] = None,
+        loader: Optional[ReferenceLoader] = None
+    ) -> Dict[ObjectId, Tuple[Optional[ObjectId], WorkoutCreate]]:
+        """Drafts for a batch of users, keyed by user id, with the split day each one targets.
+
+        References are resolved through ``loader``, the service's own by default.
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        now = now or datetime.utcnow()
+        loader = loader or self.loader
+        catalog = await self.catalog()
+        users = await loader.load(User, user_ids)
+        user_ids = [user_id for user_id in user_ids if user_id in users]
+        if not user_ids:
+            return {}
+        user_rows = {user_id: row for row, user_id in enumerate(user_ids)}
+
+        levels = np.array([
+            DIFFICULTY_LEVELS.index(level) if (level := self._profile(users[user_id]).fitness_level) in DIFFICULTY_LEVELS else 0
+            for user_id in user_ids
+        ], dtype=np.intp)
+        missing_equipment = np.zeros((len(user_ids), len(catalog.equipment)), dtype=np.float32)
+        for row, user_id in enumerate(user_ids):
+            available = self._profile(users[user_id]).equipment
+            if available is not None:
+                missing_equipment[row] = 1
+                columns = [catalog.equipment_columns[item] for item in available if item in catalog.equipment_columns]
+                missing_equipment[row, columns] = 0
+
+        days = await self._target_days(user_ids, now, split_days or {}, loader)
+        focus = await self._day_focus(catalog, user_rows, days, loader)
+        recent = await self._recent_sets(catalog, user_rows, now)
+
+        weights = catalog.user_weights(levels, focus, recent)
+        picked, picked_scores = catalog.rank(weights, missing_equipment, size)
+        return {
+            user_id: (
+                days[user_id].id if user_id in days else None,
+                self._draft(
+                    catalog,
+                    DIFFICULTY_LEVELS[levels[row]],
+                    days[user_id].day_name if user_id in days else None,
+                    picked[row][np.isfinite(picked_scores[row])]
+                )
+            )
+            for row, user_id in enumerate(user_ids)
+        }
+
+    async def generate_all(
+        self,
+        user_id: Optional[str] = None,
+        size: int = 6,
+        batch_size: int = 1000
+    ) -> int:
+        """Nightly job: store a fresh draft for every active user (or one user)"""
+        scope = {"_id": ObjectId(user_id)} if user_id else {"is_active": True}
+        count = 0
+        batch: List[ObjectId] = []
+        cursor = User.get_motor_collection().find(scope, projection={"_id": 1}, batch_size=batch_size)
+        async for user in cursor:
+            batch.append(user["_id"])
+            if len(batch) >= batch_size:
+                count += await self._generate_batch(batch, size)
+                batch = []
+        if batch:
+            count += await self._generate_batch(batch, size)
+        return count
+
+    async def get_stored(self, user_id: str) -> Optional[WorkoutCreate]:
+        """The draft the nightly job stored for a user, if any"""
+        stored = await WorkoutRecommendation.find_one({"user_id": ObjectId(user_id)})
+        return WorkoutCreate.model_validate(stored.workout) if stored else None
+
+    async def _generate_batch(self, user_ids: List[ObjectId], size: int) -> int:
+        generated_at = datetime.utcnow()
+        # A fresh loader per batch keeps memory bounded while still batching lookups
+        drafts = await self.recommend_many(user_ids, size, generated_at, loader=ReferenceLoader())
+        if not drafts:
+            return 0
+        await WorkoutRecommendation.get_motor_collection().bulk_write([
+            UpdateOne(
+                {"user_id": user_id},
+                {"$set": {"split_day_id": day_id, "workout": draft.model_dump(), "generated_at": generated_at}},
+                upsert=True
+            )
+            for user_id, (day_id, draft) in drafts.items()
+        ], ordered=False)
+        return len(drafts)
+
+    @staticmethod
+    def _profile(user: User) -> UserProfile:
+        return user.profile or UserProfile()
+
+    async def _target_days(
+        self,
+        user_ids: List[ObjectId],
+        now: datetime,
+        requested: Dict[ObjectId, ObjectId],
+        loader: ReferenceLoader
+    ) -> Dict[ObjectId, SplitDay]:
+        """The split day each user trains next, if they have an active split"""
+        splits = await WorkoutSplit.find({"user_id": {"$in": user_ids}, "is_active": True}).to_list()
+        day_refs = [ref for split in splits for ref in split.days] + list(requested.values())
+        split_days = await loader.load(SplitDay, day_refs)
+
+        if any(ref not in split_days for ref in requested.values()):
+            raise ValueError("Split day not found")
+        targets = {user_id: split_days[ref] for user_id, ref in requested.items()}
+        weekday = now.isoweekday()
+        for split in splits:
+            if split.user_id not in targets:
+                day = _scheduled_day(split, split_days, weekday)
+                if day is not None:
+                    targets[split.user_id] = day
+        return targets
+
+    async def _day_focus(
+        self,
+        catalog: CatalogMatrix,
+        user_rows: Dict[ObjectId, int],
+        days: Dict[ObjectId, SplitDay],
+        loader: ReferenceLoader
+    ) -> np.ndarray:
+        """Muscle groups trained by each user's target day, from the exercises of its workout.
+
+        Users without a target day, or whose day has no exercises yet, focus
+        on every muscle group equally.
+        """
+        workouts = await loader.load(Workout, (day.workout_id for day in days.values()))
+        children = await loader.children(WorkoutExercise, workouts.values())
+        user_indexes: List[int] = []
+        exercise_indexes: List[int] = []
+        for user_id, day in days.items():
+            workout = workouts.get(day.workout_id)
+            if workout is None:
+                continue
+            entries = embedded_entries(workout)
+            refs = [entry["_id"] for entry in entries] if entries is not None else workout.exercises
+            for ref in refs:
+                child = children.get(ref)
+                if child is not None and child.exercise_id in catalog.rows:
+                    user_indexes.append(user_rows[user_id])
+                    exercise_indexes.append(catalog.rows[child.exercise_id])
+
+        focus = np.zeros((len(user_rows), len(catalog.muscle_groups)), dtype=np.float32)
+        np.add.at(focus, np.array(user_indexes, dtype=np.intp), catalog.muscle_shares[np.array(exercise_indexes, dtype=np.intp)])
+        focus[focus.sum(axis=1) == 0] = 1
+        return focus
+
+    async def _recent_sets(self, catalog: CatalogMatrix, user_rows: Dict[ObjectId, int], now: datetime) -> np.ndarray:
+        """Sets per muscle group each user completed over the last ``RECENT_DAYS`` days"""
+        since = datetime(now.year, now.month, now.day) - timedelta(days=RECENT_DAYS)
+        cursor = UserDailyRollup.get_motor_collection().find(
+            {"user_id": {"$in": list(user_rows)}, "day": {"$gte": since}},
+            projection={"user_id": 1, "muscle_sets": 1}
+        )
+        user_indexes: List[int] = []
+        muscle_indexes: List[int] = []
+        sets: List[float] = []
+        async for rollup in cursor:
+            for muscle_group, count in (rollup.get("muscle_sets") or {}).items():
+                column = catalog.muscle_columns.get(muscle_group)
+                if column is not None:
+                    user_indexes.append(user_rows[rollup["user_id"]])
+                    muscle_indexes.append(column)
+                    sets.append(count)
+
+        recent = np.zeros((len(user_rows), len(catalog.muscle_groups)), dtype=np.float32)
+        np.add.at(recent, (np.array(user_indexes, dtype=np.intp), np.array(muscle_indexes, dtype=np.intp)), sets)
+        return recent
+
+    def _draft(self, catalog: CatalogMatrix, level: str, day_name: Optional[str], rows: Iterable[int]) -> WorkoutCreate:
+        sets, reps, rest_time = PRESCRIPTIONS[level]
+        exercises = [
+            WorkoutExerciseCreate(
+                exercise_id=str(catalog.ids[row]),
+                sets=sets,
+                reps=reps,
+                rest_time=rest_time,
+                order=order
+            )
+            for order, row in enumerate(rows, start=1)
+        ]
+        return WorkoutCreate(
+            name=f"{day_name} (recommended)" if day_name else "Recommended workout",
+            description="Generated from your split, fitness level, equipment and recent training",
+            exercises=exercises,
+            estimated_duration=round(len(exercises) * sets * (SECONDS_PER_SET + rest_time) / 60),
+            difficulty=level,
+            tags=["recommended"]
+        )
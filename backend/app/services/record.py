@@ -0,0 +1,241 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from ..models.record import PersonalRecord
+from ..models.session import WorkoutSession, SessionExercise
+from ..schemas.record import PersonalRecordResponse
+from .loader import ReferenceLoader
+
+# Conditional rewrites of a record retried after a concurrent change before giving up
+RECORD_ATTEMPTS = 5
+
+def estimated_one_rep_max(weight: float, reps: int) -> float:
+    """Epley estimate of the one-rep max for a set"""
+    if reps <= 1:
+        return weight
+    return weight * (1 + reps / 30)
+
+def weight_key(weight: float) -> str:
+    # Weights become field names, so the decimal point is replaced
+    return f"{weight:g}".replace(".", "_")
+
+def record_candidates(actual_sets: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Best values found in the sets one session logged of an exercise"""
+    candidates: Dict[str, Any] = {}
+    volume = 0.0
+    for logged_set in actual_sets:
+        reps = logged_set.get("reps") or 0
+        weight = logged_set.get("weight")
+        if weight is None or reps <= 0:
+            continue
+        volume += reps * weight
+        candidates["best_weight"] = max(candidates.get("best_weight", weight), weight)
+        e1rm = round(estimated_one_rep_max(weight, reps), 2)
+        candidates["best_e1rm"] = max(candidates.get("best_e1rm", e1rm), e1rm)
+        key = f"reps_at_weight.{weight_key(weight)}"
+        candidates[key] = max(candidates.get(key, reps), reps)
+    if volume:
+        candidates["best_session_volume"] = volume
+    return candidates
+
+def _beaten(before: Optional[Mapping[str, Any]], candidates: Mapping[str, Any]) -> List[str]:
+    """Record types the candidates improved compared to the previous document"""
+    before = before or {}
+    improved = []
+    for field, label in (("best_weight", "weight"), ("best_e1rm", "e1rm"), ("best_session_volume", "session_volume")):
+        if field in candidates and candidates[field] > (before.get(field) or 0):
+            improved.append(label)
+    previous_reps = before.get("reps_at_weight") or {}
+    for field, reps in candidates.items():
+        if field.startswith("reps_at_weight.") and reps > previous_reps.get(field.split(".", 1)[1], 0):
+            improved.append("reps_at_weight")
+            break
+    return improved
+
+def _held(record: Mapping[str, Any], field: str) -> float:
+    """Current value of a candidate field in a record document"""
+    if field.startswith("reps_at_weight."):
+        return (record.get("reps_at_weight") or {}).get(field.split(".", 1)[1]) or 0
+    return record.get(field) or 0
+
+def _record_document(key: Dict[str, ObjectId], best: Mapping[str, Any], revision: int) -> Dict[str, Any]:
+    document: Dict[str, Any] = {**key, "reps_at_weight": {}}
+    for field, value in best.items():
+        if field.startswith("reps_at_weight."):
+            document["reps_at_weight"][field.split(".", 1)[1]] = value
+        else:
+            document[field] = value
+    return {**document, "updated_at": datetime.utcnow(), "revision": revision}
+
+def record_to_response(record: Mapping[str, Any]) -> PersonalRecordResponse:
+    return PersonalRecordResponse(
+        user_id=str(record["user_id"]),
+        exercise_id=str(record["exercise_id"]),
+        best_weight=record.get("best_weight"),
+        best_e1rm=record.get("best_e1rm"),
+        best_session_volume=record.get("best_session_volume"),
+        reps_at_weight={key.replace("_", "."): reps for key, reps in (record.get("reps_at_weight") or {}).items()},
+        updated_at=record.get("updated_at")
+    )
+
+class PersonalRecordService:
+    """Maintains one personal-record document per (user, exercise).
+
+    Records are raised with $max in the same request that stores the sets,
+    and the pre-image of that update tells whether a new record was set.
+    An edit that lowers a value a record holds recomputes that record.
+    """
+
+    async def record_sets(
+        self,
+        user_id: ObjectId,
+        exercise_id: ObjectId,
+        actual_sets: Iterable[Mapping[str, Any]]
+    ) -> List[str]:
+        """Fold a session's sets of an exercise into the user's records; returns the record types beaten"""
+        candidates = record_candidates(actual_sets)
+        if not candidates:
+            return []
+        before = await PersonalRecord.get_motor_collection().find_one_and_update(
+            {"user_id": user_id, "exercise_id": exercise_id},
+            {"$max": candidates, "$set": {"updated_at": datetime.utcnow()}, "$inc": {"revision": 1}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        return _beaten(before, candidates)
+
+    async def replace_sets(
+        self,
+        user_id: ObjectId,
+        exercise_id: ObjectId,
+        old_sets: Iterable[Mapping[str, Any]],
+        new_sets: Iterable[Mapping[str, Any]]
+    ) -> List[str]:
+        """Apply an edit of a session's sets of an exercise; returns the record types beaten.
+
+        When the edit lowers a value the record holds (the record may have
+        come from the old sets), the record is recomputed from the user's
+        history; otherwise the new sets are folded in with $max.
+        """
+        old = record_candidates(old_sets)
+        new = record_candidates(new_sets)
+        lowered = [field for field, value in old.items() if new.get(field, 0) < value]
+        if lowered:
+            record = await PersonalRecord.get_motor_collection().find_one(
+                {"user_id": user_id, "exercise_id": exercise_id}
+            )
+            if record and any(_held(record, field) <= old[field] for field in lowered):
+                await self.recompute(user_id, exercise_id)
+                return _beaten(record, new)
+        return await self.record_sets(user_id, exercise_id, new_sets)
+
+    async def recompute(self, user_id: ObjectId, exercise_id: ObjectId, batch_size: int = 500) -> None:
+        """Rewrite one (user, exercise) record from all of the user's logged sets.
+
+        The write is conditional on the revision read before the scan, so a
+        record raised meanwhile makes it scan again instead of being undone.
+        """
+        records = PersonalRecord.get_motor_collection()
+        key = {"user_id": user_id, "exercise_id": exercise_id}
+        for _ in range(RECORD_ATTEMPTS):
+            record = await records.find_one(key, projection={"revision": 1})
+            revision = record.get("revision", 0) if record else 0
+            # Records written before revisions existed have none
+            expected = {"revision": record["revision"]} if record and "revision" in record else {"revision": {"$exists": False}}
+            best = (await self._scan(user_id, exercise_id, batch_size)).get(exercise_id)
+            if not best:
+                if record is None or (await records.delete_one({**key, **expected})).deleted_count:
+                    return
+                continue
+            try:
+                await records.replace_one({**key, **expected}, _record_document(key, best, revision + 1), upsert=True)
+            except DuplicateKeyError:
+                # Changed (or created) since it was read
+                continue
+            return
+        raise RuntimeError("Could not recompute the record: concurrent changes kept conflicting")
+
+    async def get_user_records(self, user_id: str) -> List[PersonalRecordResponse]:
+        cursor = PersonalRecord.get_motor_collection().find({"user_id": ObjectId(user_id)})
+        return [record_to_response(record) async for record in cursor]
+
+    async def get_record(self, user_id: str, exercise_id: str) -> Optional[PersonalRecordResponse]:
+        record = await PersonalRecord.get_motor_collection().find_one(
+            {"user_id": ObjectId(user_id), "exercise_id": ObjectId(exercise_id)}
+        )
+        return record_to_response(record) if record else None
+
+    async def rebuild(self, user_id: Optional[str] = None, batch_size: int = 500) -> int:
+        """Recompute records from every logged, non-skipped session exercise.
+
+        Works one user at a time so memory is bounded by a single user's
+        exercise count; returns the number of records written.
+        """
+        sessions = WorkoutSession.get_motor_collection()
+        user_ids = [ObjectId(user_id)] if user_id else await sessions.distinct("user_id")
+        written = 0
+        for owner in user_ids:
+            best = await self._scan(owner, batch_size=batch_size)
+            records = PersonalRecord.get_motor_collection()
+            await records.delete_many({"user_id": owner})
+            if best:
+                now = datetime.utcnow()
+                await records.bulk_write([
+                    UpdateOne(
+                        {"user_id": owner, "exercise_id": exercise_id},
+                        {"$max": candidates, "$set": {"updated_at": now}, "$inc": {"revision": 1}},
+                        upsert=True
+                    )
+                    for exercise_id, candidates in best.items()
+                ], ordered=False)
+                written += len(best)
+        return written
+
+    async def _scan(
+        self,
+        owner: ObjectId,
+        exercise_id: Optional[ObjectId] = None,
+        batch_size: int = 500
+    ) -> Dict[ObjectId, Dict[str, Any]]:
+        """Best values of the user's sessions per exercise (only ``exercise_id`` if given)"""
+        best: Dict[ObjectId, Dict[str, Any]] = {}
+        cursor = WorkoutSession.get_motor_collection().find(
+            {"user_id": owner}, projection={"exercises": 1, "embedded_exercises": 1}, batch_size=batch_size
+        )
+        batch: List[Dict[str, Any]] = []
+        async for session in cursor:
+            batch.append(session)
+            if len(batch) >= batch_size:
+                await self._fold(batch, best, exercise_id)
+                batch = []
+        if batch:
+            await self._fold(batch, best, exercise_id)
+        return best
+
+    async def _fold(
+        self,
+        sessions: List[Dict[str, Any]],
+        best: Dict[ObjectId, Dict[str, Any]],
+        exercise_id: Optional[ObjectId] = None
+    ) -> None:
+        session_exercises = await ReferenceLoader().children(SessionExercise, sessions)
+        for session in sessions:
+            # Entries of the same exercise count together towards the session volume
+            logged: Dict[ObjectId, List[Dict[str, Any]]] = {}
+            for ref in session.get("exercises") or []:
+                session_exercise = session_exercises.get(ref)
+                if session_exercise is None or session_exercise.skipped:
+                    continue
+                if exercise_id is not None and session_exercise.exercise_id != exercise_id:
+                    continue
+                logged.setdefault(session_exercise.exercise_id, []).extend(session_exercise.actual_sets)
+            for logged_exercise, actual_sets in logged.items():
+                candidates = record_candidates(actual_sets)
+                if not candidates:
+                    continue
+                current = best.setdefault(logged_exercise, {})
+                for field, value in candidates.items():
+                    current[field] = max(current.get(field, value), value)
@@ -0,0 +1,309 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from ..models.exercise import Exercise
+from ..models.rollup import UserDailyRollup
+from ..models.session import WorkoutSession, SessionExercise
+from ..schemas.rollup import TrainingRollupResponse
+from .loader import ReferenceLoader
+from .session_metrics import exercise_metrics
+
+ROLLUP_PERIODS = ("day", "week", "month")
+MAX_ROLLUP_DAYS = 731
+# Conditional bucket writes retried after a concurrent change before giving up
+ROLLUP_ATTEMPTS = 5
+SESSION_PROJECTION = {"user_id": 1, "started_at": 1, "exercises": 1, "embedded_exercises": 1}
+
+def _day_bucket(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+def _bucket_filter(session: Dict[str, Any]) -> Dict[str, Any]:
+    return {"user_id": session["user_id"], "day": _day_bucket(session["started_at"])}
+
+def _revision_filter(bucket: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # Buckets written before revisions existed have none
+    if bucket is None or "revision" not in bucket:
+        return {"revision": {"$exists": False}}
+    return {"revision": bucket["revision"]}
+
+def _nested(increments: Dict[str, float]) -> Dict[str, Any]:
+    """{"muscle_volume.chest": 1} -> {"muscle_volume": {"chest": 1}}"""
+    nested: Dict[str, Any] = {}
+    for key, value in increments.items():
+        group, _, field = key.partition(".")
+        if field:
+            nested.setdefault(group, {})[field] = value
+        else:
+            nested[key] = value
+    return nested
+
+def _flat(nested: Dict[str, Any]) -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for key, value in nested.items():
+        if isinstance(value, dict):
+            flat.update({f"{key}.{field}": amount for field, amount in value.items()})
+        else:
+            flat[key] = value
+    return flat
+
+def _bucket_document(key: Tuple[ObjectId, datetime], shares: Dict[str, Dict[str, Any]], revision: int) -> Dict[str, Any]:
+    """A whole daily bucket: the sum of its sessions' shares, and the shares"""
+    totals: Dict[str, float] = {}
+    for share in shares.values():
+        for field, amount in _flat(share).items():
+            totals[field] = totals.get(field, 0) + amount
+    return {
+        "user_id": key[0],
+        "day": key[1],
+        "sessions": 0, "total_volume": 0, "total_reps": 0, "total_sets": 0,
+        "muscle_volume": {}, "muscle_sets": {},
+        **_nested(totals),
+        "contributions": shares,
+        "revision": revision,
+    }
+
+def _period_start(day: date, period: str) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+def _muscle_key(muscle_group: str) -> str:
+    # Muscle groups become field names inside the rollup document
+    return muscle_group.replace(".", "_").replace("$", "_")
+
+class RollupService:
+    """Maintains and serves per-user daily training rollups.
+
+    Each completed session is counted in the bucket of the day it started,
+    so weekly and monthly views only sum a bounded number of daily documents
+    regardless of how long the account has existed. A bucket also keeps the
+    share of every session in it, so edits made after completion replace
+    that session's share instead of being lost or counted twice.
+    """
+
+    def __init__(self, loader: Optional[ReferenceLoader] = None):
+        self.loader = loader or ReferenceLoader()
+
+    async def session_increments(
+        self,
+        session: Dict[str, Any],
+        loader: Optional[ReferenceLoader] = None
+    ) -> Dict[str, float]:
+        """Totals a completed session adds to its day, split by muscle group.
+
+        The full volume and set count of an exercise is credited to every
+        muscle group it trains.
+        """
+        loader = loader or self.loader
+        session_exercises = await loader.children(SessionExercise, [session])
+        exercises = await loader.load(
+            Exercise, (session_exercise.exercise_id for session_exercise in session_exercises.values())
+        )
+        increments: Dict[str, float] = {"sessions": 1, "total_volume": 0, "total_reps": 0, "total_sets": 0}
+        for session_exercise in session_exercises.values():
+            metrics = exercise_metrics(session_exercise.model_dump())
+            increments["total_volume"] += metrics["total_volume"]
+            increments["total_reps"] += metrics["total_reps"]
+            increments["total_sets"] += metrics["total_sets"]
+            exercise = exercises.get(session_exercise.exercise_id)
+            if not exercise or not metrics["total_sets"]:
+                continue
+            for muscle_group in exercise.muscle_groups:
+                key = _muscle_key(muscle_group)
+                increments[f"muscle_volume.{key}"] = increments.get(f"muscle_volume.{key}", 0) + metrics["total_volume"]
+                increments[f"muscle_sets.{key}"] = increments.get(f"muscle_sets.{key}", 0) + metrics["total_sets"]
+        return increments
+
+    async def sync_session(self, session_id: ObjectId) -> bool:
+        """Bring a completed session's share of its daily bucket up to date.
+
+        Called on completion and after every later change to the session's
+        exercises. The bucket is changed by the difference between the
+        session's totals now and its stored share, conditional on the bucket
+        revision read before the exercises; a concurrent change to the bucket
+        makes it read both again. Returns False if the session is not completed.
+        """
+        sessions = WorkoutSession.get_motor_collection()
+        rollups = UserDailyRollup.get_motor_collection()
+        share_field = f"contributions.{session_id}"
+        session = await sessions.find_one({"_id": session_id, "status": "completed"}, projection={"user_id": 1, "started_at": 1})
+        if not session:
+            return False
+        for _ in range(ROLLUP_ATTEMPTS):
+            bucket = await rollups.find_one(_bucket_filter(session), projection={"revision": 1, share_field: 1})
+            # Fresh reads on every attempt, after the revision: a retry has to see the change that caused it
+            session = await sessions.find_one({"_id": session_id}, projection=SESSION_PROJECTION)
+            increments = await self.session_increments(session, ReferenceLoader())
+            share = _flat(((bucket or {}).get("contributions") or {}).get(str(session_id)) or {})
+            changes = {
+                field: increments.get(field, 0) - share.get(field, 0)
+                for field in increments.keys() | share.keys()
+            }
+            try:
+                await rollups.update_one(
+                    {**_bucket_filter(session), **_revision_filter(bucket)},
+                    {
+                        "$set": {share_field: _nested(increments)},
+                        "$inc": {**{field: amount for field, amount in changes.items() if amount}, "revision": 1}
+                    },
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                # The bucket changed (or was created) since it was read
+                continue
+            return True
+        raise RuntimeError("Could not update the rollup: concurrent changes kept conflicting")
+
+    async def backfill(self, user_id: Optional[str] = None, batch_size: int = 500) -> int:
+        """Rebuild the rollups of one user (or everyone) from completed sessions.
+
+        Buckets are rewritten in place, conditional on their revision like
+        ``sync_session``, so completions and edits landing meanwhile are
+        neither lost nor counted twice; a bucket that changed is rebuilt
+        again on its own. Buckets no completed session contributed to (only
+        possible from before buckets kept their shares) are removed.
+        """
+        scope = {"user_id": ObjectId(user_id)} if user_id else {}
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        cursor = WorkoutSession.get_motor_collection().find(
+            {**scope, "status": "completed"},
+            projection={"user_id": 1, "started_at": 1},
+            batch_size=batch_size
+        ).sort([("user_id", ASCENDING), ("started_at", DESCENDING)])
+        async for session in cursor:
+            # Batches end between days, so every bucket is rebuilt from all of its sessions at once
+            if len(batch) >= batch_size and _bucket_filter(session) != _bucket_filter(batch[-1]):
+                count += await self._backfill_batch(batch)
+                batch = []
+            batch.append(session)
+        if batch:
+            count += await self._backfill_batch(batch)
+        await UserDailyRollup.get_motor_collection().delete_many({**scope, "contributions": {"$exists": False}})
+        return count
+
+    async def _backfill_batch(self, sessions: List[Dict[str, Any]]) -> int:
+        rollups = UserDailyRollup.get_motor_collection()
+        # Revisions are read before the sessions and their exercises, as in sync_session
+        existing = {
+            (bucket["user_id"], bucket["day"]): bucket
+            async for bucket in rollups.find(
+                {
+                    "user_id": {"$in": list({session["user_id"] for session in sessions})},
+                    "day": {"$in": list({_day_bucket(session["started_at"]) for session in sessions})},
+                },
+                projection={"user_id": 1, "day": 1, "revision": 1}
+            )
+        }
+        # Read again, with the sessions completed on these days since the cursor passed them
+        days: Dict[ObjectId, List[datetime]] = {}
+        for session in sessions:
+            days.setdefault(session["user_id"], []).append(_day_bucket(session["started_at"]))
+        sessions = await WorkoutSession.get_motor_collection().find(
+            {"status": "completed", "$or": [
+                {"user_id": user_id, "started_at": {"$gte": min(user_days), "$lt": max(user_days) + timedelta(days=1)}}
+                for user_id, user_days in days.items()
+            ]},
+            projection=SESSION_PROJECTION
+        ).to_list(length=None)
+        shares = await self._shares(sessions)
+
+        keys = list(shares)
+        operations = []
+        for key in keys:
+            bucket = existing.get(key)
+            operations.append(ReplaceOne(
+                {"user_id": key[0], "day": key[1], **_revision_filter(bucket)},
+                _bucket_document(key, shares[key], (bucket or {}).get("revision", 0) + 1),
+                upsert=True
+            ))
+        try:
+            await rollups.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") != 11000:
+                    raise
+                await self._rebuild_day(*keys[error["index"]])
+        return len(sessions)
+
+    async def _rebuild_day(self, user_id: ObjectId, day: datetime) -> None:
+        """Rewrite one bucket from its completed sessions"""
+        rollups = UserDailyRollup.get_motor_collection()
+        for _ in range(ROLLUP_ATTEMPTS):
+            bucket = await rollups.find_one({"user_id": user_id, "day": day}, projection={"revision": 1})
+            sessions = await WorkoutSession.get_motor_collection().find(
+                {"user_id": user_id, "started_at": {"$gte": day, "$lt": day + timedelta(days=1)}, "status": "completed"},
+                projection=SESSION_PROJECTION
+            ).to_list(length=None)
+            shares = (await self._shares(sessions)).get((user_id, day), {})
+            try:
+                await rollups.replace_one(
+                    {"user_id": user_id, "day": day, **_revision_filter(bucket)},
+                    _bucket_document((user_id, day), shares, (bucket or {}).get("revision", 0) + 1),
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                continue
+            return
+        raise RuntimeError("Could not rebuild the rollup: concurrent changes kept conflicting")
+
+    async def _shares(self, sessions: List[Dict[str, Any]]) -> Dict[Tuple[ObjectId, datetime], Dict[str, Dict[str, Any]]]:
+        """Each session's share, grouped by bucket"""
+        # A fresh loader per batch keeps memory bounded while still batching lookups
+        loader = ReferenceLoader()
+        session_exercises = await loader.children(SessionExercise, sessions)
+        await loader.load(Exercise, (session_exercise.exercise_id for session_exercise in session_exercises.values()))
+        shares: Dict[Tuple[ObjectId, datetime], Dict[str, Dict[str, Any]]] = {}
+        for session in sessions:
+            key = (session["user_id"], _day_bucket(session["started_at"]))
+            shares.setdefault(key, {})[str(session["_id"])] = _nested(await self.session_increments(session, loader))
+        return shares
+
+    async def get_rollups(
+        self,
+        user_id: str,
+        period: str = "week",
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> List[TrainingRollupResponse]:
+        """Sum daily buckets into day, week or month totals for [start, end]"""
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"period must be one of {ROLLUP_PERIODS}")
+        end = end or datetime.utcnow().date()
+        start = start or _period_start(end - timedelta(weeks=11), period)
+        if start > end:
+            raise ValueError("start must not be after end")
+        if (end - start).days > MAX_ROLLUP_DAYS:
+            raise ValueError(f"Date range cannot exceed {MAX_ROLLUP_DAYS} days")
+
+        cursor = UserDailyRollup.get_motor_collection().find(
+            {
+                "user_id": ObjectId(user_id),
+                "day": {
+                    "$gte": datetime.combine(start, datetime.min.time()),
+                    "$lte": datetime.combine(end, datetime.min.time()),
+                },
+            },
+            projection={"contributions": 0}
+        ).sort("day", ASCENDING)
+
+        buckets: Dict[date, TrainingRollupResponse] = {}
+        async for daily in cursor:
+            period_start = _period_start(daily["day"].date(), period)
+            bucket = buckets.get(period_start)
+            if bucket is None:
+                bucket = buckets[period_start] = TrainingRollupResponse(period=period, period_start=period_start)
+            bucket.sessions += daily.get("sessions", 0)
+            bucket.total_volume += daily.get("total_volume", 0)
+            bucket.total_reps += daily.get("total_reps", 0)
+            bucket.total_sets += daily.get("total_sets", 0)
+            for muscle_group, volume in daily.get("muscle_volume", {}).items():
+                bucket.muscle_volume[muscle_group] = bucket.muscle_volume.get(muscle_group, 0) + volume
+            for muscle_group, sets in daily.get("muscle_sets", {}).items():
+                bucket.muscle_sets[muscle_group] = bucket.muscle_sets.get(muscle_group, 0) + sets
+        return list(buckets.values())
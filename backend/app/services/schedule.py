@@ -0,0 +1,191 @@
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta
+from beanie.odm.utils.encoder import Encoder
+from bson import ObjectId
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from ..models.schedule import ScheduledDay, ScheduledExercise, ScheduledWorkout, UserSchedule
+from ..models.split import WorkoutSplit, SplitDay
+from ..models.workout import Workout, WorkoutExercise
+from ..schemas.schedule import ScheduleDayResponse, ScheduleResponse, ScheduledWorkoutResponse
+from .loader import ReferenceLoader, embedded_entries
+
+MAX_SCHEDULE_DAYS = 62
+
+def _monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+def schedule_day(schedule: UserSchedule, day: date) -> ScheduleDayResponse:
+    """What ``schedule`` plans for ``day``; days outside the split or without a split day are rest days"""
+    starts_on = schedule.starts_on.date()
+    week = (day - _monday(starts_on)).days // 7 + 1
+    if day < starts_on or (schedule.weeks_duration and week > schedule.weeks_duration):
+        return ScheduleDayResponse(date=day)
+
+    scheduled = next((entry for entry in schedule.days if entry.day_number == day.isoweekday()), None)
+    if scheduled is None:
+        return ScheduleDayResponse(date=day, week=week)
+    return ScheduleDayResponse(
+        date=day,
+        week=week,
+        split_day_id=str(scheduled.split_day_id),
+        day_name=scheduled.day_name,
+        rest_day=scheduled.rest_day,
+        workout=ScheduledWorkoutResponse(**scheduled.workout.model_dump(mode="json")) if scheduled.workout else None
+    )
+
+def _stored(schedule: UserSchedule) -> Dict[str, Any]:
+    """The schedule as written to MongoDB, with ObjectIds kept intact"""
+    document = Encoder(to_db=True).encode(schedule)
+    document.pop("_id", None)
+    document.pop("revision_id", None)
+    return document
+
+class ScheduleService:
+    """Maintains and serves the materialized schedule of each user's active split.
+
+    Reading a day of a split otherwise takes the active split, its days,
+    their workouts, the workout exercises and the exercise names: one
+    dependent query each. ``refresh`` resolves all of them once, when the
+    active split or its days change, into one ``UserSchedule`` document.
+    """
+
+    async def get_schedule(self, user_id: str, start: date, days: int = 7) -> Optional[ScheduleResponse]:
+        """The user's plan for ``days`` days from ``start``, or None without an active split"""
+        if not 1 <= days <= MAX_SCHEDULE_DAYS:
+            raise ValueError(f"days must be between 1 and {MAX_SCHEDULE_DAYS}")
+        schedule = await self._current(ObjectId(user_id))
+        if schedule is None:
+            return None
+
+        ends_on = None
+        if schedule.weeks_duration:
+            ends_on = _monday(schedule.starts_on.date()) + timedelta(weeks=schedule.weeks_duration, days=-1)
+        return ScheduleResponse(
+            user_id=str(schedule.user_id),
+            split_id=str(schedule.split_id),
+            split_name=schedule.split_name,
+            split_type=schedule.split_type,
+            starts_on=schedule.starts_on.date(),
+            ends_on=ends_on,
+            days=[schedule_day(schedule, start + timedelta(days=offset)) for offset in range(days)]
+        )
+
+    async def get_day(self, user_id: str, day: date) -> Optional[ScheduleDayResponse]:
+        schedule = await self._current(ObjectId(user_id))
+        return schedule_day(schedule, day) if schedule else None
+
+    async def _current(self, user_id: ObjectId) -> Optional[UserSchedule]:
+        # A schedule that was never materialized (e.g. a refresh after a split change failed) is built on read
+        schedule = await UserSchedule.find_one({"user_id": user_id})
+        if schedule is None:
+            return await self.refresh(user_id)
+        return schedule if schedule.split_id is not None else None
+
+    async def refresh(self, user_id: ObjectId) -> Optional[UserSchedule]:
+        """Rematerialize one user's schedule from their active split; None (recorded as such) if there is none"""
+        # Taken before reading, so a refresh that read older data cannot overwrite a newer one
+        computed_at = datetime.utcnow()
+        split = await WorkoutSplit.find_one({"user_id": user_id, "is_active": True})
+        if split is None:
+            schedule = UserSchedule(user_id=user_id, computed_at=computed_at)
+        else:
+            schedule = (await self._materialize([split], computed_at, ReferenceLoader()))[0]
+        try:
+            await UserSchedule.get_motor_collection().replace_one(
+                {"user_id": user_id, "computed_at": {"$lte": computed_at}}, _stored(schedule), upsert=True
+            )
+        except DuplicateKeyError:
+            # A refresh that read the sources later already wrote its schedule
+            pass
+        return schedule if split is not None else None
+
+    async def rebuild(self, user_id: Optional[str] = None, batch_size: int = 500) -> int:
+        """Rematerialize the schedules of one user (or everyone) and drop those without an active split"""
+        scope = {"user_id": ObjectId(user_id)} if user_id else {}
+        started = datetime.utcnow()
+        count = 0
+        batch: List[WorkoutSplit] = []
+        async for split in WorkoutSplit.find({**scope, "is_active": True}):
+            batch.append(split)
+            if len(batch) >= batch_size:
+                count += await self._rebuild_batch(batch, started)
+                batch = []
+        if batch:
+            count += await self._rebuild_batch(batch, started)
+        await UserSchedule.get_motor_collection().delete_many({**scope, "computed_at": {"$lt": started}})
+        return count
+
+    async def _rebuild_batch(self, splits: List[WorkoutSplit], computed_at: datetime) -> int:
+        # A fresh loader per batch keeps memory bounded while still batching lookups
+        schedules = await self._materialize(splits, computed_at, ReferenceLoader())
+        try:
+            await UserSchedule.get_motor_collection().bulk_write([
+                ReplaceOne(
+                    {"user_id": schedule.user_id, "computed_at": {"$lte": computed_at}},
+                    _stored(schedule),
+                    upsert=True
+                )
+                for schedule in schedules
+            ], ordered=False)
+        except BulkWriteError as e:
+            # Duplicate keys are schedules refreshed since the rebuild started; anything else is an error
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        return len(schedules)
+
+    async def _materialize(
+        self,
+        splits: List[WorkoutSplit],
+        computed_at: datetime,
+        loader: ReferenceLoader
+    ) -> List[UserSchedule]:
+        """Resolve the days, workouts, exercises and exercise names of ``splits`` with one query per collection"""
+        split_days = await loader.load(SplitDay, (ref for split in splits for ref in split.days))
+        workouts = await loader.load(Workout, (day.workout_id for day in split_days.values()))
+        children = await loader.children(WorkoutExercise, workouts.values())
+        names = await loader.exercise_names(child.exercise_id for child in children.values())
+
+        scheduled_workouts: Dict[ObjectId, ScheduledWorkout] = {}
+        for workout_id, workout in workouts.items():
+            entries = embedded_entries(workout)
+            refs = [entry["_id"] for entry in entries] if entries is not None else workout.exercises
+            exercises = [
+                ScheduledExercise(
+                    exercise_name=names.get(children[ref].exercise_id),
+                    **children[ref].model_dump(exclude={"id", "revision_id"})
+                )
+                for ref in refs if ref in children
+            ]
+            scheduled_workouts[workout_id] = ScheduledWorkout(
+                workout_id=workout_id,
+                name=workout.name,
+                estimated_duration=workout.estimated_duration,
+                difficulty=workout.difficulty,
+                exercises=sorted(exercises, key=lambda exercise: exercise.order)
+            )
+
+        return [
+            UserSchedule(
+                user_id=split.user_id,
+                split_id=split.id,
+                split_name=split.name,
+                split_type=split.split_type,
+                # Splits activated before activated_at was recorded start when they were created
+                starts_on=split.activated_at or split.created_at,
+                weeks_duration=split.weeks_duration,
+                days=[
+                    ScheduledDay(
+                        split_day_id=split_days[ref].id,
+                        day_number=split_days[ref].day_number,
+                        day_name=split_days[ref].day_name,
+                        rest_day=split_days[ref].rest_day,
+                        workout=scheduled_workouts.get(split_days[ref].workout_id)
+                    )
+                    for ref in split.days if ref in split_days
+                ],
+                computed_at=computed_at
+            )
+            for split in splits
+        ]
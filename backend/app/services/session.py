@@ -0,0 +1,457 @@
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+from datetime import datetime
+from bson import ObjectId
+from pymongo import DESCENDING, ReturnDocument
+
+from ..core.config import settings
+from ..models.session import WorkoutSession, SessionExercise
+from ..models.split import WorkoutSplit
+from ..models.workout import Workout
+from ..schemas.pagination import Page
+from ..schemas.session import (
+    WorkoutSessionCreate, WorkoutSessionResponse, WorkoutSessionSummaryResponse,
+    SessionExerciseCreate, SessionExerciseUpdate, SessionExerciseResponse
+)
+from ..utils.pagination import apply_cursor, encode_cursor
+from ..utils.projection import selectable_fields, view_model
+from .loader import ReferenceLoader, aggregate_with_children, embedded_entries
+from .record import PersonalRecordService
+from .rollup import RollupService
+from .session_metrics import SessionMetricsAggregator, exercise_metrics
+from .set_history import SetHistoryService, logged_sets, stamp_sets
+from .storage import embedded_entry, new_embedded_exercises
+
+# Newest sessions first; _id breaks ties between sessions started together
+SESSION_SORT = [("started_at", DESCENDING), ("_id", DESCENDING)]
+SESSION_FIELDS = selectable_fields(WorkoutSession) - {"embedded_exercises"}
+# A storage migration can move a session's exercises between reading its layout and
+# writing them; the write is then repeated in the new layout
+LAYOUT_ATTEMPTS = 3
+# What writes to a session's exercises read from the session; enough to find its other entries of an exercise
+WRITE_PROJECTION = {
+    "user_id": 1, "exercises": 1,
+    "embedded_exercises._id": 1, "embedded_exercises.exercise_id": 1,
+    "embedded_exercises.actual_sets": 1, "embedded_exercises.skipped": 1,
+}
+
+def session_exercise_to_response(
+    session_exercise: SessionExercise,
+    exercise_names: Optional[Dict[ObjectId, str]] = None
+) -> SessionExerciseResponse:
+    return SessionExerciseResponse(
+        id=str(session_exercise.id),
+        exercise_name=(exercise_names or {}).get(session_exercise.exercise_id),
+        **session_exercise.model_dump(mode="json", exclude={"id"})
+    )
+
+def session_to_response(
+    session: WorkoutSession,
+    exercises: Dict[ObjectId, SessionExerciseResponse]
+) -> WorkoutSessionResponse:
+    return WorkoutSessionResponse(
+        id=str(session.id),
+        exercises=[exercises[ref] for ref in session.exercises if ref in exercises],
+        **session.model_dump(mode="json", exclude={"id", "exercises", "embedded_exercises"})
+    )
+
+class SessionService:
+    """Service layer for workout session operations"""
+
+    def __init__(self, loader: Optional[ReferenceLoader] = None):
+        self.loader = loader or ReferenceLoader()
+        self.metrics = SessionMetricsAggregator()
+        self.records = PersonalRecordService()
+        self.set_history = SetHistoryService()
+        self.rollups = RollupService(self.loader)
+
+    async def create_session(self, user_id: str, session_data: WorkoutSessionCreate) -> Optional[WorkoutSessionResponse]:
+        """Start a session of one of the user's workouts; None if the workout is missing or not theirs.
+
+        Raises ValueError when the given split is missing or not theirs.
+        """
+        workout = await Workout.get(ObjectId(session_data.workout_id))
+        if not workout or workout.user_id != ObjectId(user_id):
+            return None
+        split_id = None
+        if session_data.split_id:
+            split = await WorkoutSplit.get_motor_collection().find_one(
+                {"_id": ObjectId(session_data.split_id)}, projection={"user_id": 1}
+            )
+            if not split or split["user_id"] != ObjectId(user_id):
+                raise ValueError("Split not found")
+            split_id = split["_id"]
+
+        session = WorkoutSession(
+            workout_id=workout.id,
+            user_id=ObjectId(user_id),
+            split_id=split_id,
+            session_name=session_data.session_name or workout.name,
+            planned_exercises=len(workout.exercises),
+            embedded_exercises=new_embedded_exercises(settings.session_exercise_storage)
+        )
+        await session.insert()
+        for exercise_data in session_data.exercises:
+            await self.add_session_exercise(str(session.id), exercise_data)
+        return await self.get_session(str(session.id))
+
+    async def add_session_exercise(
+        self,
+        session_id: str,
+        exercise_data: SessionExerciseCreate
+    ) -> Optional[SessionExerciseResponse]:
+        """Log an exercise in a session and fold it into the session totals"""
+        session_oid = ObjectId(session_id)
+        sessions = WorkoutSession.get_motor_collection()
+        session = await sessions.find_one({"_id": session_oid}, projection=WRITE_PROJECTION)
+        if not session:
+            return None
+
+        session_exercise = SessionExercise(
+            exercise_id=ObjectId(exercise_data.exercise_id),
+            workout_exercise_id=ObjectId(exercise_data.workout_exercise_id),
+            sets_completed=exercise_data.sets_completed,
+            actual_sets=stamp_sets(exercise_data.actual_sets, datetime.utcnow()),
+            notes=exercise_data.notes,
+            skipped=exercise_data.skipped
+        )
+        if exercise_metrics(session_exercise.model_dump())["completed_exercises"]:
+            session_exercise.completed_at = datetime.utcnow()
+        session_exercise.id = ObjectId()
+        for _ in range(LAYOUT_ATTEMPTS):
+            if embedded_entries(session) is None:
+                await session_exercise.insert()
+                embed = None
+            else:
+                embed = embedded_entry(session_exercise)
+            if await self.metrics.apply(
+                session_oid, None, session_exercise.model_dump(), append_exercise=session_exercise.id, embed=embed
+            ):
+                break
+            # A storage migration switched the session's layout after it was read
+            if embed is None:
+                await session_exercise.delete()
+            session = await sessions.find_one({"_id": session_oid}, projection=WRITE_PROJECTION)
+        else:
+            raise RuntimeError("Could not add the exercise: the session kept changing storage layout")
+        await self.set_history.apply(session, None, embed or embedded_entry(session_exercise))
+        await self.rollups.sync_session(session_oid)
+        response = session_exercise_to_response(session_exercise)
+        if not session_exercise.skipped:
+            other_sets = await self._other_sets(session, session_exercise.exercise_id, session_exercise.id)
+            response.new_records = await self.records.record_sets(
+                session["user_id"], session_exercise.exercise_id, other_sets + session_exercise.actual_sets
+            )
+        return response
+
+    async def update_session_exercise(
+        self,
+        session_id: str,
+        session_exercise_id: str,
+        exercise_data: SessionExerciseUpdate
+    ) -> Optional[SessionExerciseResponse]:
+        """Edit logged sets of an exercise and apply the change to the session totals"""
+        changes = exercise_data.dict(exclude_unset=True)
+        if "actual_sets" in changes or "sets_completed" in changes:
+            changes["completed_at"] = datetime.utcnow()
+        if changes.get("actual_sets") is not None:
+            # Sets sent back with their logged_at keep it; new ones were logged now
+            changes["actual_sets"] = stamp_sets(changes["actual_sets"], changes["completed_at"])
+        return await self._change_session_exercise(session_id, session_exercise_id, changes)
+
+    async def skip_session_exercise(self, session_id: str, session_exercise_id: str) -> Optional[SessionExerciseResponse]:
+        """Mark an exercise as skipped; its sets stop counting towards the totals"""
+        return await self._change_session_exercise(session_id, session_exercise_id, {"skipped": True})
+
+    async def get_session_summary(self, session_id: str) -> Optional[WorkoutSessionSummaryResponse]:
+        """Session totals, read from the session document alone"""
+        session = await WorkoutSession.get_motor_collection().find_one(
+            {"_id": ObjectId(session_id)}, projection={"exercises": 0, "embedded_exercises": 0}
+        )
+        if not session:
+            return None
+        return WorkoutSessionSummaryResponse(
+            id=str(session["_id"]),
+            workout_id=str(session["workout_id"]),
+            user_id=str(session["user_id"]),
+            **{key: value for key, value in session.items() if key not in ("_id", "workout_id", "user_id")}
+        )
+
+    async def complete_session(self, session_id: str) -> Optional[WorkoutSessionSummaryResponse]:
+        """Mark a session completed and add it to the user's training rollups.
+
+        The status transition is atomic and the rollup keeps one share per
+        session, so a session is counted once even if completion is
+        requested repeatedly.
+        """
+        now = datetime.utcnow()
+        sessions = WorkoutSession.get_motor_collection()
+        session = await sessions.find_one_and_update(
+            {"_id": ObjectId(session_id), "status": {"$ne": "completed"}},
+            {"$set": {"status": "completed", "completed_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if session:
+            duration = int((now - session["started_at"]).total_seconds() // 60)
+            await sessions.update_one({"_id": session["_id"]}, {"$set": {"duration": duration}})
+            await self.rollups.sync_session(session["_id"])
+        return await self.get_session_summary(session_id)
+
+    async def reconcile_session(self, session_id: str) -> Optional[WorkoutSessionSummaryResponse]:
+        """Rebuild the session totals from its exercises"""
+        if not await self.metrics.reconcile(ObjectId(session_id)):
+            return None
+        return await self.get_session_summary(session_id)
+
+    async def append_sets(
+        self,
+        session_id: str,
+        session_exercise_id: str,
+        sets: List[Dict[str, Any]],
+        only_in_progress: bool = False
+    ) -> Optional[SessionExerciseResponse]:
+        """Append logged sets to an exercise with one write.
+
+        Every set carries its ``seq`` and is stamped with the time of the
+        write. A replayed set whose seq is already stored is dropped again
+        right after the write, so replays change nothing. With
+        ``only_in_progress``, returns None without writing once the session
+        is no longer in progress.
+        """
+        now = datetime.utcnow()
+        unique: Dict[int, Dict[str, Any]] = {}
+        for logged_set in sets:
+            unique.setdefault(logged_set["seq"], logged_set)
+        stamped = stamp_sets(unique.values(), now)
+        changed = await self._update_session_exercise(
+            session_id, session_exercise_id,
+            {"$push": {"actual_sets": {"$each": stamped}}, "$set": {"completed_at": now}},
+            only_in_progress=only_in_progress
+        )
+        if changed is None:
+            return None
+        session, before = changed
+
+        stored = list(before.get("actual_sets") or [])
+        stored_seqs = {logged_set.get("seq") for logged_set in stored}
+        replayed = [logged_set["seq"] for logged_set in stamped if logged_set["seq"] in stored_seqs]
+        if replayed:
+            # Only this write's copies carry its timestamp
+            await self._update_session_exercise(
+                session_id, session_exercise_id,
+                {"$pull": {"actual_sets": {"seq": {"$in": replayed}, "logged_at": now}}}
+            )
+        added = [logged_set for logged_set in stamped if logged_set["seq"] not in stored_seqs]
+        stored.extend(added)
+        after = {**before, "actual_sets": stored, "completed_at": now}
+        if (after.get("sets_completed") or 0) < len(stored):
+            after["sets_completed"] = len(stored)
+            await self._update_session_exercise(
+                session_id, session_exercise_id, {"$max": {"sets_completed": len(stored)}}
+            )
+        return await self._applied(session, before, after)
+
+    async def _change_session_exercise(
+        self,
+        session_id: str,
+        session_exercise_id: str,
+        changes: Dict[str, Any]
+    ) -> Optional[SessionExerciseResponse]:
+        changed = await self._update_session_exercise(session_id, session_exercise_id, {"$set": changes})
+        if changed is None:
+            return None
+        session, before = changed
+        return await self._applied(session, before, {**before, **changes})
+
+    async def _update_session_exercise(
+        self,
+        session_id: str,
+        session_exercise_id: str,
+        update: Dict[str, Dict[str, Any]],
+        only_in_progress: bool = False
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Apply ``update`` to one exercise of a session in whichever layout it is stored.
+
+        Returns the session (``WRITE_PROJECTION``) and the exercise as it was before
+        the update; the pre-image makes the totals delta exact even with
+        concurrent edits. An exercise not found in the layout the session was
+        read in may have just been moved by a storage migration, so the
+        session is read again and the update follows it.
+        """
+        session_oid = ObjectId(session_id)
+        session_exercise_oid = ObjectId(session_exercise_id)
+        sessions = WorkoutSession.get_motor_collection()
+        query: Dict[str, Any] = {"_id": session_oid, "exercises": session_exercise_oid}
+        if only_in_progress:
+            query["status"] = "in_progress"
+        layout = None
+        for _ in range(LAYOUT_ATTEMPTS):
+            session = await sessions.find_one(query, projection=WRITE_PROJECTION)
+            if not session:
+                return None
+            embedded = embedded_entries(session) is not None
+            if embedded == layout:
+                # Same layout as the attempt that found nothing: the exercise is missing
+                return None
+            layout = embedded
+
+            if not embedded:
+                before = await SessionExercise.get_motor_collection().find_one_and_update(
+                    {"_id": session_exercise_oid},
+                    {**update, "$inc": {**update.get("$inc", {}), "revision": 1}},
+                    return_document=ReturnDocument.BEFORE
+                )
+            else:
+                previous = await sessions.find_one_and_update(
+                    {"_id": session_oid, "embedded_exercises._id": session_exercise_oid},
+                    {
+                        operator: {f"embedded_exercises.$.{field}": value for field, value in fields.items()}
+                        for operator, fields in update.items()
+                    },
+                    projection={"embedded_exercises": 1},
+                    return_document=ReturnDocument.BEFORE
+                )
+                before = next(
+                    (entry for entry in embedded_entries(previous or {}) or [] if entry["_id"] == session_exercise_oid),
+                    None
+                )
+            if before is not None:
+                return session, before
+        return None
+
+    async def _applied(
+        self,
+        session: Dict[str, Any],
+        before: Dict[str, Any],
+        after: Dict[str, Any]
+    ) -> SessionExerciseResponse:
+        """Fold an exercise change into the session totals, set history, personal records and rollups"""
+        await self.metrics.apply(session["_id"], before, after)
+        await self.set_history.apply(session, before, after)
+        # Only changes a completed session; checked after the write so a concurrent completion cannot miss it
+        await self.rollups.sync_session(session["_id"])
+        response = session_exercise_to_response(SessionExercise.model_validate(after))
+        old_sets = logged_sets(before)
+        new_sets = logged_sets(after)
+        if new_sets != old_sets:
+            # Records are per session, so the session's other entries of the exercise count too
+            other_sets = await self._other_sets(session, after["exercise_id"], after["_id"])
+            response.new_records = await self.records.replace_sets(
+                session["user_id"], after["exercise_id"], other_sets + old_sets, other_sets + new_sets
+            )
+        return response
+
+    async def _other_sets(
+        self,
+        session: Dict[str, Any],
+        exercise_id: ObjectId,
+        session_exercise_id: ObjectId
+    ) -> List[Dict[str, Any]]:
+        """Logged sets of the session's other, non-skipped entries of the same exercise"""
+        entries = embedded_entries(session)
+        if entries is None:
+            refs = [ref for ref in session.get("exercises") or [] if ref != session_exercise_id]
+            if not refs:
+                return []
+            entries = await SessionExercise.get_motor_collection().find(
+                {"_id": {"$in": refs}, "exercise_id": exercise_id},
+                projection={"actual_sets": 1, "skipped": 1}
+            ).to_list(length=None)
+        else:
+            entries = [
+                entry for entry in entries
+                if entry["_id"] != session_exercise_id and entry.get("exercise_id") == exercise_id
+            ]
+        return [logged_set for entry in entries for logged_set in logged_sets(entry)]
+
+    async def get_session(self, session_id: str) -> Optional[WorkoutSessionResponse]:
+        """Get a session with its exercises"""
+        session = await WorkoutSession.get(ObjectId(session_id))
+        if not session:
+            return None
+        exercises = await self._load_exercises([session])
+        return session_to_response(session, exercises)
+
+    async def get_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        status: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> Union[Page[WorkoutSessionResponse], Dict[str, Any]]:
+        """Get a user's session history, newest first.
+
+        ``cursor`` continues after the previous page; ``skip`` is only honoured
+        as a legacy fallback when no cursor is given. With a sparse ``fields``
+        set only those fields are fetched and the page is returned as a dict.
+        """
+        query = {"user_id": ObjectId(user_id)}
+        if status:
+            query["status"] = status
+
+        query = apply_cursor(query, cursor, SESSION_SORT)
+        offset = skip if skip and not cursor else 0
+
+        if settings.hydration_strategy == "lookup" and not fields:
+            rows = await aggregate_with_children(
+                WorkoutSession, SessionExercise, query, SESSION_SORT, limit + 1, offset
+            )
+            sessions = [session for session, _, _ in rows]
+            exercises = {
+                child.id: session_exercise_to_response(child, names)
+                for _, children, names in rows for child in children
+            }
+        else:
+            finder = WorkoutSession.find(query).sort(SESSION_SORT)
+            if fields:
+                # The sort key is always fetched so the next cursor can be built,
+                # and embedded exercise entries whenever exercises are requested
+                extra = {"started_at", "embedded_exercises"} if "exercises" in fields else {"started_at"}
+                finder = finder.project(view_model(WorkoutSession, fields | extra))
+            sessions = await finder.skip(offset).limit(limit + 1).to_list()
+            exercises = None
+
+        next_cursor = None
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            last = sessions[-1]
+            next_cursor = encode_cursor({"started_at": last.started_at, "_id": last.id}, SESSION_SORT)
+
+        if fields:
+            return {
+                "items": await self._trimmed(sessions, fields),
+                "next_cursor": next_cursor
+            }
+
+        if exercises is None:
+            exercises = await self._load_exercises(sessions)
+        return Page(
+            items=[session_to_response(session, exercises) for session in sessions],
+            next_cursor=next_cursor
+        )
+
+    async def _trimmed(self, sessions: List[Any], fields: FrozenSet[str]) -> List[Dict[str, Any]]:
+        """Serialize projected sessions, hydrating exercises only if requested"""
+        exercises = await self._load_exercises(sessions) if "exercises" in fields else {}
+        items = []
+        for session in sessions:
+            item = session.model_dump(mode="json", include=fields)
+            if "exercises" in fields:
+                item["exercises"] = [
+                    exercises[ref].model_dump(mode="json")
+                    for ref in session.exercises if ref in exercises
+                ]
+            items.append(item)
+        return items
+
+    async def _load_exercises(self, sessions: List[Any]) -> Dict[ObjectId, SessionExerciseResponse]:
+        """Resolve the exercises of all sessions and their catalog names in one query per collection"""
+        session_exercises = await self.loader.children(SessionExercise, sessions)
+        names = await self.loader.exercise_names(
+            session_exercise.exercise_id for session_exercise in session_exercises.values()
+        )
+        return {
+            ref: session_exercise_to_response(session_exercise, names)
+            for ref, session_exercise in session_exercises.items()
+        }
@@ -0,0 +1,113 @@
+from typing import Any, Dict, Mapping, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from ..models.session import WorkoutSession, SessionExercise
+from .loader import ReferenceLoader
+from .storage import layout_filter
+
+METRIC_FIELDS = ("total_volume", "total_reps", "total_sets", "completed_exercises")
+
+def exercise_metrics(session_exercise: Optional[Mapping[str, Any]]) -> Dict[str, float]:
+    """Contribution of one SessionExercise document to its session's totals"""
+    if not session_exercise or session_exercise.get("skipped"):
+        return {field: 0 for field in METRIC_FIELDS}
+
+    actual_sets = session_exercise.get("actual_sets") or []
+    volume = 0.0
+    reps = 0
+    for logged_set in actual_sets:
+        set_reps = logged_set.get("reps") or 0
+        reps += set_reps
+        volume += set_reps * (logged_set.get("weight") or 0)
+    done = bool(actual_sets) or (session_exercise.get("sets_completed") or 0) > 0
+    return {
+        "total_volume": volume,
+        "total_reps": reps,
+        "total_sets": len(actual_sets),
+        "completed_exercises": 1 if done else 0,
+    }
+
+def metrics_delta(before: Optional[Mapping[str, Any]], after: Optional[Mapping[str, Any]]) -> Dict[str, float]:
+    old = exercise_metrics(before)
+    new = exercise_metrics(after)
+    return {field: new[field] - old[field] for field in METRIC_FIELDS}
+
+def _completion_stage() -> Dict[str, Any]:
+    planned = {"$ifNull": ["$planned_exercises", {"$size": {"$ifNull": ["$exercises", []]}}]}
+    # Exercises added beyond the plan count as completed too, but cannot take a session past 100%
+    return {"$set": {"completion_percentage": {"$cond": [
+        {"$gt": [planned, 0]},
+        {"$min": [{"$multiply": [{"$divide": ["$completed_exercises", planned]}, 100]}, 100]},
+        None,
+    ]}}}
+
+class SessionMetricsAggregator:
+    """Keeps WorkoutSession totals in step with its SessionExercise documents.
+
+    Each write applies the delta between the previous and new state of one
+    SessionExercise in a single pipeline update on the session, so totals stay
+    correct under concurrent writes and summary reads are one document fetch.
+    """
+
+    async def apply(
+        self,
+        session_id: ObjectId,
+        before: Optional[Mapping[str, Any]],
+        after: Optional[Mapping[str, Any]],
+        append_exercise: Optional[ObjectId] = None,
+        embed: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Apply the metric delta of one exercise change; returns the updated session.
+
+        ``embed`` is the full entry of an appended exercise for sessions stored
+        in the embedded layout, written in the same update as the totals. An
+        append only matches a session still stored in the layout it was
+        prepared for, so None means the session changed layout meanwhile.
+        """
+        delta = metrics_delta(before, after)
+        increments = {
+            field: {"$add": [{"$ifNull": [f"${field}", 0]}, value]}
+            for field, value in delta.items()
+        }
+        if append_exercise is not None:
+            increments["exercises"] = {"$concatArrays": [{"$ifNull": ["$exercises", []]}, [append_exercise]]}
+        if embed is not None:
+            increments["embedded_exercises"] = {"$concatArrays": [
+                {"$ifNull": ["$embedded_exercises", []]}, {"$literal": [embed]}
+            ]}
+        query: Dict[str, Any] = {"_id": session_id}
+        if append_exercise is not None:
+            query.update(layout_filter("embedded" if embed is not None else "referenced"))
+        return await WorkoutSession.get_motor_collection().find_one_and_update(
+            query,
+            [{"$set": increments}, _completion_stage()],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def reconcile(self, session_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """Rebuild a session's totals from its SessionExercise documents"""
+        sessions = WorkoutSession.get_motor_collection()
+        session = await sessions.find_one({"_id": session_id}, projection={"exercises": 1, "embedded_exercises": 1})
+        if session is None:
+            return None
+
+        totals = {field: 0 for field in METRIC_FIELDS}
+        for session_exercise in (await ReferenceLoader().children(SessionExercise, [session])).values():
+            for field, value in exercise_metrics(session_exercise.model_dump()).items():
+                totals[field] += value
+
+        return await sessions.find_one_and_update(
+            {"_id": session_id},
+            [{"$set": totals}, _completion_stage()],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def reconcile_all(self, query: Optional[Dict[str, Any]] = None, batch_size: int = 500) -> int:
+        """Rebuild totals for every session matching ``query``; returns the count"""
+        count = 0
+        cursor = WorkoutSession.get_motor_collection().find(query or {}, projection={"_id": 1}, batch_size=batch_size)
+        async for session in cursor:
+            await self.reconcile(session["_id"])
+            count += 1
+        return count
@@ -0,0 +1,338 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from ..core.config import settings
+from ..models.session import WorkoutSession, SessionExercise
+from ..models.set_bucket import SetBucket
+from ..schemas.pagination import Page
+from ..schemas.session import LoggedSetResponse
+from ..utils.pagination import decode_cursor, encode_cursor
+from .loader import ReferenceLoader
+
+SET_HISTORY_SOURCES = ("documents", "buckets")
+# Newest sets first; sets logged in the same write are ordered by exercise and position
+SET_SORT = [("performed_at", DESCENDING), ("session_exercise_id", DESCENDING), ("set_number", DESCENDING)]
+SESSION_PROJECTION = {"user_id": 1, "started_at": 1, "exercises": 1, "embedded_exercises": 1}
+
+def bucketed_sets(
+    session_id: ObjectId,
+    session_exercise_id: ObjectId,
+    actual_sets: Iterable[Mapping[str, Any]],
+    performed_at: datetime,
+    first_number: int = 1
+) -> List[Dict[str, Any]]:
+    """Typed bucket entries for logged sets, numbered from ``first_number``.
+
+    Each set is dated by its own ``logged_at``; ``performed_at`` dates sets
+    logged before sets carried one.
+    """
+    entries = []
+    for number, logged_set in enumerate(actual_sets, start=first_number):
+        weight = logged_set.get("weight")
+        rpe = logged_set.get("rpe")
+        entries.append({
+            "session_id": session_id,
+            "session_exercise_id": session_exercise_id,
+            "set_number": number,
+            "performed_at": logged_set.get("logged_at") or performed_at,
+            "reps": int(logged_set.get("reps") or 0),
+            "weight": float(weight) if weight is not None else None,
+            "rpe": float(rpe) if rpe is not None else None,
+        })
+    return entries
+
+def stamp_sets(actual_sets: Iterable[Mapping[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+    """Sets with the time they were logged; sets without one were logged ``now``"""
+    return [{**logged_set, "logged_at": logged_set.get("logged_at") or now} for logged_set in actual_sets]
+
+def _bucketed_content(entry: Mapping[str, Any]) -> Tuple[Any, ...]:
+    return (entry["set_number"], entry["performed_at"], entry["reps"], entry.get("weight"), entry.get("rpe"))
+
+def _set_number(content: Tuple[Any, ...]) -> int:
+    return content[0]
+
+def _sort_key(entry: Mapping[str, Any]) -> Tuple[datetime, ObjectId, int]:
+    return (entry["performed_at"], entry["session_exercise_id"], entry["set_number"])
+
+def _wanted(
+    entry: Mapping[str, Any],
+    after: Optional[Tuple[datetime, ObjectId, int]],
+    since: Optional[datetime]
+) -> bool:
+    if since and entry["performed_at"] < since:
+        return False
+    return after is None or _sort_key(entry) < after
+
+def logged_sets(session_exercise: Optional[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    # Skipped exercises keep their sets in the document but they are not part of the history
+    if not session_exercise or session_exercise.get("skipped"):
+        return []
+    return list(session_exercise.get("actual_sets") or [])
+
+def set_to_response(entry: Mapping[str, Any]) -> LoggedSetResponse:
+    return LoggedSetResponse(
+        session_id=str(entry["session_id"]),
+        session_exercise_id=str(entry["session_exercise_id"]),
+        set_number=entry["set_number"],
+        performed_at=entry["performed_at"],
+        reps=entry["reps"],
+        weight=entry.get("weight"),
+        rpe=entry.get("rpe")
+    )
+
+class SetHistoryService:
+    """Keeps per-(user, exercise) set buckets in step with logged sets and serves set history.
+
+    ``SessionExercise.actual_sets`` stays the source of truth; every write to
+    it is mirrored here, so reading an exercise's history touches a handful
+    of buckets instead of every session the user logged. New sets go into a
+    bucket below ``bucket_size`` together, so a bucket can overshoot by one
+    write. Edits that do not just append replace the exercise's sets.
+    """
+
+    def __init__(self, source: str = settings.set_history_source, bucket_size: int = settings.set_bucket_size):
+        if source not in SET_HISTORY_SOURCES:
+            raise ValueError(f"Set history source must be one of {SET_HISTORY_SOURCES}")
+        self.source = source
+        self.bucket_size = bucket_size
+
+    async def apply(
+        self,
+        session: Mapping[str, Any],
+        before: Optional[Mapping[str, Any]],
+        after: Mapping[str, Any]
+    ) -> None:
+        """Mirror one session exercise change (raw documents, before and after) into the buckets"""
+        old_sets = logged_sets(before)
+        new_sets = logged_sets(after)
+        if new_sets == old_sets:
+            return
+
+        # Only dates sets logged before each set carried its own logged_at
+        performed_at = after.get("completed_at") or datetime.utcnow()
+        if old_sets and new_sets[:len(old_sets)] != old_sets:
+            await self.remove(after["_id"])
+            old_sets = []
+        await self.append(session["user_id"], after["exercise_id"], bucketed_sets(
+            session["_id"], after["_id"], new_sets[len(old_sets):], performed_at, first_number=len(old_sets) + 1
+        ))
+
+    async def append(self, user_id: ObjectId, exercise_id: ObjectId, entries: List[Dict[str, Any]]) -> None:
+        if entries:
+            await SetBucket.get_motor_collection().update_one(*self._push(user_id, exercise_id, entries), upsert=True)
+
+    async def remove(self, session_exercise_id: ObjectId) -> None:
+        """Drop every bucketed set of one session exercise"""
+        buckets = SetBucket.get_motor_collection()
+        holding = buckets.find(
+            {"sets.session_exercise_id": session_exercise_id},
+            projection={"sets.session_exercise_id": 1}
+        )
+        async for bucket in holding:
+            removed = sum(1 for entry in bucket["sets"] if entry["session_exercise_id"] == session_exercise_id)
+            await buckets.update_one(
+                {"_id": bucket["_id"]},
+                {"$pull": {"sets": {"session_exercise_id": session_exercise_id}}, "$inc": {"set_count": -removed}}
+            )
+            await buckets.delete_one({"_id": bucket["_id"], "sets": {"$size": 0}})
+
+    async def get_exercise_history(
+        self,
+        user_id: str,
+        exercise_id: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> Page[LoggedSetResponse]:
+        """A user's logged sets of one exercise, newest first; ``cursor`` continues after the previous page"""
+        if since and since.tzinfo:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        after = None
+        if cursor:
+            values = decode_cursor(cursor, SET_SORT)
+            if not isinstance(values["performed_at"], datetime):
+                raise ValueError("Invalid pagination cursor")
+            after = _sort_key({**values, "performed_at": values["performed_at"].replace(tzinfo=None)})
+
+        read = self._from_buckets if self.source == "buckets" else self._from_documents
+        entries = await read(ObjectId(user_id), ObjectId(exercise_id), limit + 1, after, since)
+
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = encode_cursor(entries[-1], SET_SORT)
+        return Page(items=[set_to_response(entry) for entry in entries], next_cursor=next_cursor)
+
+    async def backfill(self, user_id: Optional[str] = None, batch_size: int = 500) -> int:
+        """Bucket the sets of session exercises whose buckets are missing or out of step.
+
+        Exercises whose bucketed sets already match their logged sets are
+        left alone, so the job can be rerun (after an interruption or an
+        import) and only writes what is missing or differs. Returns the number
+        of session exercises written.
+        """
+        scope = {"user_id": ObjectId(user_id)} if user_id else {}
+        # Buckets written before the set counter was renamed
+        await SetBucket.get_motor_collection().update_many(
+            {"count": {"$exists": True}}, {"$rename": {"count": "set_count"}}
+        )
+        sessions = WorkoutSession.get_motor_collection().find(
+            scope, projection=SESSION_PROJECTION, batch_size=batch_size
+        ).sort("_id", ASCENDING)
+        written = 0
+        batch: List[Dict[str, Any]] = []
+        async for session in sessions:
+            batch.append(session)
+            if len(batch) >= batch_size:
+                written += await self._backfill_batch(batch)
+                batch = []
+        if batch:
+            written += await self._backfill_batch(batch)
+        return written
+
+    async def _backfill_batch(self, sessions: List[Dict[str, Any]]) -> int:
+        logged = await self._session_sets(sessions)
+        bucketed = await self._bucketed([session_exercise_id for _, _, session_exercise_id, _ in logged])
+
+        grouped: Dict[Tuple[ObjectId, ObjectId], List[Dict[str, Any]]] = defaultdict(list)
+        written = 0
+        for user_id, exercise_id, session_exercise_id, entries in logged:
+            stored = bucketed.get(session_exercise_id, [])
+            if stored == sorted((_bucketed_content(entry) for entry in entries), key=_set_number):
+                continue
+            if stored:
+                await self.remove(session_exercise_id)
+            grouped[(user_id, exercise_id)].extend(entries)
+            written += 1
+
+        updates = []
+        for (user_id, exercise_id), entries in grouped.items():
+            entries.sort(key=_sort_key)
+            for start in range(0, len(entries), self.bucket_size):
+                updates.append(UpdateOne(
+                    *self._push(user_id, exercise_id, entries[start:start + self.bucket_size]), upsert=True
+                ))
+        if updates:
+            # Ordered, so each push sees the bucket the previous one filled
+            await SetBucket.get_motor_collection().bulk_write(updates, ordered=True)
+        return written
+
+    async def _bucketed(self, session_exercise_ids: List[ObjectId]) -> Dict[ObjectId, List[Tuple[Any, ...]]]:
+        """Bucketed content of each session exercise, ordered by set number"""
+        if not session_exercise_ids:
+            return {}
+        wanted = set(session_exercise_ids)
+        bucketed: Dict[ObjectId, List[Tuple[Any, ...]]] = defaultdict(list)
+        buckets = SetBucket.get_motor_collection().find(
+            {"sets.session_exercise_id": {"$in": session_exercise_ids}}, projection={"sets": 1}
+        )
+        async for bucket in buckets:
+            for entry in bucket["sets"]:
+                if entry["session_exercise_id"] in wanted:
+                    bucketed[entry["session_exercise_id"]].append(_bucketed_content(entry))
+        return {session_exercise_id: sorted(content, key=_set_number) for session_exercise_id, content in bucketed.items()}
+
+    def _push(
+        self,
+        user_id: ObjectId,
+        exercise_id: ObjectId,
+        entries: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Filter and update adding ``entries`` to an open bucket, or starting one when upserted"""
+        return (
+            {"user_id": user_id, "exercise_id": exercise_id, "set_count": {"$lt": self.bucket_size}},
+            {
+                "$push": {"sets": {"$each": entries}},
+                "$inc": {"set_count": len(entries)},
+                "$min": {"first_at": min(entry["performed_at"] for entry in entries)},
+                "$max": {"last_at": max(entry["performed_at"] for entry in entries)},
+            }
+        )
+
+    async def _session_sets(
+        self,
+        sessions: List[Dict[str, Any]],
+        exercise_id: Optional[ObjectId] = None
+    ) -> List[Tuple[ObjectId, ObjectId, ObjectId, List[Dict[str, Any]]]]:
+        """(user, exercise, session exercise, bucket entries) of the logged exercises of ``sessions``"""
+        session_exercises = await ReferenceLoader().children(SessionExercise, sessions)
+        logged = []
+        for session in sessions:
+            for ref in session.get("exercises") or []:
+                session_exercise = session_exercises.get(ref)
+                if session_exercise is None or session_exercise.skipped or not session_exercise.actual_sets:
+                    continue
+                if exercise_id is not None and session_exercise.exercise_id != exercise_id:
+                    continue
+                # Only dates sets logged before each set carried its own logged_at
+                performed_at = session_exercise.completed_at or session["started_at"]
+                logged.append((
+                    session["user_id"],
+                    session_exercise.exercise_id,
+                    ref,
+                    bucketed_sets(session["_id"], ref, session_exercise.actual_sets, performed_at)
+                ))
+        return logged
+
+    async def _from_buckets(
+        self,
+        user_id: ObjectId,
+        exercise_id: ObjectId,
+        wanted: int,
+        after: Optional[Tuple[datetime, ObjectId, int]],
+        since: Optional[datetime]
+    ) -> List[Dict[str, Any]]:
+        """Read buckets newest first until no remaining bucket can hold one of the ``wanted`` newest sets"""
+        query: Dict[str, Any] = {"user_id": user_id, "exercise_id": exercise_id}
+        if since:
+            query["last_at"] = {"$gte": since}
+        if after:
+            query["first_at"] = {"$lte": after[0]}
+
+        collected: List[Dict[str, Any]] = []
+        async for bucket in SetBucket.get_motor_collection().find(query).sort("last_at", DESCENDING):
+            # Buckets can overlap in time (backfilled next to dual-written ones), so stop on their bounds
+            if len(collected) >= wanted and bucket["last_at"] < collected[-1]["performed_at"]:
+                break
+            collected.extend(entry for entry in bucket["sets"] if _wanted(entry, after, since))
+            collected.sort(key=_sort_key, reverse=True)
+            del collected[wanted:]
+        return collected
+
+    async def _from_documents(
+        self,
+        user_id: ObjectId,
+        exercise_id: ObjectId,
+        wanted: int,
+        after: Optional[Tuple[datetime, ObjectId, int]],
+        since: Optional[datetime]
+    ) -> List[Dict[str, Any]]:
+        """The pre-bucket read: every session of the user and all of their exercises"""
+        collected: List[Dict[str, Any]] = []
+        batch: List[Dict[str, Any]] = []
+        sessions = WorkoutSession.get_motor_collection().find({"user_id": user_id}, projection=SESSION_PROJECTION)
+        async for session in sessions:
+            batch.append(session)
+            if len(batch) >= settings.history_batch_size:
+                collected.extend(await self._matching(batch, exercise_id, after, since))
+                batch = []
+        if batch:
+            collected.extend(await self._matching(batch, exercise_id, after, since))
+        collected.sort(key=_sort_key, reverse=True)
+        return collected[:wanted]
+
+    async def _matching(
+        self,
+        sessions: List[Dict[str, Any]],
+        exercise_id: ObjectId,
+        after: Optional[Tuple[datetime, ObjectId, int]],
+        since: Optional[datetime]
+    ) -> List[Dict[str, Any]]:
+        return [
+            entry
+            for _, _, _, entries in await self._session_sets(sessions, exercise_id)
+            for entry in entries if _wanted(entry, after, since)
+        ]
@@ -0,0 +1,208 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+from beanie import PydanticObjectId
+from bson import ObjectId
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+from ..models.split import WorkoutSplit, SplitDay
+from ..models.workout import Workout
+from ..schemas.pagination import Page
+from ..schemas.split import WorkoutSplitCreate, WorkoutSplitUpdate, WorkoutSplitResponse, SplitDayCreate, SplitDayResponse
+from ..utils.pagination import apply_cursor, encode_cursor
+from .loader import ReferenceLoader
+from .schedule import ScheduleService
+
+# Newest splits first; _id breaks ties between splits created together
+SPLIT_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+# Concurrent activations for one user retry until one of them is the last writer
+ACTIVATION_ATTEMPTS = 5
+
+def split_day_to_response(
+    split_day: SplitDay,
+    workout_names: Optional[Dict[ObjectId, str]] = None
+) -> SplitDayResponse:
+    return SplitDayResponse(
+        id=str(split_day.id),
+        workout_name=(workout_names or {}).get(split_day.workout_id),
+        **split_day.model_dump(mode="json", exclude={"id"})
+    )
+
+def split_to_response(
+    split: WorkoutSplit,
+    days: Dict[ObjectId, SplitDayResponse]
+) -> WorkoutSplitResponse:
+    return WorkoutSplitResponse(
+        id=str(split.id),
+        days=[days[ref] for ref in split.days if ref in days],
+        **split.model_dump(mode="json", exclude={"id", "days"})
+    )
+
+class SplitService:
+    """Service layer for workout split operations"""
+
+    def __init__(self, loader: Optional[ReferenceLoader] = None):
+        self.loader = loader or ReferenceLoader()
+        self.schedules = ScheduleService()
+
+    async def get_split(self, split_id: str) -> Optional[WorkoutSplitResponse]:
+        """Get a split with its days"""
+        split = await WorkoutSplit.get(ObjectId(split_id))
+        if not split:
+            return None
+        days = await self._load_days([split])
+        return split_to_response(split, days)
+
+    async def get_user_splits(
+        self,
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Page[WorkoutSplitResponse]:
+        """Get a user's splits, newest first"""
+        query = apply_cursor({"user_id": ObjectId(user_id)}, cursor, SPLIT_SORT)
+        splits = await WorkoutSplit.find(query).sort(SPLIT_SORT).limit(limit + 1).to_list()
+
+        next_cursor = None
+        if len(splits) > limit:
+            splits = splits[:limit]
+            last = splits[-1]
+            next_cursor = encode_cursor({"created_at": last.created_at, "_id": last.id}, SPLIT_SORT)
+
+        days = await self._load_days(splits)
+        return Page(
+            items=[split_to_response(split, days) for split in splits],
+            next_cursor=next_cursor
+        )
+
+    async def create_split(self, user_id: str, split_data: WorkoutSplitCreate) -> WorkoutSplitResponse:
+        """Create an inactive split with its days"""
+        user_oid = ObjectId(user_id)
+        days = await self._new_days(user_oid, split_data.days)
+        split = WorkoutSplit(
+            user_id=user_oid,
+            days=[day.id for day in days],
+            **split_data.model_dump(exclude={"days"})
+        )
+        await split.insert()
+        return await self.get_split(str(split.id))
+
+    async def update_split(self, split_id: str, split_data: WorkoutSplitUpdate) -> Optional[WorkoutSplitResponse]:
+        """Update a split; ``is_active`` activates it (deactivating the user's other split) or deactivates it"""
+        split = await WorkoutSplit.get(ObjectId(split_id))
+        if not split:
+            return None
+
+        update = split_data.model_dump(exclude_unset=True)
+        is_active = update.pop("is_active", None)
+        collection = WorkoutSplit.get_motor_collection()
+        if update:
+            await collection.update_one({"_id": split.id}, {"$set": {**update, "updated_at": datetime.utcnow()}})
+        if is_active:
+            await self._activate(split)
+        elif is_active is False:
+            await collection.update_one({"_id": split.id}, {"$set": {"is_active": False, "updated_at": datetime.utcnow()}})
+        await self.schedules.refresh(split.user_id)
+        return await self.get_split(split_id)
+
+    async def activate_split(self, split_id: str) -> Optional[WorkoutSplitResponse]:
+        """Make a split the user's only active one"""
+        return await self.update_split(split_id, WorkoutSplitUpdate(is_active=True))
+
+    async def replace_days(self, split_id: str, days: List[SplitDayCreate]) -> Optional[WorkoutSplitResponse]:
+        """Replace all days of a split"""
+        split = await WorkoutSplit.get(ObjectId(split_id))
+        if not split:
+            return None
+
+        new_days = await self._new_days(split.user_id, days)
+        await WorkoutSplit.get_motor_collection().update_one(
+            {"_id": split.id},
+            {"$set": {"days": [day.id for day in new_days], "updated_at": datetime.utcnow()}}
+        )
+        if split.days:
+            await SplitDay.get_motor_collection().delete_many({"_id": {"$in": split.days}})
+        # Unconditionally: the split may have been activated since it was read
+        await self.schedules.refresh(split.user_id)
+        return await self.get_split(split_id)
+
+    async def _activate(self, split: WorkoutSplit) -> None:
+        """Deactivate the user's other splits, then activate this one.
+
+        A partial unique index allows one active split per user, so a
+        concurrent activation makes one of the two writes fail; that one
+        deactivates the winner and tries again, and the last activation wins.
+        ``activated_at`` is only set when the split was not already active,
+        so activating it again does not restart its schedule.
+        """
+        collection = WorkoutSplit.get_motor_collection()
+        for _ in range(ACTIVATION_ATTEMPTS):
+            now = datetime.utcnow()
+            await collection.update_many(
+                {"user_id": split.user_id, "is_active": True, "_id": {"$ne": split.id}},
+                {"$set": {"is_active": False, "updated_at": now}}
+            )
+            try:
+                await collection.update_one(
+                    {"_id": split.id, "is_active": {"$ne": True}},
+                    {"$set": {"is_active": True, "activated_at": now, "updated_at": now}}
+                )
+                return
+            except DuplicateKeyError:
+                continue
+        raise RuntimeError("Could not activate split: concurrent activations kept conflicting")
+
+    async def dedupe_active(self) -> int:
+        """Leave one active split per user so the unique ``user_single_active`` index can be built.
+
+        The split activated last (by ``activated_at``, then ``updated_at``,
+        then ``created_at``) stays active and the user's schedule is
+        refreshed from it. Returns the number of splits deactivated.
+        """
+        collection = WorkoutSplit.get_motor_collection()
+        groups = collection.aggregate([
+            {"$match": {"is_active": True}},
+            {"$sort": {"activated_at": DESCENDING, "updated_at": DESCENDING, "created_at": DESCENDING, "_id": DESCENDING}},
+            {"$group": {"_id": "$user_id", "ids": {"$push": "$_id"}}},
+            {"$match": {"ids.1": {"$exists": True}}}
+        ])
+        deactivated = 0
+        async for group in groups:
+            result = await collection.update_many(
+                {"_id": {"$in": group["ids"][1:]}},
+                {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
+            )
+            deactivated += result.modified_count
+            await self.schedules.refresh(group["_id"])
+        return deactivated
+
+    async def _new_days(self, user_id: ObjectId, days: List[SplitDayCreate]) -> List[SplitDay]:
+        """Validate and insert the days of a split; their workouts must be the user's"""
+        day_numbers = [day.day_number for day in days]
+        if len(set(day_numbers)) != len(day_numbers):
+            raise ValueError("Each day_number can only be used once per split")
+        if any(not ObjectId.is_valid(day.workout_id) for day in days):
+            raise ValueError("Invalid workout ID format")
+
+        workouts = await self.loader.load(Workout, (ObjectId(day.workout_id) for day in days))
+        for day in days:
+            workout = workouts.get(ObjectId(day.workout_id))
+            if workout is None:
+                raise ValueError(f"Workout {day.workout_id} not found")
+            if workout.user_id != user_id:
+                raise ValueError(f"Workout {day.workout_id} belongs to another user")
+
+        split_days = [
+            SplitDay(id=PydanticObjectId(), **day.model_dump(exclude={"workout_id"}), workout_id=ObjectId(day.workout_id))
+            for day in days
+        ]
+        if split_days:
+            await SplitDay.insert_many(split_days)
+        return split_days
+
+    async def _load_days(self, splits: List[WorkoutSplit]) -> Dict[ObjectId, SplitDayResponse]:
+        """Resolve the days of all splits and their workout names in one query per collection"""
+        split_days = await self.loader.load(SplitDay, (ref for split in splits for ref in split.days))
+        workouts = await self.loader.load(Workout, (day.workout_id for day in split_days.values()))
+        names = {ref: workout.name for ref, workout in workouts.items()}
+        return {ref: split_day_to_response(split_day, names) for ref, split_day in split_days.items()}
@@ -0,0 +1,152 @@
+from typing import Any, Dict, List, Optional, Tuple, Type
+from beanie import Document
+from beanie.odm.utils.encoder import Encoder
+from bson import ObjectId
+from pymongo import ASCENDING, DeleteOne, ReplaceOne, UpdateOne
+
+from ..models.session import WorkoutSession, SessionExercise
+from ..models.workout import Workout, WorkoutExercise
+
+EXERCISE_LAYOUTS = ("referenced", "embedded")
+# Times a child written during its migration is copied into its parent again before giving up
+MIGRATION_ATTEMPTS = 5
+
+# Parent and child models of each collection that supports both layouts
+STORAGE_MODELS: Dict[str, Tuple[Type[Document], Type[Document]]] = {
+    "sessions": (WorkoutSession, SessionExercise),
+    "workouts": (Workout, WorkoutExercise),
+}
+
+def embedded_entry(child: Document) -> Dict[str, Any]:
+    """A child document as stored inside its parent, with ObjectIds kept intact"""
+    entry = Encoder(to_db=True).encode(child)
+    entry.pop("revision_id", None)
+    return entry
+
+def layout_filter(layout: str) -> Dict[str, Any]:
+    """Matches parents stored in ``layout``; referenced parents keep the field null or unset"""
+    if layout not in EXERCISE_LAYOUTS:
+        raise ValueError(f"Storage layout must be one of {EXERCISE_LAYOUTS}")
+    return {"embedded_exercises": {"$ne": None} if layout == "embedded" else None}
+
+def _unchanged(child: Dict[str, Any]) -> Dict[str, Any]:
+    """Matches the separate child document only if it was not written since ``child`` was read"""
+    # Children written before revisions existed have none
+    return {"_id": child["_id"], "revision": child["revision"] if "revision" in child else {"$exists": False}}
+
+def new_embedded_exercises(layout: str) -> Optional[List[Dict[str, Any]]]:
+    """Initial ``embedded_exercises`` value for a new parent in ``layout``"""
+    layout_filter(layout)
+    return [] if layout == "embedded" else None
+
+class ExerciseStorageMigrator:
+    """Moves exercise entries between the referenced and embedded layouts.
+
+    Parents are migrated in _id order, one batch at a time, and each parent
+    switches layout with a single conditional update. The filter on the
+    layout marker makes the job resumable: a rerun after an interruption
+    only sees the parents that were not converted yet. A parent whose
+    exercise list changed while its batch was in flight is left alone and
+    picked up by the next run. Writes racing a migration follow the parent
+    into its new layout (see SessionService), and a separate child written
+    after it was copied is copied again before it is deleted.
+    """
+
+    def __init__(self, collection: str):
+        if collection not in STORAGE_MODELS:
+            raise ValueError(f"Collection must be one of {tuple(STORAGE_MODELS)}")
+        self.parent_model, self.child_model = STORAGE_MODELS[collection]
+
+    async def migrate(self, layout: str, batch_size: int = 500) -> int:
+        """Convert every parent to ``layout``; returns the number converted"""
+        layout_filter(layout)
+        source = "referenced" if layout == "embedded" else "embedded"
+        pending = layout_filter(source)
+        convert = self._embed if layout == "embedded" else self._unembed
+
+        converted = 0
+        last_id: Optional[ObjectId] = None
+        parents = self.parent_model.get_motor_collection()
+        while True:
+            query = dict(pending)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            batch = await parents.find(
+                query, projection={"exercises": 1, "embedded_exercises": 1}
+            ).sort("_id", ASCENDING).limit(batch_size).to_list(None)
+            if not batch:
+                return converted
+            converted += await convert(batch)
+            last_id = batch[-1]["_id"]
+
+    async def pending(self, layout: str) -> int:
+        """Parents not yet stored in ``layout``"""
+        source = "referenced" if layout == "embedded" else "embedded"
+        return await self.parent_model.get_motor_collection().count_documents(layout_filter(source))
+
+    async def _embed(self, batch: List[Dict[str, Any]]) -> int:
+        parents = self.parent_model.get_motor_collection()
+        children = self.child_model.get_motor_collection()
+        refs = [ref for parent in batch for ref in parent.get("exercises") or []]
+        # Raw documents, so the revision each one was copied at is known
+        copied = {child["_id"]: child async for child in children.find({"_id": {"$in": refs}})}
+        updates = [
+            UpdateOne(
+                {"_id": parent["_id"], "exercises": parent.get("exercises") or [], **layout_filter("referenced")},
+                {"$set": {"embedded_exercises": [
+                    self._entry(copied[ref]) for ref in parent.get("exercises") or [] if ref in copied
+                ]}}
+            )
+            for parent in batch
+        ]
+        result = await parents.bulk_write(updates, ordered=False)
+
+        # Only children of parents that actually switched are dropped, and only
+        # if unchanged since they were copied; a crash before this point leaves
+        # orphans that no read path looks at.
+        embedded = await parents.find(
+            {"_id": {"$in": [parent["_id"] for parent in batch]}, **layout_filter("embedded")},
+            projection={"exercises": 1}
+        ).to_list(None)
+        owners = {ref: parent["_id"] for parent in embedded for ref in parent.get("exercises") or [] if ref in copied}
+        if owners:
+            await children.bulk_write([DeleteOne(_unchanged(copied[ref])) for ref in owners], ordered=False)
+            async for child in children.find({"_id": {"$in": list(owners)}}):
+                await self._recopy(owners[child["_id"]], child)
+        return result.modified_count
+
+    async def _recopy(self, parent_id: ObjectId, child: Dict[str, Any]) -> None:
+        """Copy a child written during the migration into its parent again, then drop it"""
+        parents = self.parent_model.get_motor_collection()
+        children = self.child_model.get_motor_collection()
+        for _ in range(MIGRATION_ATTEMPTS):
+            await parents.update_one(
+                {"_id": parent_id, "embedded_exercises._id": child["_id"]},
+                {"$set": {"embedded_exercises.$": self._entry(child)}}
+            )
+            if (await children.delete_one(_unchanged(child))).deleted_count:
+                return
+            child = await children.find_one({"_id": child["_id"]})
+            if child is None:
+                return
+        raise RuntimeError(f"Could not migrate {child['_id']}: it kept changing")
+
+    def _entry(self, child: Dict[str, Any]) -> Dict[str, Any]:
+        return embedded_entry(self.child_model.model_validate(child))
+
+    async def _unembed(self, batch: List[Dict[str, Any]]) -> int:
+        children = [
+            ReplaceOne({"_id": entry["_id"]}, entry, upsert=True)
+            for parent in batch for entry in parent.get("embedded_exercises") or []
+        ]
+        if children:
+            await self.child_model.get_motor_collection().bulk_write(children, ordered=False)
+        updates = [
+            UpdateOne(
+                {"_id": parent["_id"], "embedded_exercises": parent["embedded_exercises"]},
+                {"$set": {"embedded_exercises": None}}
+            )
+            for parent in batch
+        ]
+        result = await self.parent_model.get_motor_collection().bulk_write(updates, ordered=False)
+        return result.modified_count
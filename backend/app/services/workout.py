@@ -0,0 +1,99 @@
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import DESCENDING
+
+from ..core.config import settings
+from ..models.workout import Workout, WorkoutExercise
+from ..schemas.pagination import Page
+from ..schemas.workout import WorkoutResponse, WorkoutExerciseResponse
+from ..utils.pagination import apply_cursor, encode_cursor
+from .loader import ReferenceLoader, aggregate_with_children
+
+# Newest workouts first; _id breaks ties between workouts created together
+WORKOUT_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+def workout_exercise_to_response(
+    workout_exercise: WorkoutExercise,
+    exercise_names: Optional[Dict[ObjectId, str]] = None
+) -> WorkoutExerciseResponse:
+    return WorkoutExerciseResponse(
+        id=str(workout_exercise.id),
+        exercise_name=(exercise_names or {}).get(workout_exercise.exercise_id),
+        **workout_exercise.model_dump(mode="json", exclude={"id"})
+    )
+
+def workout_to_response(
+    workout: Workout,
+    exercises: Dict[ObjectId, WorkoutExerciseResponse]
+) -> WorkoutResponse:
+    return WorkoutResponse(
+        id=str(workout.id),
+        exercises=[exercises[ref] for ref in workout.exercises if ref in exercises],
+        **workout.model_dump(mode="json", exclude={"id", "exercises", "embedded_exercises"})
+    )
+
+class WorkoutService:
+    """Service layer for workout operations"""
+
+    def __init__(self, loader: Optional[ReferenceLoader] = None):
+        self.loader = loader or ReferenceLoader()
+
+    async def get_workout(self, workout_id: str) -> Optional[WorkoutResponse]:
+        """Get a workout with its exercises"""
+        workout = await Workout.get(ObjectId(workout_id))
+        if not workout:
+            return None
+        exercises = await self._load_exercises([workout])
+        return workout_to_response(workout, exercises)
+
+    async def get_user_workouts(
+        self,
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        skip: int = 0
+    ) -> Page[WorkoutResponse]:
+        """Get a user's workouts, newest first.
+
+        ``cursor`` continues after the previous page; ``skip`` is only honoured
+        as a legacy fallback when no cursor is given.
+        """
+        query = apply_cursor({"user_id": ObjectId(user_id)}, cursor, WORKOUT_SORT)
+        offset = skip if skip and not cursor else 0
+
+        if settings.hydration_strategy == "lookup":
+            rows = await aggregate_with_children(
+                Workout, WorkoutExercise, query, WORKOUT_SORT, limit + 1, offset
+            )
+            workouts = [workout for workout, _, _ in rows]
+            exercises = {
+                child.id: workout_exercise_to_response(child, names)
+                for _, children, names in rows for child in children
+            }
+        else:
+            workouts = await Workout.find(query).sort(WORKOUT_SORT).skip(offset).limit(limit + 1).to_list()
+            exercises = None
+
+        next_cursor = None
+        if len(workouts) > limit:
+            workouts = workouts[:limit]
+            last = workouts[-1]
+            next_cursor = encode_cursor({"created_at": last.created_at, "_id": last.id}, WORKOUT_SORT)
+
+        if exercises is None:
+            exercises = await self._load_exercises(workouts)
+        return Page(
+            items=[workout_to_response(workout, exercises) for workout in workouts],
+            next_cursor=next_cursor
+        )
+
+    async def _load_exercises(self, workouts: List[Workout]) -> Dict[ObjectId, WorkoutExerciseResponse]:
+        """Resolve the exercises of all workouts and their catalog names in one query per collection"""
+        workout_exercises = await self.loader.children(WorkoutExercise, workouts)
+        names = await self.loader.exercise_names(
+            workout_exercise.exercise_id for workout_exercise in workout_exercises.values()
+        )
+        return {
+            ref: workout_exercise_to_response(workout_exercise, names)
+            for ref, workout_exercise in workout_exercises.items()
+        }
@@ -0,0 +1,33 @@
+from typing import Hashable, Iterable, Optional
+import hashlib
+
+from fastapi import Response, status
+
+# Clients may store responses but must revalidate them before every use
+CACHE_CONTROL = "no-cache"
+
+def _canonical(part: Hashable) -> Hashable:
+    # Set iteration order varies between processes; the ETag must not
+    if isinstance(part, (set, frozenset)):
+        return tuple(sorted(part))
+    return part
+
+def make_etag(version: int, key: Iterable[Hashable]) -> str:
+    """Strong ETag of one representation (``key``) of data at ``version``"""
+    digest = hashlib.blake2b(repr(tuple(_canonical(part) for part in key)).encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+def is_wildcard(if_none_match: Optional[str]) -> bool:
+    """``*`` matches any current representation, but only of a resource that exists"""
+    return bool(if_none_match) and if_none_match.strip() == "*"
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if is_wildcard(if_none_match):
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -0,0 +1,43 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from bson import json_util
+import base64
+
+# Sort specification: [(field, direction)], always ending with a unique field (_id)
+SortSpec = Sequence[Tuple[str, int]]
+
+def encode_cursor(document: Dict[str, Any], sort: SortSpec) -> str:
+    """Build an opaque cursor from the sort-key values of the last document"""
+    values = {field: document[field] for field, _ in sort}
+    payload = json_util.dumps(values, json_options=json_util.CANONICAL_JSON_OPTIONS)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: SortSpec) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if not isinstance(values, dict) or any(field not in values for field, _ in sort):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+def keyset_filter(cursor_values: Dict[str, Any], sort: SortSpec) -> Dict[str, Any]:
+    """Filter matching documents strictly after the cursor in sort order.
+
+    For sort [(a, -1), (_id, -1)] this yields
+    {"$or": [{a: {"$lt": va}}, {a: va, "_id": {"$lt": vid}}]}.
+    """
+    clauses: List[Dict[str, Any]] = []
+    for position, (field, direction) in enumerate(sort):
+        clause = {prior: cursor_values[prior] for prior, _ in sort[:position]}
+        clause[field] = {"$gt" if direction > 0 else "$lt": cursor_values[field]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+def apply_cursor(query: Dict[str, Any], cursor: Optional[str], sort: SortSpec) -> Dict[str, Any]:
+    """Combine a base query with the keyset filter for the given cursor"""
+    if not cursor:
+        return query
+    after = keyset_filter(decode_cursor(cursor, sort), sort)
+    return {"$and": [query, after]} if query else after
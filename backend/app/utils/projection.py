@@ -0,0 +1,43 @@
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Optional, Type
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[FrozenSet[str]]:
+    """Parse a comma separated ``fields=`` parameter into a set of field names.
+
+    Returns None when no sparse fieldset was requested; raises ValueError for
+    unknown fields. ``id`` is always included.
+    """
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed) - {"id"}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return frozenset(requested | {"id"})
+
+def selectable_fields(document: Type[Document]) -> FrozenSet[str]:
+    """Fields of a document that can be requested in a sparse fieldset"""
+    return frozenset(name for name in document.model_fields if name not in ("id", "revision_id"))
+
+@lru_cache(maxsize=256)
+def view_model(document: Type[Document], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """Lightweight model holding only ``fields`` of ``document``.
+
+    Passed to Beanie's ``.project()`` it becomes the Mongo projection; wrapped
+    in a TypeAdapter (``item_adapter``) it validates and serializes raw motor
+    documents fetched with the matching projection. Either way unrequested
+    fields are neither sent over the wire nor validated.
+    """
+    definitions = {
+        name: (field.annotation, field)
+        for name, field in document.model_fields.items()
+        if name in fields and name != "id"
+    }
+    return create_model(
+        f"{document.__name__}View",
+        __config__=ConfigDict(populate_by_name=True, arbitrary_types_allowed=True),
+        id=(Optional[PydanticObjectId], Field(None, alias="_id")),
+        **definitions
+    )
@@ -0,0 +1,152 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Set, Tuple
+import heapq
+import re
+import unicodedata
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase ASCII word tokens; accents are folded ("curl" matches "cúrl")"""
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return _TOKEN.findall(folded)
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up with ``limit + 1`` once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+class SearchIndex:
+    """In-process inverted index with prefix and typo-tolerant lookups.
+
+    Each document's text fields are tokenized into postings weighted per
+    field. Prefix matches use a sorted vocabulary; typo tolerance uses a
+    trigram index over the vocabulary, verified with a bounded edit distance.
+    Fuzzy candidates are only computed for query terms that have no exact or
+    prefix match, which keeps common lookups to a few dict and bisect
+    operations.
+    """
+
+    def __init__(self, field_weights: Mapping[str, float], compound_fields: Iterable[str] = ()):
+        self.field_weights = dict(field_weights)
+        # In these fields adjacent words are also indexed joined ("pull up" -> "pullup")
+        self.compound_fields = set(compound_fields)
+        self._postings: Dict[str, Dict[Hashable, float]] = defaultdict(dict)
+        self._doc_tokens: Dict[Hashable, Set[str]] = {}
+        self._payloads: Dict[Hashable, Any] = {}
+        self._vocabulary: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._doc_tokens.clear()
+        self._payloads.clear()
+        self._vocabulary.clear()
+        self._trigrams.clear()
+
+    def add(self, doc_id: Hashable, fields: Mapping[str, Any], payload: Any = None) -> None:
+        """Index (or re-index) a document; list values are indexed as one text"""
+        self.remove(doc_id)
+        weights: Dict[str, float] = {}
+        for field, weight in self.field_weights.items():
+            value = fields.get(field)
+            if not value:
+                continue
+            text = " ".join(value) if isinstance(value, (list, tuple)) else str(value)
+            tokens = tokenize(text)
+            if field in self.compound_fields:
+                tokens += [a + b for a, b in zip(tokens, tokens[1:])]
+            for token in tokens:
+                weights[token] = max(weights.get(token, 0.0), weight)
+
+        for token, weight in weights.items():
+            if token not in self._postings:
+                insort(self._vocabulary, token)
+                for trigram in trigrams(token):
+                    self._trigrams[trigram].add(token)
+            self._postings[token][doc_id] = weight
+        self._doc_tokens[doc_id] = set(weights)
+        self._payloads[doc_id] = payload
+
+    def remove(self, doc_id: Hashable) -> None:
+        for token in self._doc_tokens.pop(doc_id, ()):
+            postings = self._postings[token]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+                for trigram in trigrams(token):
+                    self._trigrams[trigram].discard(token)
+        self._payloads.pop(doc_id, None)
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[Any, float]]:
+        """Ranked (payload, score) pairs; documents matching more query terms come first"""
+        terms = tokenize(query)
+        scores: Dict[Hashable, float] = defaultdict(float)
+        matched: Dict[Hashable, int] = defaultdict(int)
+        for term in dict.fromkeys(terms):
+            best: Dict[Hashable, float] = {}
+            for token, similarity in self._expand(term).items():
+                for doc_id, weight in self._postings[token].items():
+                    score = similarity * weight
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] += score
+                matched[doc_id] += 1
+
+        ranked = heapq.nsmallest(limit, scores, key=lambda doc_id: (-matched[doc_id], -scores[doc_id]))
+        return [(self._payloads[doc_id], round(scores[doc_id], 4)) for doc_id in ranked]
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Vocabulary tokens a query term matches, with a similarity in (0, 1]"""
+        expansions: Dict[str, float] = {}
+        if term in self._postings:
+            expansions[term] = 1.0
+        if len(term) >= 2:
+            for index in range(bisect_left(self._vocabulary, term), len(self._vocabulary)):
+                token = self._vocabulary[index]
+                if not token.startswith(term):
+                    break
+                if token != term:
+                    # Shorter completions rank closer to an exact match
+                    expansions[token] = 0.6 + 0.3 * len(term) / len(token)
+        if expansions or len(term) < 3:
+            return expansions
+
+        limit = 1 if len(term) < 6 else 2
+        term_trigrams = trigrams(term)
+        shared: Dict[str, int] = defaultdict(int)
+        for trigram in term_trigrams:
+            for token in self._trigrams.get(trigram, ()):
+                shared[token] += 1
+        for token, count in shared.items():
+            # A token has len + 1 padded trigrams; cheap Jaccard and length filters first
+            if abs(len(token) - len(term)) > limit:
+                continue
+            if count / (len(term_trigrams) + len(token) + 1 - count) < 0.25:
+                continue
+            distance = edit_distance(term, token, limit)
+            if distance <= limit:
+                expansions[token] = 0.5 * (1 - distance / max(len(term), len(token)))
+        return expansions
+
+    def stats(self) -> Dict[str, int]:
+        return {"documents": len(self._doc_tokens), "tokens": len(self._vocabulary)}
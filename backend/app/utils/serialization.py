@@ -0,0 +1,37 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Mapping, Type
+
+import pydantic_core
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+@lru_cache(maxsize=256)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+@lru_cache(maxsize=256)
+def item_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(model)
+
+def dump_documents(documents: Iterable[Mapping[str, Any]], model: Type[BaseModel]) -> bytes:
+    """Raw Mongo documents to JSON bytes, validated once against ``model``.
+
+    ``model`` is normally a ``view_model`` so ``_id`` is read through its
+    alias and written out as ``id``.
+    """
+    adapter = list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(list(documents)))
+
+def dump_document(document: Mapping[str, Any], model: Type[BaseModel]) -> bytes:
+    adapter = item_adapter(model)
+    return adapter.dump_json(adapter.validate_python(document))
+
+class RawJSONResponse(Response):
+    """Response for a body that is already serialized JSON bytes"""
+    media_type = "application/json"
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by pydantic-core instead of the json module"""
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content, fallback=str)
@@ -0,0 +1,192 @@
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+import heapq
+
+DIFFICULTY_LEVELS = ("beginner", "intermediate", "advanced")
+# Equipment loading a movement the same way; a substitute within the family feels closest
+EQUIPMENT_FAMILIES = {
+    "barbell": "free_weight", "dumbbell": "free_weight", "kettlebell": "free_weight",
+    "cable": "resistance", "machine": "resistance", "band": "resistance",
+    "bodyweight": "bodyweight", "pull_up_bar": "bodyweight", None: "bodyweight",
+}
+SAME_FAMILY = 0.9
+OTHER_EQUIPMENT = 0.75
+# Lost per difficulty level between two exercises
+DIFFICULTY_STEP = 0.15
+
+# (muscle groups, primary first; equipment; difficulty)
+Features = Tuple[Tuple[str, ...], Optional[str], Optional[str]]
+
+def similarity(a: Features, b: Features) -> float:
+    """How well ``b`` substitutes for ``a``, in [0, 1]; 0 when no muscle group is shared.
+
+    Weighted Jaccard overlap of the muscle groups, the primary one counting
+    double, scaled down for different equipment and for each difficulty
+    level between the two.
+    """
+    muscles_a, equipment_a, difficulty_a = a
+    muscles_b, equipment_b, difficulty_b = b
+    weights_a = {muscle: 2.0 if position == 0 else 1.0 for position, muscle in enumerate(muscles_a)}
+    weights_b = {muscle: 2.0 if position == 0 else 1.0 for position, muscle in enumerate(muscles_b)}
+    shared = sum(min(weight, weights_b[muscle]) for muscle, weight in weights_a.items() if muscle in weights_b)
+    if not shared:
+        return 0.0
+    overlap = shared / sum(max(weights_a.get(muscle, 0.0), weights_b.get(muscle, 0.0)) for muscle in {*weights_a, *weights_b})
+
+    if equipment_a == equipment_b:
+        equipment = 1.0
+    elif EQUIPMENT_FAMILIES.get(equipment_a, equipment_a) == EQUIPMENT_FAMILIES.get(equipment_b, equipment_b):
+        equipment = SAME_FAMILY
+    else:
+        equipment = OTHER_EQUIPMENT
+
+    levels = 0
+    if difficulty_a in DIFFICULTY_LEVELS and difficulty_b in DIFFICULTY_LEVELS:
+        levels = abs(DIFFICULTY_LEVELS.index(difficulty_a) - DIFFICULTY_LEVELS.index(difficulty_b))
+    return round(overlap * equipment * (1 - DIFFICULTY_STEP * levels), 4)
+
+class SimilarityIndex:
+    """In-process top-k nearest neighbours of every document, kept current per write.
+
+    Only documents sharing a muscle group can be similar, so candidates come
+    from an inverted index by muscle group, and scores are memoized per pair
+    of distinct feature tuples (catalog variants mostly share them).
+    Adding or removing a document scores it against its candidates once:
+    it enters the lists it now beats, and only the lists it leaves or sinks
+    in are recomputed. Lookups are a slice of a precomputed list.
+    """
+
+    def __init__(self, k: int = 50):
+        self.k = k
+        self._features: Dict[Hashable, Features] = {}
+        self._payloads: Dict[Hashable, Any] = {}
+        self._by_muscle: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._neighbors: Dict[Hashable, List[Tuple[Hashable, float]]] = {}
+        # Reverse of _neighbors: the documents whose list holds a given one
+        self._listed_by: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+        self._scores: Dict[Tuple[Features, Features], float] = {}
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def clear(self) -> None:
+        self._features.clear()
+        self._payloads.clear()
+        self._by_muscle.clear()
+        self._neighbors.clear()
+        self._listed_by.clear()
+        self._scores.clear()
+
+    def rebuild(self, documents: Iterable[Tuple[Hashable, Sequence[str], Optional[str], Optional[str], Any]]) -> None:
+        """Replace the index with ``(id, muscle_groups, equipment, difficulty, payload)`` documents"""
+        self.clear()
+        for doc_id, muscle_groups, equipment, difficulty, payload in documents:
+            self._attach(doc_id, (tuple(muscle_groups), equipment, difficulty), payload)
+        for doc_id in self._features:
+            self._set_neighbors(doc_id, self._top(doc_id))
+
+    def add(
+        self,
+        doc_id: Hashable,
+        muscle_groups: Sequence[str],
+        equipment: Optional[str],
+        difficulty: Optional[str],
+        payload: Any = None
+    ) -> None:
+        """Index (or re-index) a document and update the lists it belongs in"""
+        stale = self._detach(doc_id)
+        self._attach(doc_id, (tuple(muscle_groups), equipment, difficulty), payload)
+        candidates = self._candidates(doc_id)
+        self._set_neighbors(doc_id, self._top(doc_id, candidates))
+
+        for other, score in candidates.items():
+            if other in stale:
+                continue
+            neighbors = self._neighbors[other]
+            if len(neighbors) < self.k or _rank((doc_id, score)) < _rank(neighbors[-1]):
+                self._set_neighbors(other, sorted(neighbors + [(doc_id, score)], key=_rank)[:self.k])
+        # These lists held the old version of the document, which may have ranked higher
+        for other in stale:
+            if other in self._features:
+                self._set_neighbors(other, self._top(other))
+
+    def remove(self, doc_id: Hashable) -> None:
+        for other in self._detach(doc_id):
+            self._set_neighbors(other, self._top(other))
+
+    def neighbors(
+        self,
+        doc_id: Hashable,
+        limit: int = 10,
+        equipment: Optional[str] = None,
+        difficulty: Optional[str] = None
+    ) -> Optional[List[Tuple[Any, float]]]:
+        """Most similar (payload, score) pairs, or None for an unknown document.
+
+        Filters apply to the precomputed top ``k``, so a narrow filter can
+        return fewer than ``limit`` results.
+        """
+        if doc_id not in self._features:
+            return None
+        results = []
+        for other, score in self._neighbors[doc_id]:
+            _, other_equipment, other_difficulty = self._features[other]
+            if equipment and other_equipment != equipment:
+                continue
+            if difficulty and other_difficulty != difficulty:
+                continue
+            results.append((self._payloads[other], score))
+            if len(results) == limit:
+                break
+        return results
+
+    def _attach(self, doc_id: Hashable, features: Features, payload: Any) -> None:
+        self._features[doc_id] = features
+        self._payloads[doc_id] = payload
+        for muscle in features[0]:
+            self._by_muscle[muscle].add(doc_id)
+
+    def _detach(self, doc_id: Hashable) -> Set[Hashable]:
+        """Drop a document; returns the documents whose lists held it"""
+        features = self._features.pop(doc_id, None)
+        if features is None:
+            return set()
+        self._payloads.pop(doc_id, None)
+        for muscle in features[0]:
+            self._by_muscle[muscle].discard(doc_id)
+            if not self._by_muscle[muscle]:
+                del self._by_muscle[muscle]
+        self._set_neighbors(doc_id, [])
+        del self._neighbors[doc_id]
+        stale = self._listed_by.pop(doc_id, set())
+        for other in stale:
+            self._neighbors[other] = [entry for entry in self._neighbors[other] if entry[0] != doc_id]
+        return stale
+
+    def _candidates(self, doc_id: Hashable) -> Dict[Hashable, float]:
+        features = self._features[doc_id]
+        others = set().union(*(self._by_muscle[muscle] for muscle in features[0])) - {doc_id}
+        scores = {}
+        for other in others:
+            key = (features, self._features[other])
+            score = self._scores.get(key)
+            if score is None:
+                score = self._scores[key] = similarity(*key)
+            if score > 0:
+                scores[other] = score
+        return scores
+
+    def _top(self, doc_id: Hashable, candidates: Optional[Dict[Hashable, float]] = None) -> List[Tuple[Hashable, float]]:
+        candidates = self._candidates(doc_id) if candidates is None else candidates
+        return heapq.nsmallest(self.k, candidates.items(), key=_rank)
+
+    def _set_neighbors(self, doc_id: Hashable, neighbors: List[Tuple[Hashable, float]]) -> None:
+        for other, _ in self._neighbors.get(doc_id, ()):
+            self._listed_by[other].discard(doc_id)
+        self._neighbors[doc_id] = neighbors
+        for other, _ in neighbors:
+            self._listed_by[other].add(doc_id)
+
+def _rank(entry: Tuple[Hashable, float]) -> Tuple[float, Any]:
+    # Best score first; ids break ties so the lists do not depend on insertion order
+    return (-entry[1], entry[0])
@@ -0,0 +1,435 @@
+"""Deterministic synthetic training data at arbitrary scale.
+
+Every user is generated from its own ``Random(f"{seed}:{index}")``, so a
+user's documents (ObjectIds included) depend only on the seed, the
+configuration and the user's index. Any subset of users can be generated
+by any number of workers and the union is always the same data set.
+"""
+import calendar
+import random
+import struct
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple, Type
+
+from beanie import Document
+from bson import ObjectId
+
+from ..models.session import SessionExercise, WorkoutSession
+from ..models.split import SplitDay, WorkoutSplit
+from ..models.user import User
+from ..models.workout import Workout, WorkoutExercise
+from ..services.session_metrics import exercise_metrics
+
+# Insert order: parents only reference documents of earlier models
+GENERATED_MODELS: Tuple[Type[Document], ...] = (
+    User, WorkoutExercise, Workout, SplitDay, WorkoutSplit, SessionExercise, WorkoutSession,
+)
+
+# The hand-written catalog populate_db.py used to insert; generated variants are added after it
+BASE_EXERCISES: List[Dict[str, Any]] = [
+    {
+        "name": "Push-ups",
+        "description": "Classic bodyweight exercise for chest, shoulders, and triceps",
+        "muscle_groups": ["chest", "shoulders", "triceps"],
+        "equipment": "bodyweight",
+        "instructions": [
+            "Start in a plank position with hands shoulder-width apart",
+            "Lower your body until chest nearly touches the floor",
+            "Push back up to starting position",
+            "Keep your body straight throughout the movement"
+        ],
+        "difficulty": "beginner",
+    },
+    {
+        "name": "Bench Press",
+        "description": "Compound movement for chest, shoulders, and triceps using barbell",
+        "muscle_groups": ["chest", "shoulders", "triceps"],
+        "equipment": "barbell",
+        "instructions": [
+            "Lie on bench with feet flat on floor",
+            "Grip barbell with hands slightly wider than shoulder-width",
+            "Lower bar to chest with control",
+            "Press bar back up to starting position"
+        ],
+        "difficulty": "intermediate",
+    },
+    {
+        "name": "Squats",
+        "description": "Fundamental lower body exercise targeting quads, glutes, and hamstrings",
+        "muscle_groups": ["quadriceps", "glutes", "hamstrings"],
+        "equipment": "bodyweight",
+        "instructions": [
+            "Stand with feet shoulder-width apart",
+            "Lower body as if sitting back into a chair",
+            "Keep chest up and knees over toes",
+            "Return to standing position"
+        ],
+        "difficulty": "beginner",
+    },
+    {
+        "name": "Deadlift",
+        "description": "Compound movement targeting posterior chain",
+        "muscle_groups": ["hamstrings", "glutes", "erector_spinae", "traps"],
+        "equipment": "barbell",
+        "instructions": [
+            "Stand with feet hip-width apart, bar over mid-foot",
+            "Bend at hips and knees to grip bar",
+            "Keep chest up and back straight",
+            "Drive through heels to lift bar"
+        ],
+        "difficulty": "advanced",
+    },
+    {
+        "name": "Pull-ups",
+        "description": "Upper body pulling exercise for back and biceps",
+        "muscle_groups": ["latissimus_dorsi", "biceps", "rhomboids"],
+        "equipment": "pull_up_bar",
+        "instructions": [
+            "Hang from bar with palms facing away",
+            "Pull body up until chin clears bar",
+            "Lower with control to starting position",
+            "Avoid swinging or kipping"
+        ],
+        "difficulty": "intermediate",
+    },
+    {
+        "name": "Plank",
+        "description": "Core stability exercise",
+        "muscle_groups": ["core", "shoulders"],
+        "equipment": "bodyweight",
+        "instructions": [
+            "Start in push-up position on forearms",
+            "Keep body straight from head to heels",
+            "Hold position while breathing normally",
+            "Don't let hips sag or pike up"
+        ],
+        "difficulty": "beginner",
+    },
+    {
+        "name": "Dumbbell Rows",
+        "description": "Unilateral back exercise using dumbbells",
+        "muscle_groups": ["latissimus_dorsi", "rhomboids", "biceps"],
+        "equipment": "dumbbell",
+        "instructions": [
+            "Place one knee and hand on bench",
+            "Hold dumbbell in opposite hand",
+            "Pull dumbbell to side of torso",
+            "Lower with control"
+        ],
+        "difficulty": "beginner",
+    },
+    {
+        "name": "Shoulder Press",
+        "description": "Overhead pressing movement for shoulders",
+        "muscle_groups": ["shoulders", "triceps"],
+        "equipment": "dumbbell",
+        "instructions": [
+            "Stand with dumbbells at shoulder height",
+            "Press weights overhead until arms are extended",
+            "Lower with control to starting position",
+            "Keep core engaged throughout"
+        ],
+        "difficulty": "intermediate",
+    },
+]
+
+# Movement patterns by training focus, with the muscle groups they work
+MOVEMENTS: Dict[str, List[Tuple[str, List[str]]]] = {
+    "push": [
+        ("Chest Press", ["chest", "shoulders", "triceps"]), ("Overhead Press", ["shoulders", "triceps"]),
+        ("Chest Fly", ["chest"]), ("Lateral Raise", ["shoulders"]), ("Triceps Extension", ["triceps"]),
+        ("Dip", ["chest", "triceps"]),
+    ],
+    "pull": [
+        ("Row", ["latissimus_dorsi", "rhomboids", "biceps"]), ("Pulldown", ["latissimus_dorsi", "biceps"]),
+        ("Curl", ["biceps"]), ("Face Pull", ["shoulders", "rhomboids"]), ("Shrug", ["traps"]),
+    ],
+    "legs": [
+        ("Squat", ["quadriceps", "glutes", "hamstrings"]), ("Romanian Deadlift", ["hamstrings", "glutes"]),
+        ("Lunge", ["quadriceps", "glutes"]), ("Leg Curl", ["hamstrings"]), ("Leg Extension", ["quadriceps"]),
+        ("Calf Raise", ["calves"]), ("Hip Thrust", ["glutes", "hamstrings"]),
+    ],
+    "core": [("Crunch", ["core"]), ("Hanging Leg Raise", ["core"]), ("Pallof Press", ["core"])],
+}
+
+def _muscle_focus() -> Dict[str, str]:
+    """Focus of each muscle group: that of the first movement working it"""
+    focus_of = {"erector_spinae": "legs"}
+    for focus, movements in MOVEMENTS.items():
+        for _, muscle_groups in movements:
+            for muscle_group in muscle_groups:
+                focus_of.setdefault(muscle_group, focus)
+    return focus_of
+
+MUSCLE_FOCUS = _muscle_focus()
+EQUIPMENT = ["barbell", "dumbbell", "cable", "machine", "kettlebell", "band"]
+MODIFIERS = ["", "Incline ", "Decline ", "Seated ", "Standing ", "Single Arm ", "Paused ", "Tempo "]
+
+# Split type -> (workout name, focuses it draws exercises from) per training day of the rotation
+SPLIT_TEMPLATES: Dict[str, List[Tuple[str, List[str]]]] = {
+    "push_pull_legs": [("Push Day", ["push"]), ("Pull Day", ["pull"]), ("Leg Day", ["legs", "core"])],
+    "upper_lower": [("Upper Body", ["push", "pull"]), ("Lower Body", ["legs", "core"])],
+    "full_body": [("Full Body A", ["legs", "push", "pull"]), ("Full Body B", ["pull", "legs", "push", "core"])],
+    "bro_split": [
+        ("Chest Day", ["push"]), ("Back Day", ["pull"]), ("Shoulder Day", ["push", "pull"]),
+        ("Arm Day", ["pull", "push"]), ("Leg Day", ["legs", "core"]),
+    ],
+}
+SPLIT_POPULARITY = {"push_pull_legs": 4, "upper_lower": 3, "full_body": 3, "bro_split": 1}
+# Training days of the week (1 = Monday) for a given number of sessions per week
+WEEK_SCHEDULES = {2: [1, 4], 3: [1, 3, 5], 4: [1, 2, 4, 5], 5: [1, 2, 3, 5, 6], 6: [1, 2, 3, 4, 5, 6]}
+FITNESS_LEVELS = [("beginner", 0.6, 4), ("intermediate", 1.0, 4), ("advanced", 1.5, 2)]  # level, strength, weight
+
+def object_id(rng: random.Random, moment: datetime) -> ObjectId:
+    """Deterministic ObjectId stamped with ``moment``, so _id order follows creation time"""
+    return ObjectId(struct.pack(">I", calendar.timegm(moment.utctimetuple())) + rng.getrandbits(64).to_bytes(8, "big"))
+
+def _round_weight(weight: float) -> float:
+    return max(2.5, round(weight / 2.5) * 2.5)
+
+@dataclass
+class SyntheticConfig:
+    seed: int = 1
+    users: int = 100
+    exercises: int = 200  # Catalog size, including the hand-written base exercises
+    weeks: int = 12  # Length of each user's training history
+    open_sessions: int = 0  # In-progress sessions per user, started after the history
+    end: datetime = field(default_factory=lambda: datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0))
+    session_layout: str = "referenced"
+    workout_layout: str = "referenced"
+
+    def estimate(self) -> int:
+        """Rough number of documents the configuration produces"""
+        sessions = self.weeks * 2.7 + self.open_sessions
+        return int(self.users * (25 + sessions * (6.5 if self.session_layout == "referenced" else 1)))
+
+def build_catalog(config: SyntheticConfig) -> List[Dict[str, Any]]:
+    """The exercise catalog: the base exercises, then equipment/modifier variants of each movement"""
+    rng = random.Random(f"{config.seed}:catalog")
+    created_at = config.end - timedelta(weeks=config.weeks + 52)
+    variants = [
+        (f"{modifier}{equipment.title()} {movement}", muscle_groups, equipment)
+        for movements in MOVEMENTS.values()
+        for movement, muscle_groups in movements
+        for equipment in EQUIPMENT
+        for modifier in MODIFIERS
+    ]
+    rng.shuffle(variants)
+
+    catalog = [{"_id": object_id(rng, created_at), **exercise, "created_at": created_at} for exercise in BASE_EXERCISES]
+    for i in range(max(0, config.exercises - len(catalog))):
+        name, muscle_groups, equipment = variants[i % len(variants)]
+        if i >= len(variants):
+            name = f"{name} {i // len(variants) + 1}"
+        catalog.append({
+            "_id": object_id(rng, created_at),
+            "name": name,
+            "description": f"{name} for the {' and '.join(muscle_groups).replace('_', ' ')}",
+            "muscle_groups": list(muscle_groups),
+            "equipment": equipment,
+            "instructions": ["Set up in a stable position", "Move through the full range with control", "Return to the start"],
+            "difficulty": rng.choice(["beginner", "intermediate", "intermediate", "advanced"]),
+            "created_at": created_at,
+        })
+    return catalog[:config.exercises] if config.exercises else catalog
+
+class UserGenerator:
+    """Builds the complete, cross-referenced documents of one user at a time.
+
+    A user follows one active split (and sometimes an earlier one), trains on
+    the split's schedule with a personal adherence rate, and progresses the
+    weights of each exercise over time. Session totals, completion and
+    durations are consistent with the logged sets, as if written by the API.
+    """
+
+    def __init__(self, config: SyntheticConfig, catalog: List[Dict[str, Any]]):
+        self.config = config
+        self.catalog = catalog
+        self.by_focus: Dict[str, List[Dict[str, Any]]] = {focus: [] for focus in MOVEMENTS}
+        for exercise in catalog:
+            self.by_focus[MUSCLE_FOCUS.get(exercise["muscle_groups"][0], "core")].append(exercise)
+        self.start = config.end - timedelta(weeks=config.weeks)
+        # Monday of the first week of history
+        self.first_monday = self.start - timedelta(days=self.start.weekday())
+
+    def generate(self, index: int) -> Dict[Type[Document], List[Dict[str, Any]]]:
+        rng = random.Random(f"{self.config.seed}:{index}")
+        documents: Dict[Type[Document], List[Dict[str, Any]]] = {model: [] for model in GENERATED_MODELS}
+        level, strength, _ = rng.choices(FITNESS_LEVELS, weights=[weight for *_, weight in FITNESS_LEVELS])[0]
+
+        created_at = self.start - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86399))
+        user_id = object_id(rng, created_at)
+        documents[User].append({
+            "_id": user_id,
+            "email": f"user{index}@example.com",
+            "hashed_password": "!synthetic",
+            "first_name": "User",
+            "last_name": str(index),
+            "profile": {
+                "age": rng.randint(18, 65), "weight": round(rng.uniform(50, 110), 1),
+                "height": rng.randint(155, 200), "fitness_level": level,
+            },
+            "is_active": True,
+            "created_at": created_at,
+        })
+
+        per_week = rng.choices([2, 3, 4, 5, 6], weights=[2, 5, 4, 2, 1])[0]
+        adherence = rng.uniform(0.6, 0.95)
+        split_types = list(SPLIT_POPULARITY)
+        current_type = rng.choices(split_types, weights=list(SPLIT_POPULARITY.values()))[0]
+        splits = [(current_type, created_at)]
+        if rng.random() < 0.3 and self.config.weeks >= 4:
+            # Switched splits part-way through the history
+            switched_at = self.start + timedelta(weeks=rng.randint(1, self.config.weeks - 1))
+            previous_type = rng.choice([split_type for split_type in split_types if split_type != current_type])
+            splits = [(previous_type, created_at), (current_type, switched_at)]
+
+        weights: Dict[ObjectId, float] = {}
+        plans = []
+        for number, (split_type, since) in enumerate(splits):
+            active = number == len(splits) - 1
+            workouts = self._split(rng, documents, user_id, split_type, since, per_week, active, strength, weights)
+            plans.append((since, workouts))
+
+        self._history(rng, documents, user_id, plans, per_week, adherence, weights)
+        return documents
+
+    def _split(self, rng, documents, user_id, split_type, since, per_week, active, strength, weights):
+        template = SPLIT_TEMPLATES[split_type]
+        workouts = []
+        for name, focuses in template:
+            children = []
+            for order in range(1, rng.randint(4, 7) + 1):
+                pool = self.by_focus[focuses[(order - 1) % len(focuses)]] or self.catalog
+                exercise = rng.choice(pool)
+                bodyweight = exercise["equipment"] in ("bodyweight", "pull_up_bar")
+                if exercise["_id"] not in weights and not bodyweight:
+                    weights[exercise["_id"]] = _round_weight(rng.uniform(10, 60) * strength)
+                children.append({
+                    "_id": object_id(rng, since),
+                    "exercise_id": exercise["_id"],
+                    "sets": rng.choice([3, 3, 4, 5]),
+                    "reps": rng.choice([5, 6, 8, 10, 12, 15]),
+                    "weight": None if bodyweight else weights[exercise["_id"]],
+                    "rest_time": rng.choice([60, 90, 120, 180]),
+                    "notes": None,
+                    "order": order,
+                })
+            workout = {
+                "_id": object_id(rng, since), "name": name, "description": None, "user_id": user_id,
+                "estimated_duration": 15 + 8 * len(children),
+                "difficulty": rng.choice(["beginner", "intermediate", "advanced"]),
+                "tags": [split_type] + sorted(set(focuses)), "created_at": since, "updated_at": None,
+            }
+            self._attach(documents, workout, children, Workout, WorkoutExercise, self.config.workout_layout)
+            workouts.append((workout, children))
+
+        days = []
+        for slot, day_number in enumerate(WEEK_SCHEDULES[per_week]):
+            workout, _ = workouts[slot % len(workouts)]
+            days.append({
+                "_id": object_id(rng, since), "day_name": workout["name"], "workout_id": workout["_id"],
+                "day_number": day_number, "rest_day": False,
+            })
+        documents[SplitDay] += days
+        split_id = object_id(rng, since)
+        documents[WorkoutSplit].append({
+            "_id": split_id, "name": split_type.replace("_", " ").title(), "description": None,
+            "user_id": user_id, "days": [day["_id"] for day in days], "split_type": split_type,
+            "weeks_duration": rng.choice([None, 8, 12, 16]), "is_active": active,
+            "created_at": since, "updated_at": None,
+        })
+        return split_id, workouts
+
+    def _history(self, rng, documents, user_id, plans, per_week, adherence, weights):
+        schedule = WEEK_SCHEDULES[per_week]
+        rotation = 0
+        moments = []
+        for week in range(self.config.weeks + 1):
+            for day_number in schedule:
+                day = self.first_monday + timedelta(weeks=week, days=day_number - 1)
+                if self.start <= day < self.config.end and rng.random() < adherence:
+                    moments.append((day + timedelta(hours=rng.randint(6, 20), minutes=rng.randint(0, 59)), "completed"))
+        last = moments[-1][0] if moments else self.config.end
+        for n in range(self.config.open_sessions):
+            moments.append((max(last, self.config.end) + timedelta(hours=n + 1), "in_progress"))
+
+        for started_at, status in moments:
+            split_id, workouts = plans[0][1]
+            for since, plan in plans:
+                if since <= started_at:
+                    split_id, workouts = plan
+            workout, planned = workouts[rotation % len(workouts)]
+            rotation += 1
+            if status == "completed" and rng.random() < 0.03:
+                status = "abandoned"
+            logged = len(planned) if status == "completed" else rng.randrange(len(planned))
+            self._session(rng, documents, user_id, split_id, workout, planned[:logged], len(planned), started_at, status, weights)
+
+    def _session(self, rng, documents, user_id, split_id, workout, planned, planned_count, started_at, status, weights):
+        children = []
+        moment = started_at
+        for workout_exercise in planned:
+            moment += timedelta(minutes=rng.randint(5, 12))
+            skipped = rng.random() < 0.05
+            actual_sets = []
+            if not skipped:
+                weight = weights.get(workout_exercise["exercise_id"])
+                for _ in range(max(1, workout_exercise["sets"] - (rng.random() < 0.15))):
+                    actual_sets.append({
+                        "reps": max(1, workout_exercise["reps"] + rng.randint(-2, 1)),
+                        "weight": weight,
+                        "rpe": rng.choice([6, 7, 7, 8, 8, 9, 10]),
+                    })
+                # Progressive overload with the occasional deload
+                if weight is not None:
+                    roll = rng.random()
+                    if roll < 0.25:
+                        weights[workout_exercise["exercise_id"]] = weight + 2.5
+                    elif roll < 0.27:
+                        weights[workout_exercise["exercise_id"]] = _round_weight(weight * 0.9)
+            children.append({
+                "_id": object_id(rng, moment),
+                "exercise_id": workout_exercise["exercise_id"],
+                "workout_exercise_id": workout_exercise["_id"],
+                "sets_completed": len(actual_sets),
+                "actual_sets": actual_sets,
+                "notes": None,
+                "skipped": skipped,
+                "completed_at": None if skipped else moment,
+            })
+
+        totals = {"total_volume": 0.0, "total_reps": 0, "total_sets": 0, "completed_exercises": 0}
+        for child in children:
+            for metric, value in exercise_metrics(child).items():
+                totals[metric] += value
+        completed_at = moment + timedelta(minutes=rng.randint(0, 10)) if status == "completed" else None
+        session = {
+            "_id": object_id(rng, started_at),
+            "workout_id": workout["_id"],
+            "user_id": user_id,
+            "split_id": split_id,
+            "session_name": workout["name"],
+            "started_at": started_at,
+            "completed_at": completed_at,
+            "duration": int((completed_at - started_at).total_seconds() // 60) if completed_at else None,
+            **totals,
+            "planned_exercises": planned_count,
+            "status": status,
+            "completion_percentage": round(totals["completed_exercises"] / planned_count * 100, 1) if planned_count else None,
+            "notes": None,
+            "difficulty_rating": rng.randint(5, 9) if completed_at else None,
+            "energy_level": rng.randint(4, 9) if completed_at else None,
+            "created_at": started_at,
+        }
+        self._attach(documents, session, children, WorkoutSession, SessionExercise, self.config.session_layout)
+
+    @staticmethod
+    def _attach(documents, parent, children, parent_model, child_model, layout):
+        """Store ``children`` in their own collection or inside ``parent``, per ``layout``"""
+        parent["exercises"] = [child["_id"] for child in children]
+        parent["embedded_exercises"] = children if layout == "embedded" else None
+        if layout != "embedded":
+            documents[child_model] += children
+        documents[parent_model].append(parent)
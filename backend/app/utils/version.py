@@ -0,0 +1,82 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+import time
+
+from pymongo import ReturnDocument
+
+class VersionCounter:
+    """A version number stored in MongoDB and bumped by every write to the data it versions.
+
+    Reads are answered from memory and refreshed with one _id lookup at
+    most every ``ttl`` seconds, so writes made by other workers are seen
+    within ``ttl`` and this worker's own writes immediately. ``on_change``
+    runs whenever a refresh finds a version this worker has not seen.
+
+    With ``log_size``, the counter document also keeps what the last
+    ``log_size`` bumps changed, so a worker behind by a few versions can
+    apply just those changes (see ``changes_since``).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        collection: Callable[[], Any],
+        ttl: float = 1.0,
+        on_change: Optional[Callable[[], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        log_size: int = 0
+    ):
+        self.name = name
+        self._collection = collection
+        self.ttl = ttl
+        self.log_size = log_size
+        self._on_change = on_change
+        self._clock = clock
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    async def get(self) -> int:
+        if self._version is None or self._clock() - self._checked_at >= self.ttl:
+            document = await self._collection().find_one({"_id": self.name}, projection={"version": 1})
+            self._observe(document["version"] if document else 0)
+        return self._version
+
+    async def bump(self, changed: Optional[Iterable[str]] = None) -> int:
+        """Move to the next version; ``changed`` are the ids it changed, None when unknown"""
+        update: Dict[str, Any] = {"$inc": {"version": 1}}
+        if self.log_size:
+            # Same update as the increment: the last log entry always belongs to the stored version
+            entry = sorted(set(changed)) if changed is not None else None
+            update["$push"] = {"changes": {"$each": [entry], "$slice": -self.log_size}}
+        document = await self._collection().find_one_and_update(
+            {"_id": self.name},
+            update,
+            projection={"version": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._observe(document["version"])
+        return self._version
+
+    async def changes_since(self, version: int) -> Optional[Tuple[int, Set[str]]]:
+        """The stored version and the ids changed after ``version``.
+
+        None when the log does not reach back that far or a bump in between
+        did not record its ids; the caller then has to reload everything.
+        """
+        document = await self._collection().find_one({"_id": self.name}, projection={"version": 1, "changes": 1})
+        current = document["version"] if document else 0
+        self._observe(current)
+        if current <= version:
+            return current, set()
+        entries = (document.get("changes") or [])[-(current - version):]
+        if len(entries) < current - version or any(entry is None for entry in entries):
+            return None
+        return current, {changed for entry in entries for changed in entry}
+
+    def _observe(self, version: int) -> None:
+        changed = self._version is not None and version > self._version
+        # Never go back: a slower read must not undo a newer bump
+        self._version = max(version, self._version or 0)
+        self._checked_at = self._clock()
+        if changed and self._on_change is not None:
+            self._on_change()
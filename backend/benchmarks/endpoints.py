@@ -0,0 +1,454 @@
+"""Drive the API with concurrent clients and record throughput and latency per route.
+
+Boots the FastAPI app in-process (lifespan included), seeds a scratch
+database with a configurable amount of data and replays a fixed mix of
+requests against every read and write route through an ASGI transport, so
+results measure the application and the database, not the network stack.
+
+By default the database is an in-memory MongoDB stand-in (mongomock-motor,
+``pip install -r requirements-dev.txt``); pass ``--mongo-url`` to run against a real
+server instead. Absolute numbers from the stand-in are not comparable with
+production, but relative changes between two runs of the same commit are.
+
+    python -m benchmarks.endpoints --users 20 --weeks 12 --output before.json
+    python -m benchmarks.endpoints --mongo-url mongodb://localhost:27017 --concurrency 32
+    python -m benchmarks.endpoints --baseline before.json --max-regression 0.25
+
+With ``--baseline`` the run is compared route by route with an earlier
+result file and exits with status 1 when a p95 latency grew by more than
+``--max-regression`` (a fraction), or a route started failing.
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from app.core import database
+from app.core.config import settings
+from app.core.startup import startup
+from app.services.history import HistoryService
+from app.services.record import PersonalRecordService
+from app.services.rollup import RollupService
+from app.services.schedule import ScheduleService
+from app.services.set_history import SetHistoryService
+from app.utils.synthetic import EQUIPMENT, MUSCLE_FOCUS, SyntheticConfig, UserGenerator, build_catalog
+
+from .stand_in import use_mongomock
+
+MUSCLE_GROUPS = sorted(MUSCLE_FOCUS)
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+
+@dataclass
+class Dataset:
+    """Ids of the seeded documents that requests are built from"""
+    users: List[str] = field(default_factory=list)
+    exercises: List[str] = field(default_factory=list)
+    exercise_names: List[str] = field(default_factory=list)
+    disposable_exercises: List[str] = field(default_factory=list)  # Consumed by the delete scenario
+    workouts: Dict[str, List[str]] = field(default_factory=dict)  # user -> workouts
+    workout_exercises: Dict[str, List[Tuple[str, str]]] = field(default_factory=dict)  # workout -> (id, exercise_id)
+    splits: List[str] = field(default_factory=list)
+    split_owners: Dict[str, str] = field(default_factory=dict)  # split -> user
+    sessions: List[str] = field(default_factory=list)
+    in_progress: List[Tuple[str, str, str]] = field(default_factory=list)  # (user, session, workout)
+    session_exercises: List[Tuple[str, str]] = field(default_factory=list)  # (session, session exercise)
+    exports: Dict[str, bytes] = field(default_factory=dict)  # user -> NDJSON history export
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Returns the path and body of one request: a dict is sent as JSON, bytes as they are
+    build: Callable[[random.Random, Dataset], Tuple[str, Optional[Union[Dict[str, Any], bytes]]]]
+    expect: Tuple[int, ...] = (200,)
+
+def _sets(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    weight = rng.choice([20.0, 40.0, 60.0, 80.0, 100.0])
+    return [
+        {"reps": rng.randint(5, 12), "weight": weight + 2.5 * i, "rpe": rng.choice([7, 8, 9])}
+        for i in range(count)
+    ]
+
+async def seed(args) -> Dataset:
+    """Insert the synthetic data set populate_db.py generates, and collect the ids requests need"""
+    from app.models.exercise import Exercise
+    from app.models.session import WorkoutSession
+    from app.models.split import WorkoutSplit
+    from app.models.user import User
+    from app.models.workout import Workout, WorkoutExercise
+
+    config = SyntheticConfig(
+        seed=args.seed,
+        users=args.users,
+        exercises=args.exercises,
+        weeks=args.weeks,
+        # Sessions left open for the write scenarios; each completion consumes one
+        open_sessions=-(-(args.requests + args.warmup) // max(1, args.users)),
+        session_layout=settings.session_exercise_storage,
+        workout_layout=args.workout_layout,
+    )
+    catalog = build_catalog(config)
+    await Exercise.get_motor_collection().insert_many(catalog)
+    data = Dataset(
+        exercises=[str(exercise["_id"]) for exercise in catalog],
+        exercise_names=[exercise["name"] for exercise in catalog],
+    )
+    # Deleted one per request, so the catalog the other scenarios read stays intact
+    disposable = await Exercise.get_motor_collection().insert_many([
+        {"name": f"Disposable exercise {index}", "muscle_groups": [MUSCLE_GROUPS[index % len(MUSCLE_GROUPS)]],
+         "instructions": [], "difficulty": DIFFICULTIES[index % len(DIFFICULTIES)]}
+        for index in range(args.requests + args.warmup)
+    ])
+    data.disposable_exercises = [str(exercise_id) for exercise_id in disposable.inserted_ids]
+
+    generator = UserGenerator(config, catalog)
+    for index in range(config.users):
+        documents = generator.generate(index)
+        for model, batch in documents.items():
+            if batch:
+                await model.get_motor_collection().insert_many(batch)
+
+        user_id = str(documents[User][0]["_id"])
+        data.users.append(user_id)
+        data.workouts[user_id] = [str(workout["_id"]) for workout in documents[Workout]]
+        data.splits += [str(split["_id"]) for split in documents[WorkoutSplit]]
+        data.split_owners.update((str(split["_id"]), user_id) for split in documents[WorkoutSplit])
+        workout_exercises = {child["_id"]: child for child in documents[WorkoutExercise]}
+        for workout in documents[Workout]:
+            children = workout["embedded_exercises"]
+            if children is None:
+                children = [workout_exercises[child_id] for child_id in workout["exercises"]]
+            data.workout_exercises[str(workout["_id"])] = [
+                (str(child["_id"]), str(child["exercise_id"])) for child in children
+            ]
+        for session in documents[WorkoutSession]:
+            session_id = str(session["_id"])
+            if session["status"] == "in_progress":
+                data.in_progress.append((user_id, session_id, str(session["workout_id"])))
+            else:
+                data.sessions.append(session_id)
+            data.session_exercises += [(session_id, str(child_id)) for child_id in session["exercises"]]
+
+    # Derived collections are built the same way the management commands build them
+    await RollupService().backfill()
+    await PersonalRecordService().rebuild()
+    await SetHistoryService().backfill()
+    await ScheduleService().rebuild()
+
+    # Imported back into the same user, so every line takes the duplicate check
+    for user_id in data.users:
+        data.exports[user_id] = b"".join([chunk async for chunk in HistoryService().export_user_history(user_id)])
+    return data
+
+def _workout(rng: random.Random, data: Dataset) -> str:
+    return rng.choice(data.workouts[rng.choice(data.users)])
+
+def _add_exercise(rng: random.Random, data: Dataset):
+    _, session_id, workout_id = rng.choice(data.in_progress)
+    workout_exercise_id, exercise_id = rng.choice(data.workout_exercises[workout_id])
+    return f"/api/v1/sessions/{session_id}/exercises", {
+        "exercise_id": exercise_id, "workout_exercise_id": workout_exercise_id,
+        "sets_completed": 3, "actual_sets": _sets(rng, 3),
+    }
+
+def _update_exercise(rng: random.Random, data: Dataset):
+    session_id, session_exercise_id = rng.choice(data.session_exercises)
+    return f"/api/v1/sessions/{session_id}/exercises/{session_exercise_id}", {
+        "sets_completed": 4, "actual_sets": _sets(rng, 4),
+    }
+
+def _complete(rng: random.Random, data: Dataset):
+    # Each open session is completed once, so every request takes the full completion path
+    _, session_id, _ = data.in_progress.pop(rng.randrange(len(data.in_progress)))
+    return f"/api/v1/sessions/{session_id}/complete", None
+
+def _skip(rng: random.Random, data: Dataset):
+    session_id, session_exercise_id = rng.choice(data.session_exercises)
+    return f"/api/v1/sessions/{session_id}/exercises/{session_exercise_id}/skip", None
+
+def _split_days(rng: random.Random, data: Dataset, user_id: str) -> List[Dict[str, Any]]:
+    workouts = data.workouts[user_id]
+    return [
+        {"day_name": f"Day {day_number}", "workout_id": rng.choice(workouts), "day_number": day_number}
+        for day_number in sorted(rng.sample(range(1, 8), 3))
+    ]
+
+def _create_split(rng: random.Random, data: Dataset):
+    user_id = rng.choice(data.users)
+    return f"/api/v1/users/{user_id}/splits", {
+        "name": f"Bench split {rng.getrandbits(32):x}", "split_type": "full_body",
+        "days": _split_days(rng, data, user_id),
+    }
+
+def _replace_days(rng: random.Random, data: Dataset):
+    split_id = rng.choice(data.splits)
+    return f"/api/v1/splits/{split_id}/days", _split_days(rng, data, data.split_owners[split_id])
+
+def _record(rng: random.Random, data: Dataset):
+    user_id = rng.choice(data.users)
+    exercise_id = rng.choice(data.workout_exercises[rng.choice(data.workouts[user_id])])[1]
+    return f"/api/v1/users/{user_id}/records/{exercise_id}", None
+
+def _bulk(rng: random.Random, data: Dataset):
+    return "/api/v1/exercises/bulk", {"operations": [
+        {"op": "upsert", "data": {
+            "name": name, "muscle_groups": rng.sample(MUSCLE_GROUPS, 2),
+            "difficulty": rng.choice(DIFFICULTIES),
+        }}
+        for name in rng.sample(data.exercise_names, 10)
+    ]}
+
+SCENARIOS: List[Scenario] = [
+    Scenario("health.ready", "GET", lambda rng, data: ("/health/ready", None)),
+    Scenario("exercises.list", "GET", lambda rng, data: (
+        f"/api/v1/exercises?limit=50&skip={rng.randrange(0, max(1, len(data.exercises) - 50))}", None
+    )),
+    Scenario("exercises.list_filtered", "GET", lambda rng, data: (
+        f"/api/v1/exercises?muscle_group={rng.choice(MUSCLE_GROUPS)}&difficulty={rng.choice(DIFFICULTIES)}", None
+    )),
+    Scenario("exercises.get", "GET", lambda rng, data: (f"/api/v1/exercises/{rng.choice(data.exercises)}", None)),
+    Scenario("exercises.search", "GET", lambda rng, data: (
+        f"/api/v1/exercises/search?q={rng.choice(data.exercise_names).split()[-1].lower()[:-1]}", None
+    )),
+    Scenario("workouts.get", "GET", lambda rng, data: (f"/api/v1/workouts/{_workout(rng, data)}", None)),
+    Scenario("workouts.list", "GET", lambda rng, data: (f"/api/v1/users/{rng.choice(data.users)}/workouts", None)),
+    Scenario("splits.get", "GET", lambda rng, data: (f"/api/v1/splits/{rng.choice(data.splits)}", None)),
+    Scenario("splits.list", "GET", lambda rng, data: (f"/api/v1/users/{rng.choice(data.users)}/splits", None)),
+    Scenario("sessions.get", "GET", lambda rng, data: (f"/api/v1/sessions/{rng.choice(data.sessions)}", None)),
+    Scenario("sessions.summary", "GET", lambda rng, data: (
+        f"/api/v1/sessions/{rng.choice(data.sessions)}/summary", None
+    )),
+    Scenario("sessions.list", "GET", lambda rng, data: (f"/api/v1/users/{rng.choice(data.users)}/sessions", None)),
+    Scenario("rollups.list", "GET", lambda rng, data: (
+        f"/api/v1/users/{rng.choice(data.users)}/rollups?period={rng.choice(['day', 'week', 'month'])}", None
+    )),
+    Scenario("records.list", "GET", lambda rng, data: (f"/api/v1/users/{rng.choice(data.users)}/records", None)),
+    Scenario("sets.history", "GET", lambda rng, data: (
+        f"/api/v1/users/{(user := rng.choice(data.users))}/exercises/"
+        f"{rng.choice(data.workout_exercises[rng.choice(data.workouts[user])])[1]}/sets", None
+    )),
+    # Exercises planned but never logged have no record yet
+    Scenario("records.get", "GET", _record, expect=(200, 404)),
+    Scenario("exercises.alternatives", "GET", lambda rng, data: (
+        f"/api/v1/exercises/{rng.choice(data.exercises)}/alternatives", None
+    )),
+    Scenario("recommendations.workout", "GET", lambda rng, data: (
+        f"/api/v1/users/{rng.choice(data.users)}/recommendations/workout", None
+    )),
+    # Users without an active split have no schedule
+    Scenario("schedule.get", "GET", lambda rng, data: (
+        f"/api/v1/users/{rng.choice(data.users)}/schedule?days=14", None
+    ), expect=(200, 404)),
+    Scenario("schedule.today", "GET", lambda rng, data: (
+        f"/api/v1/users/{rng.choice(data.users)}/schedule/today", None
+    ), expect=(200, 404)),
+    Scenario("history.export", "GET", lambda rng, data: (
+        f"/api/v1/users/{rng.choice(data.users)}/history/export", None
+    )),
+    Scenario("exercises.create", "POST", lambda rng, data: ("/api/v1/exercises", {
+        "name": f"Bench exercise {rng.getrandbits(48):x}", "muscle_groups": rng.sample(MUSCLE_GROUPS, 2),
+        "equipment": rng.choice(EQUIPMENT), "difficulty": rng.choice(DIFFICULTIES),
+    }), expect=(201,)),
+    Scenario("exercises.update", "PUT", lambda rng, data: (
+        f"/api/v1/exercises/{rng.choice(data.exercises)}", {"description": f"Revision {rng.getrandbits(32)}"}
+    )),
+    Scenario("exercises.bulk", "POST", _bulk),
+    Scenario("exercises.delete", "DELETE", lambda rng, data: (
+        f"/api/v1/exercises/{data.disposable_exercises.pop()}", None
+    ), expect=(204,)),
+    Scenario("history.import", "POST", lambda rng, data: (
+        f"/api/v1/users/{(user := rng.choice(data.users))}/history/import", data.exports[user]
+    )),
+    Scenario("splits.create", "POST", _create_split, expect=(201,)),
+    Scenario("splits.update", "PUT", lambda rng, data: (
+        f"/api/v1/splits/{rng.choice(data.splits)}", {"description": f"Revision {rng.getrandbits(32)}"}
+    )),
+    Scenario("splits.replace_days", "PUT", _replace_days),
+    Scenario("splits.activate", "POST", lambda rng, data: (f"/api/v1/splits/{rng.choice(data.splits)}/activate", None)),
+    Scenario("sessions.create", "POST", lambda rng, data: (
+        f"/api/v1/users/{(user := rng.choice(data.users))}/sessions",
+        {"workout_id": rng.choice(data.workouts[user])}
+    ), expect=(201,)),
+    Scenario("sessions.add_exercise", "POST", _add_exercise, expect=(201,)),
+    Scenario("sessions.update_exercise", "PUT", _update_exercise),
+    Scenario("sessions.skip_exercise", "POST", _skip),
+    Scenario("sessions.reconcile", "POST", lambda rng, data: (
+        f"/api/v1/sessions/{rng.choice(data.sessions)}/reconcile", None
+    )),
+    Scenario("sessions.complete", "POST", _complete),
+]
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sample"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, data: Dataset, args) -> Dict[str, Any]:
+    rng = random.Random(f"{args.seed}:{scenario.name}")
+    # Requests are built up front so the timed loop only sends them
+    warmup = [scenario.build(rng, data) for _ in range(args.warmup)]
+    calls = [scenario.build(rng, data) for _ in range(args.requests)]
+    latencies: List[float] = []
+    failures: Dict[str, int] = {}
+
+    async def worker(queue: List[Tuple[str, Optional[Dict[str, Any]]]], record: bool):
+        while queue:
+            path, body = queue.pop()
+            started = time.perf_counter()
+            if isinstance(body, bytes):
+                response = await client.request(scenario.method, path, content=body)
+            else:
+                response = await client.request(scenario.method, path, json=body)
+            await response.aread()
+            elapsed = (time.perf_counter() - started) * 1000
+            if not record:
+                continue
+            latencies.append(elapsed)
+            if response.status_code not in scenario.expect:
+                failures[str(response.status_code)] = failures.get(str(response.status_code), 0) + 1
+
+    await asyncio.gather(*(worker(warmup, False) for _ in range(args.concurrency)))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(calls, True) for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "method": scenario.method,
+        "requests": len(ordered),
+        "errors": sum(failures.values()),
+        "error_statuses": failures,
+        "throughput_rps": round(len(ordered) / wall, 1) if wall else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Print per-route changes against ``baseline``; returns the routes that regressed"""
+    regressed = []
+    print(f"\n{'route':<26} {'p95 before':>11} {'p95 now':>9} {'change':>8} {'rps change':>11}")
+    for name, now in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            print(f"{name:<26} {'-':>11} {now['p95_ms']:>9.2f}       new")
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        rps_change = (now["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] if before["throughput_rps"] else 0.0
+        failing = now["errors"] and not before["errors"]
+        flag = ""
+        if change > max_regression or failing:
+            regressed.append(name)
+            flag = "  REGRESSION" if not failing else "  NOW FAILING"
+        print(f"{name:<26} {before['p95_ms']:>11.2f} {now['p95_ms']:>9.2f} {change:>+8.0%} {rps_change:>+11.0%}{flag}")
+    return regressed
+
+async def main(args) -> int:
+    if args.mongo_url:
+        settings.mongodb_url = args.mongo_url
+    else:
+        try:
+            use_mongomock()
+        except ImportError:
+            raise SystemExit("mongomock-motor is not installed: pip install -r requirements-dev.txt, or pass --mongo-url")
+    settings.database_name = f"{settings.database_name or 'grow_ai'}_bench_endpoints"
+    # Exercise list responses are otherwise served from the catalog cache after the first hit
+    if args.no_cache:
+        settings.exercise_cache_ttl = 0
+
+    from app.main import app, exercise_service
+
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if not args.only or any(fnmatch.fnmatch(scenario.name, pattern) for pattern in args.only)
+    ]
+    results: Dict[str, Any] = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "revision": git_revision(),
+            "backend": "mongod" if args.mongo_url else "mongomock",
+            "python": platform.python_version(),
+            "session_exercise_storage": settings.session_exercise_storage,
+            "workout_exercise_storage": args.workout_layout,
+            "hydration_strategy": settings.hydration_strategy,
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        },
+        "scenarios": {},
+    }
+
+    async with app.router.lifespan_context(app):
+        while not startup.ready:
+            await asyncio.sleep(0.05)
+        await database.mongodb_client.drop_database(settings.database_name)
+        try:
+            started = time.perf_counter()
+            data = await seed(args)
+            # The lifespan loaded the (then empty) catalog before seeding; the
+            # seed wrote it directly, so announce the new version and reload
+            await exercise_service.catalog_version.bump()
+            await exercise_service.preload()
+            print(f"Seeded {args.users} users in {time.perf_counter() - started:.1f}s "
+                  f"({results['meta']['backend']}, concurrency {args.concurrency})")
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                print(f"{'route':<26} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+                for scenario in scenarios:
+                    result = await run_scenario(client, scenario, data, args)
+                    results["scenarios"][scenario.name] = result
+                    print(f"{scenario.name:<26} {result['throughput_rps']:>8.1f} {result['p50_ms']:>8.2f} "
+                          f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>7}")
+        finally:
+            await database.mongodb_client.drop_database(settings.database_name)
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressed = compare(results, json.load(handle), args.max_regression)
+        if regressed:
+            print(f"\n{len(regressed)} route(s) regressed: {', '.join(regressed)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", help="Benchmark against this server instead of the in-memory stand-in")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--exercises", type=int, default=300, help="Catalog size")
+    parser.add_argument("--weeks", type=int, default=12, help="Weeks of training history per user")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per route")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per route")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workout-layout", choices=["referenced", "embedded"], default="referenced", help="Where workout exercises are stored")
+    parser.add_argument("--only", nargs="+", metavar="PATTERN", help="Route name patterns, e.g. 'exercises.*'")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the exercise catalog cache")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with an earlier results file")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 growth against the baseline")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,86 @@
+"""Compare batched $in hydration (ReferenceLoader) with the $lookup aggregation.
+
+Seeds a scratch database with workouts and their WorkoutExercise references,
+then times both strategies for the same page of workouts:
+
+    python -m benchmarks.hydration --workouts 2000 --exercises-per-workout 8 --page-size 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+
+from app.core.config import settings
+from app.models.exercise import Exercise
+from app.models.workout import Workout, WorkoutExercise
+from app.services.loader import aggregate_with_children
+from app.services.workout import WORKOUT_SORT, WorkoutService
+
+async def seed(user_id: ObjectId, workouts: int, exercises_per_workout: int, catalog_size: int):
+    catalog = [{"_id": ObjectId(), "name": f"Exercise {i}", "muscle_groups": ["chest"]} for i in range(catalog_size)]
+    await Exercise.get_motor_collection().insert_many(catalog)
+
+    for start in range(0, workouts, 500):
+        workout_docs, child_docs = [], []
+        for i in range(start, min(start + 500, workouts)):
+            children = [
+                {
+                    "_id": ObjectId(),
+                    "exercise_id": catalog[(i + j) % catalog_size]["_id"],
+                    "sets": 3, "reps": 10, "order": j + 1,
+                }
+                for j in range(exercises_per_workout)
+            ]
+            child_docs += children
+            workout_docs.append({
+                "_id": ObjectId(), "name": f"Workout {i}", "user_id": user_id,
+                "exercises": [child["_id"] for child in children],
+                "difficulty": "beginner", "tags": [], "created_at": datetime.utcnow(),
+            })
+        await WorkoutExercise.get_motor_collection().insert_many(child_docs)
+        await Workout.get_motor_collection().insert_many(workout_docs)
+
+async def time_it(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+async def main(args):
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    database_name = f"{settings.database_name or 'grow_ai'}_bench_hydration"
+    await init_beanie(database=client[database_name], document_models=[Exercise, Workout, WorkoutExercise])
+    user_id = ObjectId()
+    try:
+        await seed(user_id, args.workouts, args.exercises_per_workout, args.catalog_size)
+
+        async def batched():
+            await WorkoutService().get_user_workouts(str(user_id), limit=args.page_size)
+
+        async def lookup():
+            await aggregate_with_children(
+                Workout, WorkoutExercise, {"user_id": user_id}, WORKOUT_SORT, args.page_size
+            )
+
+        for name, fn in (("loader ($in)", batched), ("$lookup", lookup)):
+            median, best = await time_it(fn, args.repeat)
+            print(f"{name:<14} median {median:8.2f} ms   best {best:8.2f} ms")
+    finally:
+        await client.drop_database(database_name)
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workouts", type=int, default=2000)
+    parser.add_argument("--exercises-per-workout", type=int, default=8)
+    parser.add_argument("--catalog-size", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""Compare the response_model serialization path with the raw-document fast path.
+
+Works on in-memory documents shaped like the ``exercises`` collection; the
+database is only contacted once, to initialise Beanie:
+
+    python -m benchmarks.serialization --sizes 1 100 1000 --repeat 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.models.exercise import Exercise
+from app.schemas.exercise import ExerciseResponse
+from app.services.exercise import EXERCISE_FIELDS
+from app.utils.projection import view_model
+from app.utils.serialization import dump_documents, list_adapter
+
+def raw_exercises(count: int) -> List[dict]:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Exercise {i}",
+            "description": "Compound movement for the upper body",
+            "muscle_groups": ["chest", "shoulders", "triceps"],
+            "equipment": "barbell",
+            "instructions": ["Set up", "Lower the bar to the chest", "Press back up"],
+            "difficulty": "intermediate",
+            "created_at": datetime.utcnow(),
+        }
+        for i in range(count)
+    ]
+
+def current_path(documents: List[dict]) -> bytes:
+    """What a handler returning List[ExerciseResponse] costs today"""
+    exercises = [Exercise.model_validate(document) for document in documents]
+    responses = [ExerciseResponse(id=str(exercise.id), **exercise.dict(exclude={"id"})) for exercise in exercises]
+    # FastAPI validates the return value against response_model, then encodes it
+    validated = list_adapter(ExerciseResponse).validate_python(responses)
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+def fast_path(documents: List[dict]) -> bytes:
+    return dump_documents(documents, view_model(Exercise, EXERCISE_FIELDS))
+
+def time_it(fn, documents: List[dict], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(documents)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+async def main(args):
+    # Beanie documents can only be built once their model is initialised
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    database_name = f"{settings.database_name or 'grow_ai'}_bench_serialization"
+    await init_beanie(database=client[database_name], document_models=[Exercise], skip_indexes=True)
+
+    print(f"{'items':>6} {'current ms':>11} {'fast ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        documents = raw_exercises(size)
+        current = time_it(current_path, documents, args.repeat)
+        fast = time_it(fast_path, documents, args.repeat)
+        print(f"{size:>6} {current:>11.3f} {fast:>9.3f} {current / fast:>7.1f}x")
+    client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
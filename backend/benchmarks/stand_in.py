@@ -0,0 +1,49 @@
+"""In-memory MongoDB stand-in (mongomock-motor) shared by the benchmarks and the tests.
+
+Requires ``requirements-dev.txt``.
+"""
+from typing import Iterable, Type
+
+from beanie import Document
+
+from app.core import database
+from app.core.config import settings
+
+_patched = False
+
+def use_mongomock() -> None:
+    """Make connect_to_mongo() open an in-memory mongomock-motor client.
+
+    Raises ImportError when mongomock-motor is not installed.
+    """
+    global _patched
+    import mongomock.collection
+    from mongomock_motor import AsyncMongoMockClient
+
+    if not _patched:
+        # PyMongo 4.9+ passes ``sort`` for UpdateOne/ReplaceOne, which mongomock's bulk builder predates
+        builder = mongomock.collection.BulkOperationBuilder
+        for method in ("add_update", "add_replace"):
+            original = getattr(builder, method)
+            setattr(builder, method, lambda self, *a, _original=original, sort=None, **k: _original(self, *a, **k))
+        _patched = True
+
+    database.AsyncIOMotorClient = lambda url, **options: AsyncMongoMockClient()
+    # $indexStats is not implemented by the stand-in
+    settings.index_check_mode = "off"
+
+async def recreate_partial_indexes(models: Iterable[Type[Document]]) -> None:
+    """Recreate the partial indexes of ``models``; mongomock drops the filter of an IndexModel, not of create_index"""
+    for model in models:
+        collection = model.get_motor_collection()
+        for index in getattr(model.Settings, "indexes", None) or []:
+            document = index.document
+            if "partialFilterExpression" not in document:
+                continue
+            await collection.drop_index(document["name"])
+            await collection.create_index(
+                list(document["key"].items()),
+                name=document["name"],
+                unique=document.get("unique", False),
+                partialFilterExpression=document["partialFilterExpression"]
+            )
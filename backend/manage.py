@@ -0,0 +1,145 @@
+"""Maintenance jobs for the Grow AI database.
+
+    python manage.py reconcile-sessions [--user USER_ID]
+    python manage.py backfill-rollups [--user USER_ID]
+    python manage.py rebuild-records [--user USER_ID]
+    python manage.py migrate-storage {sessions,workouts} [--to {referenced,embedded}]
+    python manage.py recommend-workouts [--user USER_ID] [--size N]
+    python manage.py rebuild-schedules [--user USER_ID]
+    python manage.py backfill-set-buckets [--user USER_ID]
+    python manage.py dedupe-exercise-names
+    python manage.py dedupe-active-splits
+"""
+import argparse
+import asyncio
+import time
+
+from bson import ObjectId
+
+from app.core.database import connect_to_mongo, close_mongo_connection
+
+async def reconcile_sessions(args):
+    from app.services.session_metrics import SessionMetricsAggregator
+
+    query = {"user_id": ObjectId(args.user)} if args.user else {}
+    count = await SessionMetricsAggregator().reconcile_all(query, batch_size=args.batch_size)
+    print(f"✅ Reconciled totals of {count} sessions")
+
+async def backfill_rollups(args):
+    from app.services.rollup import RollupService
+
+    count = await RollupService().backfill(args.user, batch_size=args.batch_size)
+    print(f"✅ Rolled up {count} completed sessions")
+
+async def rebuild_records(args):
+    from app.services.record import PersonalRecordService
+
+    count = await PersonalRecordService().rebuild(args.user, batch_size=args.batch_size)
+    print(f"✅ Rebuilt {count} personal records")
+
+async def migrate_storage(args):
+    from app.core.config import settings
+    from app.services.storage import ExerciseStorageMigrator
+
+    layout = args.to or (settings.session_exercise_storage if args.collection == "sessions" else None)
+    if layout is None:
+        raise SystemExit("❌ --to is required for workouts")
+    migrator = ExerciseStorageMigrator(args.collection)
+    count = await migrator.migrate(layout, batch_size=args.batch_size)
+    remaining = await migrator.pending(layout)
+    print(f"✅ Moved {count} {args.collection} to the {layout} layout ({remaining} still pending)")
+
+async def recommend_workouts(args):
+    from app.services.recommendation import RecommendationService
+
+    count = await RecommendationService().generate_all(args.user, size=args.size, batch_size=args.batch_size)
+    print(f"✅ Generated workout drafts for {count} users")
+
+async def rebuild_schedules(args):
+    from app.services.schedule import ScheduleService
+
+    count = await ScheduleService().rebuild(args.user, batch_size=args.batch_size)
+    print(f"✅ Materialized {count} split schedules")
+
+async def backfill_set_buckets(args):
+    from app.services.set_history import SetHistoryService
+
+    count = await SetHistoryService().backfill(args.user, batch_size=args.batch_size)
+    print(f"✅ Bucketed the sets of {count} session exercises")
+
+async def dedupe_exercise_names(args):
+    from app.services.exercise import ExerciseService
+
+    count = await ExerciseService().dedupe_names()
+    print(f"✅ Renamed {count} exercises with a duplicate name")
+
+async def dedupe_active_splits(args):
+    from app.services.split import SplitService
+
+    count = await SplitService().dedupe_active()
+    print(f"✅ Deactivated {count} splits beyond one active split per user")
+
+COMMANDS = {
+    "reconcile-sessions": reconcile_sessions,
+    "backfill-rollups": backfill_rollups,
+    "rebuild-records": rebuild_records,
+    "migrate-storage": migrate_storage,
+    "recommend-workouts": recommend_workouts,
+    "rebuild-schedules": rebuild_schedules,
+    "backfill-set-buckets": backfill_set_buckets,
+    "dedupe-exercise-names": dedupe_exercise_names,
+    "dedupe-active-splits": dedupe_active_splits,
+}
+# Commands that fix data a declared index cannot be built on, so they run before it exists
+PRE_INDEX_COMMANDS = {"dedupe-exercise-names", "dedupe-active-splits"}
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = subparsers.add_parser("reconcile-sessions", help="Rebuild session totals from their exercises")
+    reconcile.add_argument("--user", help="Only reconcile this user's sessions")
+    reconcile.add_argument("--batch-size", type=int, default=500)
+
+    backfill = subparsers.add_parser("backfill-rollups", help="Rebuild daily training rollups from completed sessions")
+    backfill.add_argument("--user", help="Only rebuild this user's rollups")
+    backfill.add_argument("--batch-size", type=int, default=500)
+
+    records = subparsers.add_parser("rebuild-records", help="Recompute personal records from logged sets")
+    records.add_argument("--user", help="Only rebuild this user's records")
+    records.add_argument("--batch-size", type=int, default=500)
+
+    storage = subparsers.add_parser("migrate-storage", help="Move exercise entries between separate and embedded documents")
+    storage.add_argument("collection", choices=["sessions", "workouts"])
+    storage.add_argument("--to", choices=["referenced", "embedded"], help="Target layout (sessions default to the configured one)")
+    storage.add_argument("--batch-size", type=int, default=500)
+
+    recommend = subparsers.add_parser("recommend-workouts", help="Store a drafted next workout for every active user (nightly)")
+    recommend.add_argument("--user", help="Only draft this user's workout")
+    recommend.add_argument("--size", type=int, default=6, help="Exercises per workout")
+    recommend.add_argument("--batch-size", type=int, default=1000, help="Users scored together")
+
+    schedules = subparsers.add_parser("rebuild-schedules", help="Rematerialize the schedules of active splits")
+    schedules.add_argument("--user", help="Only rebuild this user's schedule")
+    schedules.add_argument("--batch-size", type=int, default=500)
+
+    buckets = subparsers.add_parser("backfill-set-buckets", help="Copy logged sets missing from the set buckets")
+    buckets.add_argument("--user", help="Only backfill this user's sets")
+    buckets.add_argument("--batch-size", type=int, default=500)
+
+    subparsers.add_parser("dedupe-exercise-names", help="Rename duplicate exercise names before the unique name index is built")
+    subparsers.add_parser("dedupe-active-splits", help="Keep one active split per user before the unique active split index is built")
+
+    return parser
+
+async def main(args):
+    await connect_to_mongo(build_indexes=args.command not in PRE_INDEX_COMMANDS)
+    started = time.perf_counter()
+    try:
+        await COMMANDS[args.command](args)
+    finally:
+        await close_mongo_connection()
+    print(f"Finished {args.command} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
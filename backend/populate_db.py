@@ -1,147 +1,208 @@
+"""Populate the database with deterministic synthetic training data.
+
+    python populate_db.py                                    # 100 users, 12 weeks of history
+    python populate_db.py --users 100000 --weeks 26 --workers 8 --drop
+    python populate_db.py --users 1000 --seed 7 --end-date 2025-01-01
+
+Users are spread over worker processes. Each worker generates its users'
+workouts, splits and sessions and writes them with unordered, batched
+insert_many calls, keeping several batches in flight. The same seed, scale
+and end date produce the same documents, ObjectIds included, whatever the
+number of workers; without --end-date the history ends today.
+"""
+import argparse
 import asyncio
-import motor.motor_asyncio
-from datetime import datetime
-from dotenv import load_dotenv
+import multiprocessing
 import os
+import queue
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, Tuple
 
-load_dotenv()
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
 
-async def populate_db():
-    client = motor.motor_asyncio.AsyncIOMotorClient(os.getenv("MONGODB_URL"))
-    database_name = os.getenv("DATABASE_NAME")
-    if database_name is None:
-        raise ValueError("DATABASE_NAME environment variable is not set")
-    db = client[database_name]
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection
+from app.models.exercise import Exercise
+from app.models.record import PersonalRecord
+from app.models.rollup import UserDailyRollup
+from app.models.schedule import UserSchedule
+from app.models.set_bucket import SetBucket
+from app.models.user import User
+from app.services.exercise import ExerciseService
+from app.utils.synthetic import GENERATED_MODELS, SyntheticConfig, UserGenerator, build_catalog
+
+USER_REPORT_INTERVAL = 100
+
+async def write_shard(worker: int, config: SyntheticConfig, args, progress) -> None:
+    """Generate and insert every ``args.workers``-th user, starting at ``worker``"""
+    client = AsyncIOMotorClient(settings.mongodb_url, maxPoolSize=args.concurrency + 1)
+    await init_beanie(database=client[settings.database_name], document_models=list(GENERATED_MODELS), skip_indexes=True)
+    generator = UserGenerator(config, build_catalog(config))
+    pending = {model: [] for model in GENERATED_MODELS}
+    slots = asyncio.Semaphore(args.concurrency)
+    in_flight = set()
+    errors = []
+
+    async def insert(model, batch):
+        try:
+            await model.get_motor_collection().insert_many(batch, ordered=False)
+            progress.put((model.__name__, len(batch)))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            slots.release()
+
+    async def flush(model):
+        batch, pending[model] = pending[model], []
+        # Waits while ``concurrency`` batches are in flight, which bounds memory
+        await slots.acquire()
+        if errors:
+            raise errors[0]
+        task = asyncio.create_task(insert(model, batch))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
 
     try:
-        print("Populating exercises collection...")
-        exercises_data = [
-            {
-                "name": "Push-ups",
-                "description": "Classic bodyweight exercise for chest, shoulders, and triceps",
-                "muscle_groups": ["chest", "shoulders", "triceps"],
-                "equipment": "bodyweight",
-                "instructions": [
-                    "Start in a plank position with hands shoulder-width apart",
-                    "Lower your body until chest nearly touches the floor",
-                    "Push back up to starting position",
-                    "Keep your body straight throughout the movement"
-                ],
-                "difficulty": "beginner",
-                "created_at": datetime.utcnow()
-            },
-            {
-                "name": "Bench Press",
-                "description": "Compound movement for chest, shoulders, and triceps using barbell",
-                "muscle_groups": ["chest", "shoulders", "triceps"],
-                "equipment": "barbell",
-                "instructions": [
-                    "Lie on bench with feet flat on floor",
-                    "Grip barbell with hands slightly wider than shoulder-width",
-                    "Lower bar to chest with control",
-                    "Press bar back up to starting position"
-                ],
-                "difficulty": "intermediate",
-                "created_at": datetime.utcnow()
-            },
-            {
-                "name": "Squats",
-                "description": "Fundamental lower body exercise targeting quads, glutes, and hamstrings",
-                "muscle_groups": ["quadriceps", "glutes", "hamstrings"],
-                "equipment": "bodyweight",
-                "instructions": [
-                    "Stand with feet shoulder-width apart",
-                    "Lower body as if sitting back into a chair",
-                    "Keep chest up and knees over toes",
-                    "Return to standing position"
-                ],
-                "difficulty": "beginner",
-                "created_at": datetime.utcnow()
-            },
-            {
-                "name": "Deadlift",
-                "description": "Compound movement targeting posterior chain",
-                "muscle_groups": ["hamstrings", "glutes", "erector_spinae", "traps"],
-                "equipment": "barbell",
-                "instructions": [
-                    "Stand with feet hip-width apart, bar over mid-foot",
-                    "Bend at hips and knees to grip bar",
-                    "Keep chest up and back straight",
-                    "Drive through heels to lift bar"
-                ],
-                "difficulty": "advanced",
-                "created_at": datetime.utcnow()
-            },
-            {
-                "name": "Pull-ups",
-                "description": "Upper body pulling exercise for back and biceps",
-                "muscle_groups": ["latissimus_dorsi", "biceps", "rhomboids"],
-                "equipment": "pull_up_bar",
-                "instructions": [
-                    "Hang from bar with palms facing away",
-                    "Pull body up until chin clears bar",
-                    "Lower with control to starting position",
-                    "Avoid swinging or kipping"
-                ],
-                "difficulty": "intermediate",
-                "created_at": datetime.utcnow()
-            },
-            {
-                "name": "Plank",
-                "description": "Core stability exercise",
-                "muscle_groups": ["core", "shoulders"],
-                "equipment": "bodyweight",
-                "instructions": [
-                    "Start in push-up position on forearms",
-                    "Keep body straight from head to heels",
-                    "Hold position while breathing normally",
-                    "Don't let hips sag or pike up"
-                ],
-                "difficulty": "beginner",
-                "created_at": datetime.utcnow()
-            },
-            {
-                "name": "Dumbbell Rows",
-                "description": "Unilateral back exercise using dumbbells",
-                "muscle_groups": ["latissimus_dorsi", "rhomboids", "biceps"],
-                "equipment": "dumbbell",
-                "instructions": [
-                    "Place one knee and hand on bench",
-                    "Hold dumbbell in opposite hand",
-                    "Pull dumbbell to side of torso",
-                    "Lower with control"
-                ],
-                "difficulty": "beginner",
-                "created_at": datetime.utcnow()
-            },
-            {
-                "name": "Shoulder Press",
-                "description": "Overhead pressing movement for shoulders",
-                "muscle_groups": ["shoulders", "triceps"],
-                "equipment": "dumbbell",
-                "instructions": [
-                    "Stand with dumbbells at shoulder height",
-                    "Press weights overhead until arms are extended",
-                    "Lower with control to starting position",
-                    "Keep core engaged throughout"
-                ],
-                "difficulty": "intermediate",
-                "created_at": datetime.utcnow()
-            }
-        ]
-        
-        # Clear existing exercises and insert new ones
-        await db.exercises.delete_many({})
-        result = await db.exercises.insert_many(exercises_data)
-        print(f"✅ Inserted {len(result.inserted_ids)} exercises")
-        
-        # 3. Get exercise IDs for workouts
-        exercises = await db.exercises.find({}).to_list(length=None)
-        exercise_lookup = {ex["name"]: ex["_id"] for ex in exercises}
-    except Exception as e:
-        print(f"❌ Error: {e}")
+        generated = 0
+        for index in range(worker, config.users, args.workers):
+            for model, documents in generator.generate(index).items():
+                pending[model] += documents
+                if len(pending[model]) >= args.batch_size:
+                    await flush(model)
+            generated += 1
+            if generated % USER_REPORT_INTERVAL == 0:
+                progress.put(("users", USER_REPORT_INTERVAL))
+        for model in GENERATED_MODELS:
+            if pending[model]:
+                await flush(model)
+        await asyncio.gather(*in_flight)
+        if errors:
+            raise errors[0]
+        progress.put(("users", generated % USER_REPORT_INTERVAL))
     finally:
         client.close()
 
+def run_worker(worker: int, config: SyntheticConfig, args, progress) -> None:
+    try:
+        asyncio.run(write_shard(worker, config, args, progress))
+        progress.put(("done", worker))
+    except Exception:
+        progress.put(("error", traceback.format_exc()))
+
+def run_workers(config: SyntheticConfig, args) -> Tuple[Dict[str, int], float]:
+    """Start the workers and report throughput until all of them finish"""
+    # Fresh interpreters: forking would copy the parent's MongoDB client
+    context = multiprocessing.get_context("spawn")
+    progress = context.Queue()
+    workers = [context.Process(target=run_worker, args=(n, config, args, progress)) for n in range(args.workers)]
+    for process in workers:
+        process.start()
+
+    counts = {model.__name__: 0 for model in GENERATED_MODELS}
+    users = 0
+    failure = None
+    running = len(workers)
+    started = last_report = time.perf_counter()
+    while running:
+        try:
+            kind, value = progress.get(timeout=1)
+        except queue.Empty:
+            if not any(process.is_alive() for process in workers):
+                failure = failure or "a worker exited without reporting"
+                break
+            kind, value = None, None
+        if kind == "done":
+            running -= 1
+        elif kind == "error":
+            failure = value
+            running -= 1
+        elif kind == "users":
+            users += value
+        elif kind is not None:
+            counts[kind] += value
+
+        now = time.perf_counter()
+        if now - last_report >= args.report_every or not running:
+            total = sum(counts.values())
+            print(f"  {users:>9,}/{config.users:,} users  {total:>13,} documents  {total / (now - started):>10,.0f} docs/s")
+            last_report = now
+
+    for process in workers:
+        process.join()
+    if failure:
+        raise SystemExit(f"❌ Error: {failure}")
+    return counts, time.perf_counter() - started
+
+async def populate_db(args):
+    if settings.database_name is None:
+        raise ValueError("DATABASE_NAME environment variable is not set")
+
+    config = SyntheticConfig(
+        seed=args.seed,
+        users=args.users,
+        exercises=args.exercises,
+        weeks=args.weeks,
+        open_sessions=args.open_sessions,
+        session_layout=settings.session_exercise_storage,
+        workout_layout=args.workout_layout,
+    )
+    if args.end_date:
+        config.end = datetime.strptime(args.end_date, "%Y-%m-%d")
+
+    await connect_to_mongo()
+    try:
+        collections = [Exercise, *GENERATED_MODELS, UserDailyRollup, PersonalRecord, UserSchedule, SetBucket]
+        if args.drop:
+            for model in collections:
+                await model.get_motor_collection().drop()
+            # Reconnecting recreates the indexes of the dropped collections
+            await close_mongo_connection()
+            await connect_to_mongo()
+        elif any([await model.get_motor_collection().estimated_document_count() for model in (Exercise, User)]):
+            raise SystemExit(f"❌ {settings.database_name} already contains data; pass --drop to replace it")
+
+        catalog = build_catalog(config)
+        await Exercise.get_motor_collection().insert_many(catalog)
+        # Running workers drop their cached pages and catalog snapshot
+        await ExerciseService.catalog_version.bump()
+        print(f"✅ Inserted {len(catalog)} exercises")
+
+        print(f"Generating {config.users:,} users, ~{config.estimate():,} documents, with {args.workers} workers")
+        counts, elapsed = await asyncio.to_thread(run_workers, config, args)
+        total = sum(counts.values())
+        for name, count in counts.items():
+            print(f"  {name:<16} {count:>13,}")
+        print(f"✅ Inserted {total:,} documents in {elapsed:.1f}s ({total / elapsed:,.0f} docs/s)")
+
+        if args.derived:
+            from app.services.record import PersonalRecordService
+            from app.services.rollup import RollupService
+            from app.services.schedule import ScheduleService
+            from app.services.set_history import SetHistoryService
+
+            print(f"✅ Rolled up {await RollupService().backfill(batch_size=args.batch_size)} completed sessions")
+            print(f"✅ Rebuilt {await PersonalRecordService().rebuild(batch_size=args.batch_size)} personal records")
+            print(f"✅ Materialized {await ScheduleService().rebuild(batch_size=args.batch_size)} split schedules")
+            print(f"✅ Bucketed the sets of {await SetHistoryService().backfill(batch_size=args.batch_size)} session exercises")
+    finally:
+        await close_mongo_connection()
+
 if __name__ == "__main__":
-    asyncio.run(populate_db())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--weeks", type=int, default=12, help="Weeks of training history per user")
+    parser.add_argument("--exercises", type=int, default=200, help="Catalog size")
+    parser.add_argument("--open-sessions", type=int, default=0, help="In-progress sessions per user")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workout-layout", choices=["referenced", "embedded"], default="referenced", help="Where workout exercises are stored")
+    parser.add_argument("--end-date", help="Last day of the history (YYYY-MM-DD), defaults to today")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Generator processes")
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many batches in flight per worker")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--report-every", type=float, default=2.0, help="Seconds between progress lines")
+    parser.add_argument("--drop", action="store_true", help="Drop the generated collections first")
+    parser.add_argument("--derived", action="store_true", help="Also build rollups, personal records, schedules and set buckets")
+    asyncio.run(populate_db(parser.parse_args()))
@@ -0,0 +1,42 @@
+"""Every test runs against a fresh in-memory MongoDB (mongomock-motor), set up the way the API connects"""
+import asyncio
+import os
+
+import pytest
+
+# Tests that need a catalog snapshot build one themselves
+os.environ.setdefault("CATALOG_SNAPSHOT_DIR", "")
+os.environ.setdefault("DATABASE_NAME", "growtrack_test")
+
+from app.core import database
+from app.core.config import settings
+from app.models.split import WorkoutSplit
+from app.services.exercise import ExerciseService
+from benchmarks.stand_in import recreate_partial_indexes, use_mongomock
+
+use_mongomock()
+
+def _reset_catalog_state() -> None:
+    # Class-level, so shared across tests like it is across requests
+    ExerciseService.cache.clear()
+    ExerciseService.catalog_version._version = None
+    ExerciseService.search_index.clear()
+    ExerciseService.similarity_index.clear()
+    ExerciseService._indexed_version = None
+    ExerciseService._rebuilding = None
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on this test's event loop"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+@pytest.fixture
+def db(run):
+    """A connected, empty database with every model initialized"""
+    run(database.connect_to_mongo())
+    run(recreate_partial_indexes([WorkoutSplit]))
+    _reset_catalog_state()
+    yield database.mongodb_client[settings.database_name]
+    run(database.close_mongo_connection())
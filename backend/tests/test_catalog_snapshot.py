@@ -0,0 +1,126 @@
+from datetime import datetime
+import json
+import os
+
+import pytest
+from bson import ObjectId
+
+from app.models.exercise import Exercise
+from app.services.catalog_snapshot import BUILD_RETRY_SECONDS, CatalogSnapshot, CatalogSnapshotManager, encode_snapshot
+from app.services.exercise import ExerciseService
+from app.utils.projection import parse_fields, selectable_fields
+
+MUSCLES = ["chest", "back", "quads", "shoulders"]
+EQUIPMENT = ["barbell", "dumbbell", None]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+
+@pytest.fixture
+def catalog(db, run, tmp_path):
+    """30 exercises in MongoDB and the same catalog as a snapshot file"""
+    documents = [
+        {
+            "_id": ObjectId(),
+            "name": f"Exercise {i}",
+            "description": f"Variation {i}",
+            "muscle_groups": [MUSCLES[i % 4], MUSCLES[(i + 1) % 4]] if i % 3 else [MUSCLES[i % 4]],
+            "equipment": EQUIPMENT[i % 3],
+            "instructions": ["Brace", "Lift"],
+            "difficulty": DIFFICULTIES[i % 3 if i % 5 else 0],
+            "created_at": datetime(2026, 1, 1, 8, i),
+        }
+        for i in range(30)
+    ]
+    run(Exercise.get_motor_collection().insert_many([dict(document) for document in documents]))
+    path = tmp_path / "catalog.snap"
+    path.write_bytes(encode_snapshot(7, sorted(documents, key=lambda document: document["_id"])))
+    return CatalogSnapshot(str(path))
+
+def walk(read, limit, **filters):
+    """Every page reached by following cursors, as (body, cursor) pairs"""
+    pages = []
+    cursor = None
+    while True:
+        body, cursor = read(limit=limit, cursor=cursor, **filters)
+        pages.append((body, cursor))
+        if cursor is None:
+            return pages
+
+def test_header(catalog):
+    assert catalog.version == 7
+    assert catalog.count == 30
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"muscle_group": "chest"},
+    {"muscle_group": "back", "difficulty": "beginner"},
+    {"difficulty": "advanced", "equipment": "barbell"},
+    {"equipment": "kettlebell"},
+    {"fields": parse_fields("name,equipment", selectable_fields(Exercise))},
+])
+def test_pages_match_the_database(catalog, run, filters):
+    service = ExerciseService()
+    from_snapshot = walk(catalog.page, 4, **filters)
+    from_database = walk(lambda **arguments: run(service.get_exercises_json(**arguments)), 4, **filters)
+    assert from_snapshot == from_database
+    items = [item for body, _ in from_snapshot for item in json.loads(body)]
+    assert len({item["id"] for item in items}) == len(items)
+
+def test_skip_matches_the_database(catalog, run):
+    service = ExerciseService()
+    for skip in (0, 5, 29, 40):
+        assert catalog.page(skip=skip, limit=10) == run(service.get_exercises_json(skip=skip, limit=10))
+
+def test_get(catalog, run):
+    first = json.loads(catalog.page(limit=1)[0])[0]
+    assert json.loads(catalog.get(first["id"])) == first
+    assert json.loads(catalog.get(first["id"], frozenset({"id", "name"}))) == {"id": first["id"], "name": first["name"]}
+    assert catalog.get(str(ObjectId())) is None
+
+def test_manager_only_serves_the_requested_version(catalog, run, tmp_path):
+    version = ExerciseService.catalog_version
+    manager = CatalogSnapshotManager(str(tmp_path), lambda: "managed", version)
+    assert run(manager.build())
+    built = run(version.get())
+    assert run(manager.current(built)).version == built
+
+    # A bump between the ETag's version read and the body read must not serve the newer data under it
+    newer = run(version.bump())
+    assert run(manager.current(built)).version == built
+    assert run(manager.current(newer)) is None
+    assert run(manager.current()) is None
+    run(manager._building)
+    assert run(manager.current(newer)).version == newer
+
+def test_stale_reads_attempt_one_build_per_version(db, run, tmp_path, monkeypatch):
+    version = ExerciseService.catalog_version
+    now = [0.0]
+    manager = CatalogSnapshotManager(str(tmp_path), lambda: "throttled", version, clock=lambda: now[0])
+    attempts = []
+
+    async def build(force=False):
+        # Another worker holds the lock, so nothing is published
+        attempts.append(await version.get())
+        return False
+
+    monkeypatch.setattr(manager, "build", build)
+    monkeypatch.setattr(os.path, "isdir", lambda path: pytest.fail("checked the directory on a read"))
+    for _ in range(3):
+        assert run(manager.current()) is None
+        run(manager._building)
+    assert len(attempts) == 1
+
+    run(version.bump())
+    assert run(manager.current()) is None
+    run(manager._building)
+    assert len(attempts) == 2
+
+    now[0] += BUILD_RETRY_SECONDS
+    assert run(manager.current()) is None
+    run(manager._building)
+    assert len(attempts) == 3
+
+def test_a_missing_directory_disables_the_snapshot(db, run, tmp_path):
+    manager = CatalogSnapshotManager(str(tmp_path / "missing"), lambda: "missing", ExerciseService.catalog_version)
+    assert not manager.enabled
+    assert run(manager.current()) is None
+    assert manager._building is None
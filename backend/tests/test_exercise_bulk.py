@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from bson import ObjectId
+
+from app.models.exercise import Exercise
+from app.schemas.exercise import ExerciseBulkRequest, ExerciseCreate
+from app.services.exercise import ExerciseService
+
+@pytest.fixture
+def service(db, run):
+    service = ExerciseService()
+    run(service.create_exercise(ExerciseCreate(name="Bench Press", muscle_groups=["chest"], equipment="barbell")))
+    run(service.create_exercise(ExerciseCreate(name="Push Up", muscle_groups=["chest"], equipment="bodyweight")))
+    return service
+
+def bulk(run, service, *operations):
+    return run(service.bulk_write_exercises(ExerciseBulkRequest(operations=list(operations))))
+
+def existing(run, name):
+    return str(run(Exercise.find_one({"name": name})).id)
+
+def statuses(response):
+    return [(result.op, result.status) for result in response.results]
+
+def test_failed_items_do_not_fail_the_batch(service, run):
+    push_up = existing(run, "Push Up")
+    response = bulk(
+        run, service,
+        {"op": "create", "data": {"name": "Squat", "muscle_groups": ["quadriceps"]}},
+        {"op": "create", "data": {"muscle_groups": ["chest"]}},
+        {"op": "update", "id": str(ObjectId()), "data": {"equipment": "dumbbell"}},
+        {"op": "update", "id": "not-an-id", "data": {"equipment": "dumbbell"}},
+        {"op": "upsert", "data": {"name": "Bench Press", "muscle_groups": ["chest", "triceps"], "equipment": "barbell"}},
+        {"op": "delete", "id": push_up},
+    )
+    assert statuses(response) == [
+        ("create", "ok"), ("create", "error"), ("update", "error"), ("update", "error"), ("upsert", "ok"), ("delete", "ok")
+    ]
+    assert response.errors == 3
+    assert response.results[2].error == "Exercise not found"
+    assert response.results[3].error == "Invalid exercise ID format"
+    assert (response.inserted, response.matched, response.deleted) == (1, 1, 1)
+    # Upserts of an existing name report the exercise they matched
+    assert response.results[4].id == existing(run, "Bench Press")
+    assert response.results[0].id == existing(run, "Squat")
+    assert run(Exercise.find_one({"name": "Bench Press"})).muscle_groups == ["chest", "triceps"]
+    assert run(Exercise.find_one({"name": "Push Up"})) is None
+
+def test_names_repeated_within_a_batch_are_rejected(service, run):
+    response = bulk(
+        run, service,
+        {"op": "create", "data": {"name": "Deadlift"}},
+        {"op": "upsert", "data": {"name": "Deadlift", "equipment": "barbell"}},
+        {"op": "update", "id": existing(run, "Push Up"), "data": {"name": "Deadlift"}},
+    )
+    assert statuses(response) == [("create", "ok"), ("upsert", "error"), ("update", "error")]
+    assert all("another operation in this request" in result.error for result in response.results[1:])
+    assert run(Exercise.find({"name": "Deadlift"}).count()) == 1
+    assert run(Exercise.find_one({"name": "Push Up"})) is not None
+
+def test_names_of_other_stored_exercises_are_rejected(service, run):
+    response = bulk(
+        run, service,
+        {"op": "create", "data": {"name": "Bench Press"}},
+        {"op": "create", "data": {"name": "Dips"}},
+    )
+    assert statuses(response) == [("create", "error"), ("create", "ok")]
+    assert response.results[0].error == "An exercise named 'Bench Press' already exists"
+    assert response.inserted == 1 and response.errors == 1
+
+    # Renaming onto a stored name fails the same way
+    response = bulk(run, service, {"op": "update", "id": existing(run, "Push Up"), "data": {"name": "Dips"}})
+    assert statuses(response) == [("update", "error")]
+    assert response.results[0].error == "An exercise named 'Dips' already exists"
+    assert run(Exercise.find({"name": "Bench Press"}).count()) == 1
+    assert run(Exercise.find_one({"name": "Push Up"})) is not None
+
+def test_partial_success_invalidates_cached_reads(service, run):
+    push_up = existing(run, "Push Up")
+    version = run(ExerciseService.catalog_version.get())
+    page, _ = run(service.get_exercises_json())
+    assert json.loads(run(service.get_exercise_json(push_up)))["equipment"] == "bodyweight"
+    assert [exercise["name"] for exercise in json.loads(page)] == ["Bench Press", "Push Up"]
+
+    response = bulk(
+        run, service,
+        {"op": "create", "data": {"name": "Bench Press"}},
+        {"op": "update", "id": push_up, "data": {"equipment": "rings"}},
+        {"op": "create", "data": {"name": "Dips", "muscle_groups": ["chest", "triceps"]}},
+    )
+    assert response.errors == 1
+    assert run(ExerciseService.catalog_version.get()) > version
+    page, _ = run(service.get_exercises_json())
+    assert [exercise["name"] for exercise in json.loads(page)] == ["Bench Press", "Push Up", "Dips"]
+    assert json.loads(run(service.get_exercise_json(push_up)))["equipment"] == "rings"
+    assert [hit.name for hit in run(service.search_exercises("dips"))] == ["Dips"]
+    assert ExerciseService._indexed_version == run(ExerciseService.catalog_version.get())
+
+def test_batches_that_change_nothing_keep_the_version(service, run):
+    version = run(ExerciseService.catalog_version.get())
+    response = bulk(run, service, {"op": "delete", "id": str(ObjectId())}, {"op": "create", "data": {}})
+    assert response.errors == 2
+    assert run(ExerciseService.catalog_version.get()) == version
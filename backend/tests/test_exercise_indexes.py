@@ -0,0 +1,62 @@
+import pytest
+from bson import ObjectId
+
+from app.models.exercise import Exercise
+from app.schemas.exercise import ExerciseCreate
+from app.services.exercise import ExerciseService
+
+@pytest.fixture
+def service(db, run, monkeypatch):
+    """A worker with a warm catalog that notices other workers' bumps on its next read"""
+    monkeypatch.setattr(ExerciseService.catalog_version, "ttl", 0)
+    service = ExerciseService()
+    run(service.create_exercise(ExerciseCreate(name="Bench Press", muscle_groups=["chest", "triceps"], equipment="barbell")))
+    run(service.create_exercise(ExerciseCreate(name="Push Up", muscle_groups=["chest"], equipment="bodyweight")))
+    run(service.rebuild_search_index())
+    return service
+
+def other_worker_insert(run, **fields):
+    """Write like another worker: straight to MongoDB, then a logged bump"""
+    exercise = run(Exercise(**fields).insert())
+    run(ExerciseService.catalog_version.bump([str(exercise.id)]))
+    return exercise
+
+def names(hits):
+    return [hit.name for hit in hits]
+
+def test_local_writes_keep_the_indexes_current(service, run):
+    run(service.create_exercise(ExerciseCreate(name="Incline Press", muscle_groups=["chest"], equipment="dumbbell")))
+    assert "Incline Press" in names(run(service.search_exercises("incline")))
+    assert ExerciseService._indexed_version == run(ExerciseService.catalog_version.get())
+
+def test_other_workers_writes_are_applied_incrementally(service, run):
+    dips = other_worker_insert(run, name="Dips", muscle_groups=["chest", "triceps"], equipment="bodyweight")
+    assert names(run(service.search_exercises("dips"))) == ["Dips"]
+    bench = run(Exercise.find_one({"name": "Bench Press"}))
+    assert "Dips" in [alternative.name for alternative in run(service.get_alternatives(str(bench.id)))]
+
+    run(dips.delete())
+    run(ExerciseService.catalog_version.bump([str(dips.id)]))
+    assert run(service.search_exercises("dips")) == []
+    assert run(service.get_alternatives(str(dips.id))) is None
+    assert ExerciseService._indexed_version == run(ExerciseService.catalog_version.get())
+    assert ExerciseService._rebuilding is None
+
+def test_unlogged_writes_rebuild_in_the_background(service, run):
+    run(Exercise(name="Dips", muscle_groups=["chest"], equipment="bodyweight").insert())
+    run(ExerciseService.catalog_version.bump())
+
+    # Served from the current indexes while the rebuild runs
+    assert run(service.search_exercises("dips")) == []
+    rebuilding = ExerciseService._rebuilding
+    assert rebuilding is not None
+    # Concurrent reads share the one rebuild
+    run(service.search_exercises("dips"))
+    assert ExerciseService._rebuilding is rebuilding
+
+    run(rebuilding)
+    assert names(run(service.search_exercises("dips"))) == ["Dips"]
+    assert ExerciseService._indexed_version == run(ExerciseService.catalog_version.get())
+
+def test_an_unknown_exercise_has_no_alternatives(service, run):
+    assert run(service.get_alternatives(str(ObjectId()))) is None
@@ -0,0 +1,139 @@
+from datetime import datetime
+
+from bson import ObjectId, json_util
+
+from app.models.record import PersonalRecord
+from app.models.rollup import UserDailyRollup
+from app.models.session import WorkoutSession
+from app.models.set_bucket import SetBucket
+from app.services.history import HistoryService
+from app.services.set_history import SetHistoryService
+
+STARTED = datetime(2026, 4, 6, 18, 0)
+
+def ndjson(*records):
+    return b"".join((json_util.dumps({"type": record_type, "doc": document}) + "\n").encode() for record_type, document in records)
+
+async def chunks(data):
+    yield data
+
+def export(user_id, workout_user_id=None):
+    workout_id, exercise_id, entry_id = ObjectId(), ObjectId(), ObjectId()
+    sets = [{"reps": 5, "weight": 100.0}, {"reps": 3, "weight": 110.0, "logged_at": datetime(2026, 4, 6, 18, 20)}]
+    return exercise_id, ndjson(
+        ("workout", {"_id": workout_id, "name": "Strength", "user_id": workout_user_id or user_id, "exercises": []}),
+        ("session_exercise", {
+            "_id": entry_id, "exercise_id": exercise_id, "workout_exercise_id": ObjectId(),
+            "sets_completed": 2, "actual_sets": sets, "completed_at": datetime(2026, 4, 6, 18, 25),
+        }),
+        ("session", {
+            "_id": ObjectId(), "workout_id": workout_id, "user_id": user_id, "exercises": [entry_id],
+            "started_at": STARTED, "completed_at": datetime(2026, 4, 6, 19, 0), "status": "completed",
+        }),
+    )
+
+def test_import_updates_the_derived_stores(db, run):
+    user_id = ObjectId()
+    exercise_id, data = export(user_id)
+    service = HistoryService()
+    report = run(service.import_user_history(str(user_id), chunks(data)))
+    assert report["error_count"] == 0
+    assert report["inserted"]["session"] == 1
+
+    history = run(SetHistoryService(source="buckets").get_exercise_history(str(user_id), str(exercise_id)))
+    assert [(item.reps, item.performed_at) for item in history.items] == [
+        (5, datetime(2026, 4, 6, 18, 25)), (3, datetime(2026, 4, 6, 18, 20))
+    ]
+    record = run(PersonalRecord.find_one({"user_id": user_id, "exercise_id": exercise_id}))
+    assert record.best_weight == 110.0 and record.best_session_volume == 830.0
+    rollup = run(UserDailyRollup.find_one({"user_id": user_id}))
+    assert rollup.sessions == 1 and rollup.total_volume == 830.0
+
+    # Re-importing only counts duplicates and leaves the derived stores alone
+    report = run(service.import_user_history(str(user_id), chunks(data)))
+    assert report["inserted"]["session"] == 0
+    assert run(SetBucket.get_motor_collection().count_documents({"user_id": user_id})) == 1
+    bucket = run(SetBucket.find_one({"user_id": user_id}))
+    assert bucket.set_count == 2
+    assert run(UserDailyRollup.find_one({"user_id": user_id})).sessions == 1
+
+def test_sessions_of_another_users_workout_are_rejected(db, run):
+    user_id, other_user = ObjectId(), ObjectId()
+    # The other user's workout already exists; the import only carries the session
+    _, theirs = export(other_user)
+    run(HistoryService().import_user_history(str(other_user), chunks(theirs)))
+    workout = json_util.loads(theirs.split(b"\n")[0])["doc"]
+    _, data = export(user_id)
+    session = json_util.loads(data.split(b"\n")[2])
+    session["doc"]["workout_id"] = workout["_id"]
+    entry = data.split(b"\n")[1] + b"\n"
+
+    report = run(HistoryService().import_user_history(str(user_id), chunks(entry + json_util.dumps(session).encode() + b"\n")))
+    assert report["inserted"]["session"] == 0
+    assert report["error_count"] == 1
+    assert "workout" in report["errors"][0]["error"]
+
+def test_plain_json_is_stored_as_the_validated_model(db, run):
+    user_id, workout_id, entry_id, session_id = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+    lines = [
+        {"type": "workout", "doc": {"_id": {"$oid": str(workout_id)}, "name": "Strength", "user_id": str(user_id), "exercises": []}},
+        {"type": "session_exercise", "doc": {
+            "_id": {"$oid": str(entry_id)}, "exercise_id": str(ObjectId()), "workout_exercise_id": str(ObjectId()),
+            "sets_completed": 1, "actual_sets": [{"reps": 5, "weight": 100.0}], "completed_at": "2026-04-06T18:25:00",
+        }},
+        {"type": "session", "doc": {
+            "_id": {"$oid": str(session_id)}, "workout_id": str(workout_id), "user_id": str(user_id), "exercises": [str(entry_id)],
+            "started_at": "2026-04-06T18:00:00", "completed_at": "2026-04-06T19:00:00", "status": "completed",
+            "mood": "great",
+        }},
+    ]
+    data = b"".join((json_util.dumps(line) + "\n").encode() for line in lines)
+    report = run(HistoryService().import_user_history(str(user_id), chunks(data)))
+    assert report["error_count"] == 0
+    assert report["inserted"]["session"] == 1
+
+    stored = run(WorkoutSession.get_motor_collection().find_one({"_id": session_id}))
+    assert stored["started_at"] == STARTED
+    assert stored["user_id"] == user_id and stored["exercises"] == [entry_id]
+    assert "mood" not in stored
+    rollup = run(UserDailyRollup.find_one({"user_id": user_id}))
+    assert rollup.sessions == 1 and rollup.total_volume == 500.0
+
+def test_entries_flushed_before_their_parents_are_accepted(db, run):
+    user_id = ObjectId()
+    exports = [export(user_id)[1] for _ in range(3)]
+    # Entries of later sessions are flushed in batches of their own before their sessions are
+    entries = b"".join(data.split(b"\n")[1] + b"\n" for data in exports)
+    parents = b"".join(line + b"\n" for data in exports for line in data.split(b"\n")[::2] if line)
+    report = run(HistoryService(batch_size=1).import_user_history(str(user_id), chunks(entries + parents)))
+    assert report["error_count"] == 0
+    assert report["inserted"]["session"] == 3
+
+def test_an_interrupted_import_can_be_retried(db, run):
+    user_id = ObjectId()
+    exercise_id, data = export(user_id)
+    service = HistoryService()
+    # The upload broke off before the session line
+    truncated = b"".join(line + b"\n" for line in data.split(b"\n")[:2])
+    report = run(service.import_user_history(str(user_id), chunks(truncated)))
+    assert report["inserted"]["session_exercise"] == 1 and report["inserted"]["session"] == 0
+
+    report = run(service.import_user_history(str(user_id), chunks(data)))
+    assert report["error_count"] == 0
+    assert report["inserted"]["session"] == 1
+    assert report["duplicates"] == 2
+    record = run(PersonalRecord.find_one({"user_id": user_id, "exercise_id": exercise_id}))
+    assert record.best_weight == 110.0
+
+def test_leftover_entries_must_match_the_import(db, run):
+    user_id = ObjectId()
+    _, data = export(user_id)
+    lines = data.split(b"\n")
+    entry = json_util.loads(lines[1])
+    # A stored entry with the same id but other content is not this import's
+    entry["doc"]["sets_completed"] = 0
+    run(HistoryService().import_user_history(str(user_id), chunks(lines[0] + b"\n" + json_util.dumps(entry).encode() + b"\n")))
+
+    report = run(HistoryService().import_user_history(str(user_id), chunks(data)))
+    assert report["inserted"]["session"] == 0
+    assert report["error_count"] == 1
@@ -0,0 +1,136 @@
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import live
+from app.core.config import settings
+from app.models.session import SessionExercise
+from app.models.workout import Workout, WorkoutExercise
+from app.schemas.session import LiveSetEvent, SessionExerciseCreate, WorkoutSessionCreate
+from app.services.live import LiveSessionWriter
+from app.services.session import SessionService
+
+@pytest.fixture
+def session(db, run):
+    """An in-progress session with two logged exercises and no sets yet"""
+    user_id = ObjectId()
+    planned = [run(WorkoutExercise(exercise_id=ObjectId(), sets=3, reps=8, order=i + 1).insert()) for i in range(2)]
+    workout = run(Workout(name="Upper", user_id=user_id, exercises=[entry.id for entry in planned]).insert())
+    service = SessionService()
+    created = run(service.create_session(str(user_id), WorkoutSessionCreate(
+        workout_id=str(workout.id),
+        exercises=[
+            SessionExerciseCreate(exercise_id=str(entry.exercise_id), workout_exercise_id=str(entry.id), sets_completed=0)
+            for entry in planned
+        ]
+    )))
+    return service, created.id, [entry.id for entry in created.exercises]
+
+def event(seq, session_exercise_id, reps=8, weight=60.0):
+    return LiveSetEvent(seq=seq, session_exercise_id=session_exercise_id, reps=reps, weight=weight)
+
+def stored(run, session_exercise_id):
+    entry = run(SessionExercise.get_motor_collection().find_one({"_id": ObjectId(session_exercise_id)}))
+    return [(logged_set["seq"], logged_set["reps"]) for logged_set in entry["actual_sets"]]
+
+def test_flushes_when_max_sets_are_pending(session, run):
+    service, session_id, (first, second) = session
+    writer = LiveSessionWriter(service, session_id, flush_interval=60, max_sets=3)
+    assert not writer.add(event(0, first))
+    assert not writer.add(event(1, second))
+    assert writer.add(event(2, first, reps=6))
+
+    flushed = run(writer.flush())
+    assert flushed["through_seq"] == 2 and flushed["rejected"] == []
+    # One write per exercise, not per set
+    assert writer.writes == 2
+    assert stored(run, first) == [(0, 8), (2, 6)]
+    assert stored(run, second) == [(1, 8)]
+    assert run(writer.flush()) is None
+
+def test_replayed_seqs_are_stored_once(session, run):
+    service, session_id, (first, _) = session
+    writer = LiveSessionWriter(service, session_id, flush_interval=60, max_sets=10)
+    writer.add(event(0, first))
+    writer.add(event(1, first))
+    run(writer.flush())
+
+    # A client that reconnected resends what it had not seen flushed, and a set twice in one batch
+    replay = LiveSessionWriter(service, session_id, flush_interval=60, max_sets=10)
+    for seq in (1, 2, 2, 3):
+        replay.add(event(seq, first, reps=5))
+    assert run(replay.flush())["through_seq"] == 3
+    assert stored(run, first) == [(0, 8), (1, 8), (2, 5), (3, 5)]
+    entry = run(SessionExercise.get_motor_collection().find_one({"_id": ObjectId(first)}))
+    assert entry["sets_completed"] == 4
+
+def test_failed_flushes_keep_the_unwritten_sets(session, run, monkeypatch):
+    service, session_id, (first, second) = session
+    writer = LiveSessionWriter(service, session_id, flush_interval=60, max_sets=10)
+    writer.add(event(0, first))
+    writer.add(event(1, second))
+    append_sets = service.append_sets
+    failures = []
+
+    async def failing_append_sets(session_id, session_exercise_id, sets, **kwargs):
+        if session_exercise_id == second and not failures:
+            failures.append(session_exercise_id)
+            raise ConnectionError("connection reset")
+        return await append_sets(session_id, session_exercise_id, sets, **kwargs)
+
+    monkeypatch.setattr(service, "append_sets", failing_append_sets)
+    with pytest.raises(ConnectionError):
+        run(writer.flush())
+    # The first exercise was written and left the buffer; nothing is reported as flushed yet
+    assert writer.flushed_seq is None
+    assert stored(run, first) == [(0, 8)]
+    assert stored(run, second) == []
+
+    writer.add(event(2, first))
+    flushed = run(writer.flush())
+    assert flushed["through_seq"] == 2
+    assert stored(run, first) == [(0, 8), (2, 8)]
+    assert stored(run, second) == [(1, 8)]
+
+def test_appends_to_finished_sessions_are_rejected(session, run):
+    service, session_id, (first, _) = session
+    writer = LiveSessionWriter(service, session_id, flush_interval=60, max_sets=10)
+    missing = str(ObjectId())
+    writer.add(event(0, first))
+    writer.add(event(1, missing))
+    run(service.complete_session(session_id))
+
+    flushed = run(writer.flush())
+    assert sorted(flushed["rejected"]) == sorted([first, missing])
+    assert flushed["through_seq"] == 1
+    assert stored(run, first) == []
+
+@pytest.fixture
+def client(session, monkeypatch):
+    app = FastAPI()
+    app.include_router(live.router)
+    monkeypatch.setattr(settings, "live_flush_interval", 60.0)
+    monkeypatch.setattr(settings, "live_flush_max_sets", 10)
+    return TestClient(app)
+
+def test_sets_are_stored_when_the_client_disconnects(session, client, run):
+    _, session_id, (first, _) = session
+    with client.websocket_connect(f"/sessions/{session_id}/live") as websocket:
+        assert websocket.receive_json()["type"] == "ready"
+        websocket.send_json({"type": "set", "seq": 0, "session_exercise_id": first, "reps": 8, "weight": 60})
+        assert websocket.receive_json() == {"type": "ack", "seq": 0}
+        assert stored(run, first) == []
+    assert stored(run, first) == [(0, 8)]
+
+def test_sets_are_stored_when_the_interval_elapses(session, client, run, monkeypatch):
+    _, session_id, (first, _) = session
+    monkeypatch.setattr(settings, "live_flush_interval", 0.05)
+    with client.websocket_connect(f"/sessions/{session_id}/live") as websocket:
+        assert websocket.receive_json()["type"] == "ready"
+        websocket.send_json({"type": "set", "seq": 4, "session_exercise_id": first, "reps": 8, "weight": 60})
+        assert websocket.receive_json() == {"type": "ack", "seq": 4}
+        # No explicit flush: the receive times out and flushes
+        flushed = websocket.receive_json()
+        assert flushed["type"] == "flushed" and flushed["through_seq"] == 4
+        assert stored(run, first) == [(4, 8)]
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.utils.pagination import apply_cursor, decode_cursor, encode_cursor, keyset_filter
+
+SORT = [("started_at", -1), ("_id", -1)]
+
+def test_cursor_round_trip_keeps_bson_types():
+    document = {"started_at": datetime(2026, 3, 1, 7, 30), "_id": ObjectId(), "other": 1}
+    values = decode_cursor(encode_cursor(document, SORT), SORT)
+    assert values == {"started_at": document["started_at"], "_id": document["_id"]}
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm90IGpzb24", encode_cursor({"_id": ObjectId()}, [("_id", 1)])])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, SORT)
+
+def test_keyset_filter():
+    assert keyset_filter({"_id": 5}, [("_id", 1)]) == {"_id": {"$gt": 5}}
+    assert keyset_filter({"a": 1, "_id": 5}, [("a", -1), ("_id", -1)]) == {
+        "$or": [{"a": {"$lt": 1}}, {"a": 1, "_id": {"$lt": 5}}]
+    }
+
+def test_pages_cover_every_document_once(db, run):
+    collection = db["paged"]
+    start = datetime(2026, 1, 1)
+    # Repeated start times, so the _id tie-breaker decides the order within them
+    documents = [{"_id": ObjectId(), "user": i % 2, "started_at": start + timedelta(hours=i // 3)} for i in range(40)]
+    run(collection.insert_many(documents))
+    query = {"user": 0}
+    expected = sorted(
+        (document for document in documents if document["user"] == 0),
+        key=lambda document: (document["started_at"], document["_id"]),
+        reverse=True
+    )
+
+    seen = []
+    cursor = None
+    while True:
+        page = run(collection.find(apply_cursor(query, cursor, SORT)).sort(SORT).limit(6).to_list(None))
+        seen.extend(page)
+        if len(page) < 6:
+            break
+        cursor = encode_cursor(page[-1], SORT)
+    assert [document["_id"] for document in seen] == [document["_id"] for document in expected]
+
+def test_apply_cursor_without_cursor_or_query():
+    assert apply_cursor({"user": 1}, None, SORT) == {"user": 1}
+    cursor = encode_cursor({"started_at": datetime(2026, 1, 1), "_id": ObjectId()}, SORT)
+    assert apply_cursor({}, cursor, SORT) == keyset_filter(decode_cursor(cursor, SORT), SORT)
@@ -0,0 +1,99 @@
+import pytest
+from bson import ObjectId
+
+from app.models.exercise import Exercise
+from app.models.record import PersonalRecord
+from app.models.workout import Workout, WorkoutExercise
+from app.schemas.session import SessionExerciseCreate, SessionExerciseUpdate, WorkoutSessionCreate
+from app.services.record import PersonalRecordService, record_candidates, weight_key
+from app.services.session import SessionService
+
+@pytest.fixture
+def workout(db, run):
+    user_id = ObjectId()
+    exercise = run(Exercise(name="Squat", muscle_groups=["quadriceps"]).insert())
+    planned = run(WorkoutExercise(exercise_id=exercise.id, sets=3, reps=5, order=1).insert())
+    workout = run(Workout(name="Legs", user_id=user_id, exercises=[planned.id]).insert())
+    return user_id, workout, exercise, planned
+
+def log(run, service, workout, sets):
+    """Start a session logging ``sets``; returns the session, its entry and the records the entry beat"""
+    user_id, workout, exercise, planned = workout
+    session = run(service.create_session(str(user_id), WorkoutSessionCreate(workout_id=str(workout.id))))
+    entry = run(service.add_session_exercise(session.id, SessionExerciseCreate(
+        exercise_id=str(exercise.id), workout_exercise_id=str(planned.id),
+        sets_completed=len(sets), actual_sets=sets
+    )))
+    return session.id, entry.id, entry.new_records
+
+def record(run, workout):
+    user_id, _, exercise, _ = workout
+    return run(PersonalRecord.find_one({"user_id": user_id, "exercise_id": exercise.id}))
+
+def test_logged_sets_raise_records_with_max(workout, run):
+    service = SessionService()
+    _, _, beaten = log(run, service, workout, [{"reps": 5, "weight": 100.0}, {"reps": 3, "weight": 110.0}])
+    assert sorted(beaten) == ["e1rm", "reps_at_weight", "session_volume", "weight"]
+
+    # Lower in every way: nothing is beaten and nothing goes down
+    _, _, beaten = log(run, service, workout, [{"reps": 4, "weight": 100.0}])
+    assert beaten == []
+    best = record(run, workout)
+    assert (best.best_weight, best.best_session_volume) == (110.0, 830.0)
+    assert best.reps_at_weight == {"100": 5, "110": 3}
+
+    # More reps at a known weight only beats that record
+    _, _, beaten = log(run, service, workout, [{"reps": 6, "weight": 100.0}])
+    assert beaten == ["reps_at_weight"]
+    assert record(run, workout).reps_at_weight["100"] == 6
+
+def test_lowering_an_edit_recomputes_the_record(workout, run):
+    service = SessionService()
+    session_id, entry_id, _ = log(run, service, workout, [{"reps": 5, "weight": 100.0}, {"reps": 3, "weight": 110.0}])
+    log(run, service, workout, [{"reps": 5, "weight": 95.0}])
+
+    # The 110 kg set was a typo; the record falls back to the best left in the history
+    entry = run(service.update_session_exercise(session_id, entry_id, SessionExerciseUpdate(
+        actual_sets=[{"reps": 5, "weight": 100.0}]
+    )))
+    assert entry.new_records == []
+    best = record(run, workout)
+    assert best.best_weight == 100.0
+    assert best.best_session_volume == 500.0
+    assert best.reps_at_weight == {"100": 5, "95": 5}
+    assert best.best_e1rm == round(100.0 * (1 + 5 / 30), 2)
+
+    # Skipping the entry leaves only the other session
+    run(service.skip_session_exercise(session_id, entry_id))
+    best = record(run, workout)
+    assert (best.best_weight, best.best_session_volume) == (95.0, 475.0)
+    assert best.reps_at_weight == {"95": 5}
+
+def test_edits_that_only_raise_keep_using_max(workout, run, monkeypatch):
+    service = SessionService()
+    session_id, entry_id, _ = log(run, service, workout, [{"reps": 5, "weight": 100.0}])
+
+    async def no_recompute(*args, **kwargs):
+        raise AssertionError("recomputed")
+
+    monkeypatch.setattr(PersonalRecordService, "recompute", no_recompute)
+    entry = run(service.update_session_exercise(session_id, entry_id, SessionExerciseUpdate(
+        actual_sets=[{"reps": 5, "weight": 100.0}, {"reps": 2, "weight": 105.0}]
+    )))
+    # 105 kg for 2 is a lighter estimated max than 100 kg for 5
+    assert sorted(entry.new_records) == ["reps_at_weight", "session_volume", "weight"]
+    assert record(run, workout).best_weight == 105.0
+
+def test_fractional_weights_are_kept_apart(workout, run):
+    assert [weight_key(weight) for weight in (62.5, 62, 62.0, 2.25, 0.5)] == ["62_5", "62", "62", "2_25", "0_5"]
+    candidates = record_candidates([{"reps": 8, "weight": 62.5}, {"reps": 10, "weight": 62}, {"reps": 9, "weight": 62.0}])
+    assert candidates["reps_at_weight.62_5"] == 8
+    assert candidates["reps_at_weight.62"] == 10
+
+    service = SessionService()
+    log(run, service, workout, [{"reps": 8, "weight": 62.5}, {"reps": 10, "weight": 62}, {"reps": 12, "weight": 2.25}])
+    _, _, beaten = log(run, service, workout, [{"reps": 9, "weight": 62.5}])
+    assert beaten == ["reps_at_weight"]
+    user_id, _, exercise, _ = workout
+    response = run(PersonalRecordService().get_record(str(user_id), str(exercise.id)))
+    assert response.reps_at_weight == {"62.5": 9, "62": 10, "2.25": 12}
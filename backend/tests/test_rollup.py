@@ -0,0 +1,119 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.models.exercise import Exercise
+from app.models.rollup import UserDailyRollup
+from app.models.session import WorkoutSession
+from app.models.workout import Workout, WorkoutExercise
+from app.schemas.session import SessionExerciseCreate, SessionExerciseUpdate, WorkoutSessionCreate
+from app.services.rollup import RollupService
+from app.services.session import SessionService
+
+@pytest.fixture
+def workout(db, run):
+    """A user's workout of one exercise training chest and triceps"""
+    user_id = ObjectId()
+    exercise = run(Exercise(name="Bench Press", muscle_groups=["chest", "triceps"]).insert())
+    planned = run(WorkoutExercise(exercise_id=exercise.id, sets=3, reps=5, order=1).insert())
+    workout = run(Workout(name="Push", user_id=user_id, exercises=[planned.id]).insert())
+    return user_id, workout, exercise, planned
+
+def start(run, service, workout, sets):
+    user_id, workout, exercise, planned = workout
+    session = run(service.create_session(str(user_id), WorkoutSessionCreate(
+        workout_id=str(workout.id),
+        exercises=[SessionExerciseCreate(
+            exercise_id=str(exercise.id), workout_exercise_id=str(planned.id),
+            sets_completed=len(sets), actual_sets=sets
+        )]
+    )))
+    return session.id, session.exercises[0].id
+
+def bucket(run, user_id):
+    rollups = run(UserDailyRollup.find({"user_id": user_id}).to_list())
+    assert len(rollups) == 1
+    return rollups[0]
+
+def test_completion_adds_the_session_once(workout, run):
+    user_id = workout[0]
+    service = SessionService()
+    session_id, _ = start(run, service, workout, [{"reps": 5, "weight": 100.0}, {"reps": 5, "weight": 100.0}])
+    # In-progress sessions are not counted
+    assert run(UserDailyRollup.find_one({"user_id": user_id})) is None
+
+    run(service.complete_session(session_id))
+    run(service.complete_session(session_id))
+    run(RollupService().sync_session(ObjectId(session_id)))
+    daily = bucket(run, user_id)
+    assert (daily.sessions, daily.total_volume, daily.total_reps, daily.total_sets) == (1, 1000.0, 10, 2)
+    assert daily.muscle_volume == {"chest": 1000.0, "triceps": 1000.0}
+    assert daily.muscle_sets == {"chest": 2, "triceps": 2}
+
+def test_edits_after_completion_replace_the_sessions_share(workout, run):
+    user_id = workout[0]
+    service = SessionService()
+    session_id, entry_id = start(run, service, workout, [{"reps": 5, "weight": 100.0}, {"reps": 5, "weight": 100.0}])
+    run(service.complete_session(session_id))
+
+    run(service.update_session_exercise(session_id, entry_id, SessionExerciseUpdate(
+        sets_completed=1, actual_sets=[{"reps": 3, "weight": 120.0}]
+    )))
+    # Syncing again finds nothing left to change
+    run(RollupService().sync_session(ObjectId(session_id)))
+    daily = bucket(run, user_id)
+    assert (daily.sessions, daily.total_volume, daily.total_reps, daily.total_sets) == (1, 360.0, 3, 1)
+    assert daily.muscle_volume == {"chest": 360.0, "triceps": 360.0}
+    assert daily.contributions[session_id]["total_volume"] == 360.0
+
+    run(service.skip_session_exercise(session_id, entry_id))
+    daily = bucket(run, user_id)
+    assert (daily.sessions, daily.total_volume, daily.total_sets) == (1, 0, 0)
+
+def test_backfill_matches_live_syncs(workout, run):
+    user_id = workout[0]
+    service = SessionService()
+    for weight in (80.0, 90.0):
+        session_id, _ = start(run, service, workout, [{"reps": 5, "weight": weight}])
+        run(service.complete_session(session_id))
+    live = bucket(run, user_id)
+
+    run(UserDailyRollup.get_motor_collection().delete_many({}))
+    assert run(RollupService().backfill(str(user_id))) == 2
+    rebuilt = bucket(run, user_id)
+    assert rebuilt.model_dump(exclude={"id", "revision"}) == live.model_dump(exclude={"id", "revision"})
+
+def test_backfill_racing_a_live_sync_counts_it_once(workout, run, monkeypatch):
+    user_id = workout[0]
+    service = SessionService()
+    session_id, entry_id = start(run, service, workout, [{"reps": 5, "weight": 100.0}])
+    run(service.complete_session(session_id))
+    late_id, _ = start(run, service, workout, [{"reps": 10, "weight": 50.0}])
+
+    backfill = RollupService()
+    shares = backfill._shares
+    raced = []
+
+    async def racing_shares(sessions):
+        # An edit and a completion land after the backfill read the bucket revision
+        if not raced:
+            raced.append(True)
+            await service.update_session_exercise(session_id, entry_id, SessionExerciseUpdate(
+                actual_sets=[{"reps": 5, "weight": 110.0}]
+            ))
+            await service.complete_session(late_id)
+        return await shares(sessions)
+
+    monkeypatch.setattr(backfill, "_shares", racing_shares)
+    run(backfill.backfill(str(user_id)))
+    assert raced
+    daily = bucket(run, user_id)
+    assert (daily.sessions, daily.total_volume, daily.total_reps) == (2, 1050.0, 15)
+    assert set(daily.contributions) == {session_id, late_id}
+
+    # A later sync of either session changes nothing
+    for completed in (session_id, late_id):
+        run(RollupService().sync_session(ObjectId(completed)))
+    assert bucket(run, user_id).total_volume == 1050.0
+    assert run(WorkoutSession.get_motor_collection().count_documents({"status": "completed"})) == 2
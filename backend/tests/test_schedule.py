@@ -0,0 +1,35 @@
+from datetime import date
+
+from bson import ObjectId
+
+from app.models.schedule import UserSchedule
+from app.models.split import WorkoutSplit
+from app.schemas.split import WorkoutSplitUpdate
+from app.services.schedule import ScheduleService
+from app.services.split import SplitService
+
+def test_users_without_an_active_split_are_recorded_once(db, run):
+    user_id = ObjectId()
+    service = ScheduleService()
+    assert run(service.get_schedule(str(user_id), date(2026, 3, 2))) is None
+    marker = run(UserSchedule.find_one({"user_id": user_id}))
+    assert marker is not None and marker.split_id is None
+
+    # Reads trust the marker instead of looking for a split again
+    run(WorkoutSplit(name="Unseen", user_id=user_id, split_type="full_body", is_active=True).insert())
+    assert run(service.get_day(str(user_id), date(2026, 3, 2))) is None
+
+def test_split_changes_replace_the_marker(db, run):
+    user_id = ObjectId()
+    service = ScheduleService()
+    splits = SplitService()
+    assert run(service.get_schedule(str(user_id), date(2026, 3, 2))) is None
+
+    split = run(WorkoutSplit(name="PPL", user_id=user_id, split_type="push_pull_legs").insert())
+    run(splits.update_split(str(split.id), WorkoutSplitUpdate(is_active=True)))
+    schedule = run(service.get_schedule(str(user_id), date(2026, 3, 2)))
+    assert schedule.split_id == str(split.id)
+
+    run(splits.update_split(str(split.id), WorkoutSplitUpdate(is_active=False)))
+    assert run(service.get_schedule(str(user_id), date(2026, 3, 2))) is None
+    assert run(UserSchedule.get_motor_collection().count_documents({"user_id": user_id})) == 1
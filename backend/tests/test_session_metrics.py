@@ -0,0 +1,43 @@
+from bson import ObjectId
+
+from app.models.workout import Workout, WorkoutExercise
+from app.schemas.session import SessionExerciseCreate, WorkoutSessionCreate
+from app.services.session import SessionService
+
+def planned_workout(run, exercise_count):
+    user_id = ObjectId()
+    planned = [run(WorkoutExercise(exercise_id=ObjectId(), sets=3, reps=8, order=i + 1).insert()) for i in range(exercise_count)]
+    workout = run(Workout(name="Push", user_id=user_id, exercises=[entry.id for entry in planned]).insert())
+    return user_id, workout, planned
+
+def logged(entry, sets=1):
+    return SessionExerciseCreate(
+        exercise_id=str(entry.exercise_id), workout_exercise_id=str(entry.id),
+        sets_completed=sets, actual_sets=[{"reps": 8, "weight": 40.0}] * sets
+    )
+
+def test_completion_counts_planned_exercises(db, run):
+    user_id, workout, planned = planned_workout(run, 2)
+    service = SessionService()
+    session = run(service.create_session(str(user_id), WorkoutSessionCreate(
+        workout_id=str(workout.id), exercises=[logged(planned[0], sets=2), logged(planned[1], sets=0)]
+    )))
+    summary = run(service.get_session_summary(session.id))
+    assert (summary.planned_exercises, summary.completed_exercises) == (2, 1)
+    assert summary.completion_percentage == 50.0
+    assert (summary.total_sets, summary.total_reps, summary.total_volume) == (2, 16, 640.0)
+
+def test_exercises_beyond_the_plan_cap_completion_at_100(db, run):
+    user_id, workout, planned = planned_workout(run, 1)
+    service = SessionService()
+    extra = WorkoutExercise(id=ObjectId(), exercise_id=ObjectId(), sets=3, reps=8, order=2)
+    session = run(service.create_session(str(user_id), WorkoutSessionCreate(
+        workout_id=str(workout.id), exercises=[logged(planned[0]), logged(extra), logged(extra)]
+    )))
+    summary = run(service.get_session_summary(session.id))
+    assert summary.completed_exercises == 3
+    assert summary.completion_percentage == 100.0
+
+    summary = run(service.reconcile_session(session.id))
+    assert summary.completed_exercises == 3
+    assert summary.completion_percentage == 100.0
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+import random
+
+import pytest
+from bson import ObjectId
+
+from app.models.session import SessionExercise, WorkoutSession
+from app.models.set_bucket import SetBucket
+from app.services.set_history import SetHistoryService
+
+START = datetime(2026, 2, 1, 18, 0)
+
+@pytest.fixture
+def history(db, run):
+    """Two users' sessions of two exercises, some sets stamped with logged_at and some not"""
+    rng = random.Random(3)
+    user_id, other_user = ObjectId(), ObjectId()
+    exercise_ids = [ObjectId(), ObjectId()]
+    sessions, session_exercises = [], []
+    for day in range(12):
+        owner = other_user if day % 4 == 3 else user_id
+        started_at = START + timedelta(days=day)
+        refs = []
+        for position, exercise_id in enumerate(exercise_ids):
+            sets = [{"reps": rng.randint(3, 12), "weight": rng.choice([40.0, 42.5, 45.0])} for _ in range(rng.randint(1, 4))]
+            if day % 2:
+                sets = [{**logged_set, "logged_at": started_at + timedelta(minutes=position * 20 + i)} for i, logged_set in enumerate(sets)]
+            document = {
+                "_id": ObjectId(),
+                "exercise_id": exercise_id,
+                "workout_exercise_id": ObjectId(),
+                "sets_completed": len(sets),
+                "actual_sets": sets,
+                "skipped": day == 5 and position == 0,
+                "completed_at": started_at + timedelta(minutes=position * 20 + 15) if day % 3 else None,
+                "revision": 0,
+            }
+            session_exercises.append(document)
+            refs.append(document["_id"])
+        sessions.append({
+            "_id": ObjectId(), "workout_id": ObjectId(), "user_id": owner,
+            "exercises": refs, "started_at": started_at, "status": "completed",
+        })
+    run(SessionExercise.get_motor_collection().insert_many(session_exercises))
+    run(WorkoutSession.get_motor_collection().insert_many(sessions))
+    return user_id, exercise_ids, sessions
+
+def read_all(run, service, user_id, exercise_id, limit, since=None):
+    items, cursor = [], None
+    while True:
+        page = run(service.get_exercise_history(str(user_id), str(exercise_id), limit=limit, cursor=cursor, since=since))
+        items.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return items
+
+def assert_sources_agree(run, user_id, exercise_ids, since=None):
+    documents = SetHistoryService(source="documents")
+    buckets = SetHistoryService(source="buckets", bucket_size=4)
+    for exercise_id in exercise_ids:
+        expected = read_all(run, documents, user_id, exercise_id, 5, since)
+        assert expected
+        assert read_all(run, buckets, user_id, exercise_id, 5, since) == expected
+        assert read_all(run, buckets, user_id, exercise_id, 100, since) == expected
+
+def test_bucket_reads_match_document_reads(history, run):
+    user_id, exercise_ids, _ = history
+    assert run(SetHistoryService(bucket_size=4).backfill()) > 0
+    assert_sources_agree(run, user_id, exercise_ids)
+    assert_sources_agree(run, user_id, exercise_ids, since=START + timedelta(days=6))
+
+def test_history_is_newest_first_without_skipped_exercises(history, run):
+    user_id, exercise_ids, sessions = history
+    run(SetHistoryService(bucket_size=4).backfill())
+    items = read_all(run, SetHistoryService(source="buckets"), user_id, exercise_ids[0], 3)
+    keys = [(item.performed_at, item.session_exercise_id, item.set_number) for item in items]
+    assert keys == sorted(keys, reverse=True)
+    skipped_session = str(sessions[5]["_id"])
+    assert all(item.session_id != skipped_session for item in items)
+
+def test_sets_are_dated_when_they_were_logged(history, run):
+    user_id, exercise_ids, sessions = history
+    run(SetHistoryService(bucket_size=4).backfill())
+    items = read_all(run, SetHistoryService(source="buckets"), user_id, exercise_ids[1], 100)
+    by_session = {session["_id"]: session for session in sessions}
+    session_exercises = {
+        document["_id"]: document
+        for document in run(SessionExercise.get_motor_collection().find({}).to_list(None))
+    }
+    for item in items:
+        session_exercise = session_exercises[ObjectId(item.session_exercise_id)]
+        logged_set = session_exercise["actual_sets"][item.set_number - 1]
+        # Sets logged before they carried logged_at fall back to the exercise's, then the session's time
+        expected = logged_set.get("logged_at") or session_exercise["completed_at"] or by_session[ObjectId(item.session_id)]["started_at"]
+        assert item.performed_at == expected
+
+def test_backfill_only_rewrites_what_differs(history, run):
+    user_id, exercise_ids, sessions = history
+    service = SetHistoryService(bucket_size=4)
+    run(service.backfill())
+    assert run(service.backfill()) == 0
+
+    edited = sessions[0]["exercises"][1]
+    run(SessionExercise.get_motor_collection().update_one(
+        {"_id": edited}, {"$set": {"actual_sets.0.reps": 99}}
+    ))
+    assert run(service.backfill()) == 1
+    assert run(service.backfill()) == 0
+    assert_sources_agree(run, user_id, exercise_ids)
+
+def test_apply_mirrors_appends_and_edits(history, run):
+    user_id, exercise_ids, sessions = history
+    service = SetHistoryService(bucket_size=4)
+    run(service.backfill())
+    collection = SessionExercise.get_motor_collection()
+    session = sessions[-1]
+    ref = session["exercises"][0]
+    before = run(collection.find_one({"_id": ref}))
+
+    appended = {**before, "actual_sets": before["actual_sets"] + [{"reps": 5, "weight": 50.0, "logged_at": START + timedelta(days=30)}]}
+    run(collection.replace_one({"_id": ref}, appended))
+    run(service.apply(session, before, appended))
+    assert_sources_agree(run, user_id, exercise_ids)
+
+    edited = {**appended, "actual_sets": [{"reps": 1, "weight": 60.0, "logged_at": START + timedelta(days=31)}]}
+    run(collection.replace_one({"_id": ref}, edited))
+    run(service.apply(session, appended, edited))
+    assert_sources_agree(run, user_id, exercise_ids)
+
+def test_renamed_counter_is_migrated(history, run):
+    service = SetHistoryService(bucket_size=4)
+    run(service.backfill())
+    buckets = SetBucket.get_motor_collection()
+    run(buckets.update_many({}, {"$rename": {"set_count": "count"}}))
+    run(service.backfill())
+    assert run(buckets.count_documents({"count": {"$exists": True}})) == 0
+    assert run(buckets.count_documents({"set_count": {"$exists": False}})) == 0
@@ -0,0 +1,58 @@
+import random
+
+from app.utils.similarity import SimilarityIndex, similarity
+
+MUSCLES = ["chest", "back", "shoulders", "triceps", "biceps", "quads", "hamstrings", "glutes"]
+EQUIPMENT = ["barbell", "dumbbell", "cable", "machine", "bodyweight", None]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+
+def random_document(rng, doc_id):
+    muscles = rng.sample(MUSCLES, rng.randint(1, 3))
+    return doc_id, muscles, rng.choice(EQUIPMENT), rng.choice(DIFFICULTIES), f"payload-{doc_id}"
+
+def all_neighbors(index, ids):
+    return {doc_id: index.neighbors(doc_id, limit=index.k) for doc_id in ids}
+
+def test_similarity_scores():
+    bench = (("chest", "triceps"), "barbell", "beginner")
+    assert similarity(bench, bench) == 1.0
+    assert similarity(bench, (("quads",), "barbell", "beginner")) == 0.0
+    # Same muscles, same equipment family, one difficulty level apart
+    assert similarity(bench, (("chest", "triceps"), "dumbbell", "intermediate")) == round(0.9 * 0.85, 4)
+
+def test_neighbors_share_a_muscle_group_and_filter():
+    index = SimilarityIndex(k=5)
+    index.rebuild([
+        ("bench", ["chest", "triceps"], "barbell", "beginner", "bench"),
+        ("press", ["chest"], "dumbbell", "advanced", "press"),
+        ("dips", ["triceps", "chest"], "bodyweight", "beginner", "dips"),
+        ("squat", ["quads"], "barbell", "beginner", "squat"),
+    ])
+    assert [payload for payload, _ in index.neighbors("bench")] == ["press", "dips"]
+    assert index.neighbors("squat") == []
+    assert [payload for payload, _ in index.neighbors("bench", equipment="dumbbell")] == ["press"]
+    assert index.neighbors("missing") is None
+
+def test_incremental_updates_match_a_rebuild():
+    rng = random.Random(7)
+    incremental = SimilarityIndex(k=4)
+    documents = {}
+    for step in range(300):
+        doc_id = rng.randrange(40)
+        if doc_id in documents and rng.random() < 0.3:
+            incremental.remove(doc_id)
+            del documents[doc_id]
+        else:
+            # Adding an indexed id re-indexes it with its new features
+            documents[doc_id] = random_document(rng, doc_id)
+            incremental.add(*documents[doc_id])
+
+        if step % 25 == 0:
+            rebuilt = SimilarityIndex(k=4)
+            rebuilt.rebuild(documents.values())
+            assert all_neighbors(incremental, documents) == all_neighbors(rebuilt, documents)
+
+    rebuilt = SimilarityIndex(k=4)
+    rebuilt.rebuild(documents.values())
+    assert len(incremental) == len(rebuilt) == len(documents)
+    assert all_neighbors(incremental, documents) == all_neighbors(rebuilt, documents)
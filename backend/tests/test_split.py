@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.models.split import WorkoutSplit
+from app.services.split import SplitService
+
+def make_split(run, user_id, name, is_active=False):
+    return run(WorkoutSplit(name=name, user_id=user_id, split_type="full_body", is_active=is_active).insert())
+
+def active_names(run, user_id):
+    splits = run(WorkoutSplit.find({"user_id": user_id, "is_active": True}).to_list())
+    return [split.name for split in splits]
+
+def test_one_active_split_per_user_is_enforced(db, run):
+    user_id = ObjectId()
+    make_split(run, user_id, "A", is_active=True)
+    make_split(run, user_id, "B")
+    with pytest.raises(DuplicateKeyError):
+        make_split(run, user_id, "C", is_active=True)
+
+def test_activate_replaces_the_active_split(db, run):
+    user_id = ObjectId()
+    other_user = ObjectId()
+    first = make_split(run, user_id, "A", is_active=True)
+    second = make_split(run, user_id, "B")
+    make_split(run, other_user, "Theirs", is_active=True)
+    service = SplitService()
+
+    run(service._activate(second))
+    assert active_names(run, user_id) == ["B"]
+    assert active_names(run, other_user) == ["Theirs"]
+    activated = run(WorkoutSplit.get(second.id))
+    assert activated.activated_at is not None
+    assert run(WorkoutSplit.get(first.id)).updated_at is not None
+
+    run(service._activate(first))
+    assert active_names(run, user_id) == ["A"]
+
+def test_activating_the_active_split_keeps_its_start(db, run):
+    user_id = ObjectId()
+    split = make_split(run, user_id, "A")
+    service = SplitService()
+    run(service._activate(split))
+    # Stored times have millisecond precision, so date the activation clearly in the past
+    activated_at = datetime(2026, 1, 5, 9, 0)
+    run(WorkoutSplit.get_motor_collection().update_one({"_id": split.id}, {"$set": {"activated_at": activated_at}}))
+
+    run(service._activate(split))
+    assert run(WorkoutSplit.get(split.id)).activated_at == activated_at
+    assert active_names(run, user_id) == ["A"]
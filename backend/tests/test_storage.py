@@ -0,0 +1,85 @@
+import pytest
+from bson import ObjectId
+
+from app.models.session import SessionExercise, WorkoutSession
+from app.models.workout import Workout, WorkoutExercise
+from app.schemas.session import SessionExerciseCreate, SessionExerciseUpdate, WorkoutSessionCreate
+from app.services.session import SessionService
+from app.services.storage import ExerciseStorageMigrator
+
+@pytest.fixture
+def sessions(db, run):
+    """Three referenced sessions of three exercises each, logged in a different order per session"""
+    user_id = ObjectId()
+    exercise_ids = [ObjectId() for _ in range(3)]
+    planned = [run(WorkoutExercise(exercise_id=exercise_id, sets=3, reps=8, order=i + 1).insert()) for i, exercise_id in enumerate(exercise_ids)]
+    workout = run(Workout(name="Full Body", user_id=user_id, exercises=[entry.id for entry in planned]).insert())
+    service = SessionService()
+    session_ids = []
+    for rotation in range(3):
+        order = planned[rotation:] + planned[:rotation]
+        session = run(service.create_session(str(user_id), WorkoutSessionCreate(
+            workout_id=str(workout.id),
+            exercises=[
+                SessionExerciseCreate(
+                    exercise_id=str(entry.exercise_id), workout_exercise_id=str(entry.id),
+                    sets_completed=1, actual_sets=[{"reps": 8, "weight": 20.0 * (position + 1)}]
+                )
+                for position, entry in enumerate(order)
+            ]
+        )))
+        session_ids.append(session.id)
+    return service, session_ids
+
+def read(run, service, session_ids):
+    return [run(service.get_session(session_id)).model_dump() for session_id in session_ids]
+
+def test_round_trip_keeps_every_entry_in_order(sessions, run):
+    service, session_ids = sessions
+    before = read(run, service, session_ids)
+    children = {child["_id"]: child for child in run(SessionExercise.get_motor_collection().find().to_list(None))}
+    migrator = ExerciseStorageMigrator("sessions")
+
+    assert run(migrator.migrate("embedded", batch_size=2)) == 3
+    assert run(migrator.pending("embedded")) == 0
+    assert run(SessionExercise.get_motor_collection().count_documents({})) == 0
+    for session in run(WorkoutSession.get_motor_collection().find().to_list(None)):
+        assert [entry["_id"] for entry in session["embedded_exercises"]] == session["exercises"]
+    assert read(run, service, session_ids) == before
+    # Reruns find nothing left to convert
+    assert run(migrator.migrate("embedded")) == 0
+
+    assert run(migrator.migrate("referenced", batch_size=2)) == 3
+    assert run(migrator.pending("referenced")) == 0
+    restored = {child["_id"]: child for child in run(SessionExercise.get_motor_collection().find().to_list(None))}
+    assert restored == children
+    assert run(WorkoutSession.get_motor_collection().count_documents({"embedded_exercises": None})) == 3
+    assert read(run, service, session_ids) == before
+
+def test_writes_racing_an_embed_are_kept(sessions, run, monkeypatch):
+    service, session_ids = sessions
+    order = [entry.id for entry in run(service.get_session(session_ids[0])).exercises]
+    raced = order[1]
+    parents = WorkoutSession.get_motor_collection()
+    bulk_write = parents.bulk_write
+    edits = []
+
+    async def racing_bulk_write(requests, **kwargs):
+        # The edit lands after the migration copied the child and before the session switches layout
+        if not edits:
+            edits.append(await service.update_session_exercise(session_ids[0], raced, SessionExerciseUpdate(
+                actual_sets=[{"reps": 5, "weight": 100.0}]
+            )))
+        return await bulk_write(requests, **kwargs)
+
+    monkeypatch.setattr(parents, "bulk_write", racing_bulk_write)
+    assert run(ExerciseStorageMigrator("sessions").migrate("embedded")) == 3
+    assert edits
+    assert run(SessionExercise.get_motor_collection().count_documents({})) == 0
+
+    session = run(service.get_session(session_ids[0]))
+    assert [entry.id for entry in session.exercises] == order
+    entry = session.exercises[1]
+    assert [(logged_set["reps"], logged_set["weight"]) for logged_set in entry.actual_sets] == [(5, 100.0)]
+    # The session totals include the edit too
+    assert session.total_volume == 500.0 + 8 * 20.0 + 8 * 60.0
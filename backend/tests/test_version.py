@@ -0,0 +1,75 @@
+from app.utils.version import VersionCounter
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def counter(db, clock, changes=None, log_size=0):
+    on_change = (lambda: changes.append(True)) if changes is not None else None
+    return VersionCounter("catalog", lambda: db["versions"], ttl=1.0, on_change=on_change, clock=clock, log_size=log_size)
+
+def test_own_bumps_are_seen_immediately(db, run):
+    version = counter(db, Clock())
+    assert run(version.get()) == 0
+    assert run(version.bump()) == 1
+    assert run(version.bump()) == 2
+    assert run(version.get()) == 2
+
+def test_other_workers_bumps_are_seen_after_ttl(db, run):
+    clock = Clock()
+    changes = []
+    reader = counter(db, clock, changes)
+    writer = counter(db, clock)
+    assert run(reader.get()) == 0
+
+    run(writer.bump())
+    clock.now = 0.5
+    assert run(reader.get()) == 0
+    assert changes == []
+
+    clock.now = 1.0
+    assert run(reader.get()) == 1
+    assert changes == [True]
+    # Reading the same version again is not a change
+    clock.now = 2.0
+    assert run(reader.get()) == 1
+    assert changes == [True]
+
+def test_never_goes_back(db, run):
+    clock = Clock()
+    version = counter(db, clock)
+    run(version.bump())
+    run(version.bump())
+    run(db["versions"].update_one({"_id": "catalog"}, {"$set": {"version": 1}}))
+    clock.now = 5.0
+    assert run(version.get()) == 2
+
+def test_changes_since_reads_the_log(db, run):
+    version = counter(db, Clock(), log_size=3)
+    run(version.bump(["a"]))
+    run(version.bump(["b", "c"]))
+    run(version.bump(["a"]))
+    assert run(version.changes_since(3)) == (3, set())
+    assert run(version.changes_since(1)) == (3, {"a", "b", "c"})
+    assert run(version.changes_since(2)) == (3, {"a"})
+    # Older than the log keeps
+    run(version.bump(["d"]))
+    assert run(version.changes_since(0)) is None
+    assert run(version.changes_since(1)) == (4, {"a", "b", "c", "d"})
+
+def test_bumps_without_ids_cannot_be_caught_up(db, run):
+    version = counter(db, Clock(), log_size=3)
+    run(version.bump(["a"]))
+    run(version.bump())
+    run(version.bump(["b"]))
+    assert run(version.changes_since(1)) is None
+    assert run(version.changes_since(2)) == (3, {"b"})
+
+def test_counters_without_a_log_keep_none(db, run):
+    version = counter(db, Clock())
+    run(version.bump())
+    assert run(db["versions"].find_one({"_id": "catalog"})).keys() == {"_id", "version"}
+    assert run(version.changes_since(0)) is None